@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3ArrayGraph.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+
+from heapq import heappush, heappop
+from math import ceil, sqrt
+from numpy import arange, argsort, asarray, bincount, concatenate, cumsum, float64, floor, hypot, inf, int32, int64, ones, zeros
+
+from QNEAT3.Qneat3RawArrays import mapRawArrays, readRawHeader, writeRawArrays
+
+
+class Qneat3ArrayGraph():
+    """
+    Qneat3ArrayGraph:
+    Compact CSR (compressed sparse row) copy of a QgsGraph. It only holds numpy arrays
+    and therefore may be used without Qt/QGIS objects (index building, serialization,
+    worker processes). save() writes all arrays to one file that load() memory-maps, so
+    processes using the same graph file share one page-cached copy. patched() applies
+    edits of the network layer (see Qneat3GraphUpdater) without rebuilding the graph.
+    """
+
+    MAGIC = b'QAGR'
+    VERSION = 2
+    HEADER = '<4sIqqq64s' #magic, version, vertex count, edge count, edge feature count (0 or edge count), crs authority id
+
+    def __init__(self, vertex_x, vertex_y, edge_from, edge_to, edge_cost, csr_arrays=None, crs=None, edge_features=None):
+        """
+        Constructor for a Qneat3ArrayGraph object.
+        @type vertex_x, vertex_y: sequence of float
+        @param vertex_x, vertex_y: vertex coordinates indexed by vertex id
+        @type edge_from, edge_to: sequence of int
+        @param edge_from, edge_to: from- and to-vertex ids indexed by edge id
+        @type edge_cost: sequence of float
+        @param edge_cost: edge costs indexed by edge id
+        @type csr_arrays: tuple of arrays
+        @param csr_arrays: forward and backward star arrays (as in arrayLayout) if they are already known, eg. read from a graph file
+        @type crs: str
+        @param crs: authority id of the coordinate system of the vertices (only stored in graph files)
+        @type edge_features: sequence of int
+        @param edge_features: id of the network feature each edge was built from, indexed by edge id (needed by Qneat3GraphUpdater)
+        """
+        self.vertex_x = asarray(vertex_x, dtype=float64)
+        self.vertex_y = asarray(vertex_y, dtype=float64)
+        self.edge_from = asarray(edge_from, dtype=int32)
+        self.edge_to = asarray(edge_to, dtype=int32)
+        self.edge_cost = asarray(edge_cost, dtype=float64)
+        self.edge_features = asarray(edge_features, dtype=int64) if edge_features is not None else None
+
+        self.vertex_count = len(self.vertex_x)
+        self.edge_count = len(self.edge_from)
+
+        self.crs = crs
+        self.path = None #graph file the arrays are mapped from
+
+        if csr_arrays is None:
+            #forward star: edges sorted by their from vertex
+            self.out_offsets, self.out_edges = self.buildCsr(self.edge_from)
+            self.out_targets = self.edge_to[self.out_edges]
+            self.out_costs = self.edge_cost[self.out_edges]
+
+            #backward star: edges sorted by their to vertex
+            self.in_offsets, self.in_edges = self.buildCsr(self.edge_to)
+            self.in_sources = self.edge_from[self.in_edges]
+            self.in_costs = self.edge_cost[self.in_edges]
+        else:
+            self.out_offsets, self.out_edges, self.out_targets, self.out_costs, self.in_offsets, self.in_edges, self.in_sources, self.in_costs = csr_arrays
+
+        self._adjacency_lists = {}
+        self._vertex_grid = None
+
+    def __getstate__(self):
+        """
+        The python adjacency lists and the vertex grid are caches and are not pickled when the graph is sent to worker processes.
+        A graph mapped from a file is pickled as its path only, the worker processes map the same file.
+        """
+        if self.path is not None:
+            return {'path': self.path}
+        state = self.__dict__.copy()
+        state['_adjacency_lists'] = {}
+        state['_vertex_grid'] = None
+        return state
+
+    def __setstate__(self, state):
+        if set(state) == {'path'}:
+            state = self.load(state['path']).__dict__
+        self.__dict__.update(state)
+
+    def save(self, path):
+        """Writes the graph (vertices, edges and both stars) to a single file of raw arrays that can be memory-mapped"""
+        edge_features = self.edge_features if self.edge_features is not None else zeros(0, dtype=int64)
+        writeRawArrays(path, self.HEADER, (self.MAGIC, self.VERSION, self.vertex_count, self.edge_count, len(edge_features), (self.crs or '').encode('utf-8')),
+                       self.arrayLayout(self.vertex_x, self.vertex_y, self.edge_from, self.edge_to, self.edge_cost,
+                                        self.out_offsets, self.out_edges, self.out_targets, self.out_costs,
+                                        self.in_offsets, self.in_edges, self.in_sources, self.in_costs) + [(edge_features, int64)])
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-maps a graph file written by save(). The arrays are read-only and only the pages touched are read from disk;
+        the python adjacency lists used by dijkstra() are still built per process on first use.
+        """
+        magic, version, vertex_count, edge_count, edge_feature_count, crs = readRawHeader(path, cls.HEADER)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("{} is not a QNEAT3 graph file (version {}), delete it to rebuild the graph".format(path, cls.VERSION))
+        arrays = mapRawArrays(path, cls.HEADER, cls.arrayLayout(vertex_count, vertex_count, edge_count, edge_count, edge_count,
+                                                                vertex_count+1, edge_count, edge_count, edge_count,
+                                                                vertex_count+1, edge_count, edge_count, edge_count) + [(edge_feature_count, int64)])
+        graph = cls(*arrays[:5], csr_arrays=arrays[5:13], crs=crs.rstrip(b'\0').decode('utf-8') or None, edge_features=arrays[13] if edge_feature_count else None)
+        graph.path = os.path.abspath(path)
+        return graph
+
+    @staticmethod
+    def arrayLayout(vertex_x, vertex_y, edge_from, edge_to, edge_cost, out_offsets, out_edges, out_targets, out_costs, in_offsets, in_edges, in_sources, in_costs):
+        return [(vertex_x, float64), (vertex_y, float64), (edge_from, int32), (edge_to, int32), (edge_cost, float64),
+                (out_offsets, int64), (out_edges, int32), (out_targets, int32), (out_costs, float64),
+                (in_offsets, int64), (in_edges, int32), (in_sources, int32), (in_costs, float64)]
+
+    @classmethod
+    def fromQgsGraph(cls, graph, criterion=0):
+        """Copies vertices, edges and the costs of the given strategy index of a QgsGraph"""
+        vertex_count = graph.vertexCount()
+        edge_count = graph.edgeCount()
+
+        vertex_x = zeros(vertex_count, dtype=float64)
+        vertex_y = zeros(vertex_count, dtype=float64)
+        for i in range(vertex_count):
+            pt = graph.vertex(i).point()
+            vertex_x[i] = pt.x()
+            vertex_y[i] = pt.y()
+
+        edge_from = zeros(edge_count, dtype=int32)
+        edge_to = zeros(edge_count, dtype=int32)
+        edge_cost = zeros(edge_count, dtype=float64)
+        for i in range(edge_count):
+            edge = graph.edge(i)
+            edge_from[i] = edge.fromVertex()
+            edge_to[i] = edge.toVertex()
+            edge_cost[i] = edge.cost(criterion)
+
+        return cls(vertex_x, vertex_y, edge_from, edge_to, edge_cost)
+
+    @staticmethod
+    def costsFromQgsGraph(graph, criterion):
+        """Returns the edge costs of the given strategy index of a QgsGraph, indexed by edge id"""
+        edge_cost = zeros(graph.edgeCount(), dtype=float64)
+        for i in range(graph.edgeCount()):
+            edge_cost[i] = graph.edge(i).cost(criterion)
+        return edge_cost
+
+    def withCosts(self, edge_cost):
+        """Returns a graph with other edge costs (eg. of another criterion) sharing the vertex, edge and star arrays of this one"""
+        edge_cost = asarray(edge_cost, dtype=float64)
+        return Qneat3ArrayGraph(self.vertex_x, self.vertex_y, self.edge_from, self.edge_to, edge_cost,
+                                csr_arrays=(self.out_offsets, self.out_edges, self.out_targets, edge_cost[self.out_edges],
+                                            self.in_offsets, self.in_edges, self.in_sources, edge_cost[self.in_edges]),
+                                crs=self.crs, edge_features=self.edge_features)
+
+    def patched(self, removed_edge_ids=(), vertex_x=(), vertex_y=(), edge_from=(), edge_to=(), edge_cost=(), edge_features=()):
+        """
+        Returns a new graph without the removed edges and with the given vertices and edges appended (the edge ids of the
+        added edges may refer to the added vertices, which get the ids from vertex_count on). Vertex ids stay valid: vertices
+        are never removed, vertices left without edges are only skipped by nearestVertexId. Edge ids are renumbered.
+        Only numpy work (the stars are sorted again), so patching takes well below a second per million edges.
+        """
+        keep = ones(self.edge_count, dtype=bool)
+        keep[asarray(removed_edge_ids, dtype=int64)] = False
+        if self.edge_features is not None:
+            edge_features = concatenate((self.edge_features[keep], asarray(edge_features, dtype=int64)))
+        else:
+            edge_features = None
+        return Qneat3ArrayGraph(concatenate((self.vertex_x, asarray(vertex_x, dtype=float64))),
+                                concatenate((self.vertex_y, asarray(vertex_y, dtype=float64))),
+                                concatenate((self.edge_from[keep], asarray(edge_from, dtype=int32))),
+                                concatenate((self.edge_to[keep], asarray(edge_to, dtype=int32))),
+                                concatenate((self.edge_cost[keep], asarray(edge_cost, dtype=float64))),
+                                crs=self.crs, edge_features=edge_features)
+
+    def buildCsr(self, edge_vertices):
+        """Returns (offsets, edge ids) sorting all edges by the given vertex column"""
+        order = argsort(edge_vertices, kind='stable').astype(int32)
+        offsets = zeros(self.vertex_count+1, dtype=int64)
+        offsets[1:] = cumsum(bincount(edge_vertices, minlength=self.vertex_count))
+        return offsets, order
+
+    def degree(self):
+        """Returns the sum of incoming and outgoing edges per vertex"""
+        return (self.out_offsets[1:] - self.out_offsets[:-1]) + (self.in_offsets[1:] - self.in_offsets[:-1])
+
+    def getAdjacency(self, reverse=False):
+        """Returns (offsets, neighbours, costs, edge ids) as python lists, which are way faster to iterate than numpy arrays"""
+        if reverse not in self._adjacency_lists:
+            if reverse:
+                self._adjacency_lists[reverse] = (self.in_offsets.tolist(), self.in_sources.tolist(), self.in_costs.tolist(), self.in_edges.tolist())
+            else:
+                self._adjacency_lists[reverse] = (self.out_offsets.tolist(), self.out_targets.tolist(), self.out_costs.tolist(), self.out_edges.tolist())
+        return self._adjacency_lists[reverse]
+
+    def dijkstra(self, startpoint_id, max_cost=inf, reverse=False, target_id=None):
+        """
+        Calculates Dijkstra beginning from one vertex. Mirrors QgsGraphAnalyzer.dijkstra: returns a tuple (tree, cost)
+        where tree holds the id of the incoming edge of each vertex (-1 for the start vertex and unreached vertices)
+        and cost the cost from the start vertex (inf if unreached). Vertices beyond max_cost are not settled.
+        If reverse is True the edges are traversed backwards, yielding the costs towards the start vertex.
+        If target_id is given the search stops as soon as the target vertex is settled.
+        """
+        offsets, neighbours, costs, edges = self.getAdjacency(reverse)
+
+        cost = [inf]*self.vertex_count
+        tree = [-1]*self.vertex_count
+        cost[startpoint_id] = 0.0
+
+        heap = [(0.0, startpoint_id)]
+        while heap:
+            current_cost, vertex_id = heappop(heap)
+            if current_cost > cost[vertex_id]:
+                continue
+            if vertex_id == target_id:
+                break
+            for i in range(offsets[vertex_id], offsets[vertex_id+1]):
+                new_cost = current_cost + costs[i]
+                neighbour_id = neighbours[i]
+                if new_cost < cost[neighbour_id] and new_cost <= max_cost:
+                    cost[neighbour_id] = new_cost
+                    tree[neighbour_id] = edges[i]
+                    heappush(heap, (new_cost, neighbour_id))
+
+        return asarray(tree, dtype=int32), asarray(cost, dtype=float64)
+
+    def shortestPath(self, tree, cost, to_vertex_id):
+        """Returns the vertex ids of the path from the start vertex of a dijkstra (tree, cost) result to to_vertex_id (empty if unreached)"""
+        if cost[to_vertex_id] == inf:
+            return []
+        path = [int(to_vertex_id)]
+        edge_id = tree[to_vertex_id]
+        while edge_id != -1:
+            path.append(int(self.edge_from[edge_id]))
+            edge_id = tree[path[-1]]
+        return path[::-1]
+
+    def nearestVertexId(self, x, y):
+        """
+        Returns (vertex id, distance) of the vertex nearest to the point x, y. The vertices are binned into a regular grid
+        of about two vertices per cell on first use, the cells are then searched in growing rings around the point.
+        Vertices without edges (left over by patched()) are not considered.
+        """
+        if self._vertex_grid is None:
+            self._vertex_grid = self.buildVertexGrid()
+        min_x, min_y, cell_size, ncols, nrows, cell_offsets, cell_vertices = self._vertex_grid
+
+        col = min(max(int(floor((x - min_x) / cell_size)), 0), ncols - 1)
+        row = min(max(int(floor((y - min_y) / cell_size)), 0), nrows - 1)
+        best_id, best_distance = -1, inf
+        for ring in range(max(ncols, nrows)):
+            #vertices in cells of this ring are at least (ring - 1) cells away from the point
+            if best_id != -1 and (ring - 1) * cell_size > best_distance:
+                break
+            for cell_row in range(row - ring, row + ring + 1):
+                if cell_row < 0 or cell_row >= nrows:
+                    continue
+                step = 1 if abs(cell_row - row) == ring else 2 * ring
+                for cell_col in range(col - ring, col + ring + 1, max(step, 1)):
+                    if cell_col < 0 or cell_col >= ncols:
+                        continue
+                    cell = cell_row * ncols + cell_col
+                    vertex_ids = cell_vertices[cell_offsets[cell]:cell_offsets[cell+1]]
+                    if len(vertex_ids) == 0:
+                        continue
+                    distances = hypot(self.vertex_x[vertex_ids] - x, self.vertex_y[vertex_ids] - y)
+                    nearest = distances.argmin()
+                    if distances[nearest] < best_distance:
+                        best_id, best_distance = int(vertex_ids[nearest]), float(distances[nearest])
+        return best_id, best_distance
+
+    def buildVertexGrid(self):
+        vertex_ids = (self.degree() > 0).nonzero()[0]
+        if len(vertex_ids) == 0:
+            vertex_ids = arange(self.vertex_count)
+        vertex_x, vertex_y = self.vertex_x[vertex_ids], self.vertex_y[vertex_ids]
+        min_x, min_y = vertex_x.min(), vertex_y.min()
+        width, height = vertex_x.max() - min_x, vertex_y.max() - min_y
+        cell_size = max(sqrt(max(width * height, 1e-12) * 2.0 / len(vertex_ids)), width / 4096.0, height / 4096.0, 1e-9)
+        ncols = int(ceil(width / cell_size)) + 1
+        nrows = int(ceil(height / cell_size)) + 1
+        cells = (floor((vertex_y - min_y) / cell_size).astype(int64) * ncols + floor((vertex_x - min_x) / cell_size).astype(int64))
+        cell_vertices = vertex_ids[argsort(cells, kind='stable')].astype(int32)
+        cell_offsets = zeros(ncols * nrows + 1, dtype=int64)
+        cell_offsets[1:] = cumsum(bincount(cells, minlength=ncols * nrows))
+        return min_x, min_y, cell_size, ncols, nrows, cell_offsets, cell_vertices
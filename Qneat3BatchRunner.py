@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3BatchRunner.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import csv
+import json
+import os
+import sys
+
+from math import isinf
+from time import perf_counter
+from numpy import asarray, float64
+
+from qgis.core import QgsApplication, QgsFields, QgsProcessingException, QgsProcessingFeedback, QgsVectorFileWriter, QgsVectorLayer, QgsWkbTypes
+
+from QNEAT3.Qneat3Cache import Qneat3DijkstraTreeCache, Qneat3ResultCache
+from QNEAT3.Qneat3Exceptions import Qneat3CrsException, Qneat3JobException
+from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPointSet
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Utilities import getPointsFromArrays, readPointArrays
+
+
+def startQgis():
+    """Starts a headless QgsApplication (without GUI and without the plugin and processing machinery) if none is running"""
+    if QgsApplication.instance() is not None:
+        return None
+    application = QgsApplication([], False)
+    application.initQgis()
+    return application
+
+
+def createNetwork(network, network_layer, points, feedback, profiler=None, edge_features=False):
+    """
+    Builds a Qneat3Network from the "network" settings of a job (see Qneat3BatchRunner) with the given points tied to the graph.
+    edge_features records the feature ids of the edges, which Qneat3GraphUpdater needs.
+    """
+    default_direction = network.get('default_direction', 2)
+    return Qneat3Network(network_layer, points, int(network.get('strategy', 0)), network.get('direction_field', ''),
+                         network.get('value_forward', ''), network.get('value_backward', ''), network.get('value_both', ''),
+                         Qneat3BatchRunner.DIRECTIONS.get(default_direction, default_direction), network_layer.crs(),
+                         network.get('speed_field', ''), float(network.get('default_speed', 5.0)), float(network.get('tolerance', 0.0)),
+                         feedback, profiler, input_edgeFeatures=edge_features)
+
+
+class Qneat3ConsoleFeedback(QgsProcessingFeedback):
+    """Feedback printing the log messages of QNEAT3 to the console instead of the processing log window"""
+
+    def __init__(self, quiet=False):
+        super().__init__()
+        self.quiet = quiet
+
+    def pushInfo(self, info):
+        if not self.quiet:
+            print(info)
+
+    def reportError(self, error, fatalError=False):
+        print(error, file=sys.stderr)
+
+
+class Qneat3BatchRunner():
+    """
+    Qneat3BatchRunner:
+    Runs a job of many iso-area and OD matrix tasks against one network. The points of all tasks are tied to the
+    graph at once, so the network is read and the graph is built a single time for the whole job. Tasks run one after
+    another; only the Dijkstra searches within a task are spread over worker processes (workers, 0 = one per CPU core).
+
+    A job is a JSON file (paths relative to the job file):
+    {"network": {"path": "roads.gpkg", "strategy": 0, "direction_field": "", "value_forward": "", "value_backward": "", "value_both": "",
+                 "default_direction": 2, "speed_field": "", "default_speed": 5.0, "tolerance": 0.0, "entry_cost_calculation_method": 1},
+     "workers": 1,
+     "performance_report": "report.json",
+     "result_cache": {"max_entries": 256, "ttl": 3600, "directory": "cache"},
+     "tree_cache_mb": 0,
+     "tasks": [{"type": "iso_polygons", "points": "stations.shp", "id_field": "id", "max_cost": 2000, "interval": 500, "output": "iso.gpkg"},
+               {"type": "od_matrix", "from_points": "homes.shp", "from_id_field": "id", "to_points": [[x, y], ...], "output": "od.csv"}]}
+    Points are given as path of a point layer (with id field) or as inline list of coordinates (ids are the list indices).
+    tree_cache_mb > 0 lets tasks with common origins share their Dijkstra trees. It is off by default, as the trees take up to
+    tree_cache_mb of memory and only searches in the main process (workers 1) use them.
+    """
+
+    TASK_TYPES = ['iso_pointcloud', 'iso_interpolation', 'iso_contours', 'iso_polygons', 'od_matrix']
+    ISO_METHODS = ['tin', 'edge_buffer', 'alpha']
+    DIRECTIONS = {'forward': 0, 'backward': 1, 'both': 2}
+
+    def __init__(self, job, base_dir='', feedback=None, workers=None):
+        self.job = job
+        self.base_dir = base_dir
+        self.feedback = feedback if feedback is not None else Qneat3ConsoleFeedback()
+        self.workers = workers if workers is not None else int(job.get('workers', 1))
+        self.profiler = Qneat3Profiler('batch')
+        self.net = None
+        self.validateJob()
+
+    @classmethod
+    def fromJobFile(cls, path, feedback=None, workers=None):
+        with open(path) as job_file:
+            try:
+                job = json.load(job_file)
+            except ValueError as error:
+                raise Qneat3JobException('{} is no valid JSON file ({})'.format(path, error))
+        return cls(job, os.path.dirname(os.path.abspath(path)), feedback, workers)
+
+    def resolvePath(self, path):
+        return path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+
+    def validateJob(self):
+        network = self.job.get('network')
+        if not isinstance(network, dict) or not network.get('path'):
+            raise Qneat3JobException('the job has no "network" with a "path"')
+        tasks = self.job.get('tasks')
+        if not isinstance(tasks, list) or not tasks:
+            raise Qneat3JobException('the job has no "tasks"')
+        for index, task in enumerate(tasks):
+            task_type = task.get('type')
+            if task_type not in self.TASK_TYPES:
+                raise Qneat3JobException('task {} has unknown type {} (expected one of {})'.format(index, task_type, ', '.join(self.TASK_TYPES)))
+            if not task.get('output'):
+                raise Qneat3JobException('task {} has no "output"'.format(index))
+            if task_type == 'od_matrix':
+                if 'points' not in task and ('from_points' not in task or 'to_points' not in task):
+                    raise Qneat3JobException('task {} needs "points" or "from_points" and "to_points"'.format(index))
+            else:
+                if 'points' not in task or 'max_cost' not in task:
+                    raise Qneat3JobException('task {} needs "points" and "max_cost"'.format(index))
+                if task.get('method', 'tin') not in self.ISO_METHODS:
+                    raise Qneat3JobException('task {} has unknown method {} (expected one of {})'.format(index, task.get('method'), ', '.join(self.ISO_METHODS)))
+
+    def loadNetwork(self):
+        network = self.job['network']
+        with self.profiler.phase('feature read'):
+            network_layer = QgsVectorLayer(self.resolvePath(network['path']), 'network', 'ogr')
+        if not network_layer.isValid():
+            raise Qneat3JobException('the network {} can not be read'.format(network['path']))
+        return network_layer
+
+    def loadPoints(self, points, id_field, crs):
+        """Returns (list of point ids, x array, y array) of a point layer path or of an inline list of coordinates (numbered from 0)"""
+        if isinstance(points, list):
+            coordinates = asarray(points, dtype=float64).reshape(-1, 2)
+            return list(range(len(points))), coordinates[:, 0], coordinates[:, 1]
+
+        with self.profiler.phase('feature read'):
+            point_layer = QgsVectorLayer(self.resolvePath(points), 'points', 'ogr')
+            if not point_layer.isValid():
+                raise Qneat3JobException('the point layer {} can not be read'.format(points))
+            if point_layer.crs() != crs:
+                raise Qneat3CrsException(crs.authid(), point_layer.crs().authid())
+            if not id_field or point_layer.fields().lookupField(id_field) == -1:
+                raise Qneat3JobException('the point layer {} has no id field {}'.format(points, id_field))
+            point_x, point_y, point_ids = readPointArrays(point_layer, id_field)
+            return point_ids, point_x, point_y
+
+    def taskPointSets(self, task):
+        """Returns the (points, id field) pairs of a task: one for iso-area tasks, origins and destinations for OD matrices"""
+        if task['type'] == 'od_matrix' and 'points' not in task:
+            return [(task['from_points'], task.get('from_id_field', task.get('id_field'))), (task['to_points'], task.get('to_id_field', task.get('id_field')))]
+        return [(task['points'], task.get('id_field'))]
+
+    def buildNetwork(self):
+        """Reads the network and the points of all tasks and builds the graph once with all points tied to it"""
+        network = self.job['network']
+        network_layer = self.loadNetwork()
+        crs = network_layer.crs()
+
+        point_sets = []
+        for task in self.job['tasks']:
+            point_sets.append([self.loadPoints(points, id_field, crs) for points, id_field in self.taskPointSets(task)])
+        coordinates = [point for task_sets in point_sets for point_ids, x, y in task_sets for point in getPointsFromArrays(x, y)]
+
+        self.feedback.pushInfo("[QNEAT3BatchRunner] Building graph for {} tasks with {} points...".format(len(point_sets), len(coordinates)))
+        self.net = createNetwork(network, network_layer, coordinates, self.feedback, self.profiler)
+
+        #tasks with overlapping origins share their Dijkstra trees (0 = no tree cache)
+        tree_cache_mb = float(self.job.get('tree_cache_mb', 0))
+        if tree_cache_mb > 0:
+            self.net.setupTreeCache(Qneat3DijkstraTreeCache(int(tree_cache_mb * 1024 * 1024)))
+        result_cache = self.job.get('result_cache')
+        if result_cache:
+            cache_dir = self.resolvePath(result_cache['directory']) if result_cache.get('directory') else None
+            self.net.setupResultCache(Qneat3ResultCache(int(result_cache.get('max_entries', 256)), ttl=result_cache.get('ttl'), cache_dir=cache_dir))
+
+        #slice the tied points of the merged list back into the tasks
+        entry_cost_calc_method = int(network.get('entry_cost_calculation_method', 1))
+        self.task_points = []
+        offset = 0
+        with self.profiler.phase('feature read'):
+            for task_sets in point_sets:
+                analysis_point_sets = []
+                for point_ids, x, y in task_sets:
+                    analysis_point_sets.append(Qneat3AnalysisPointSet.fromArrays("point", point_ids, x, y, self.net, self.net.list_tiedPoints[offset:offset+len(point_ids)], entry_cost_calc_method, self.feedback))
+                    offset = offset + len(point_ids)
+                self.task_points.append(analysis_point_sets)
+
+    def run(self):
+        """Runs all tasks of the job and returns a list with a summary dictionary per task"""
+        if self.net is None:
+            self.buildNetwork()
+
+        summaries = []
+        for index, task in enumerate(self.job['tasks']):
+            if self.feedback.isCanceled():
+                break
+            self.feedback.pushInfo("[QNEAT3BatchRunner] Running task {} of {}: {}".format(index+1, len(self.job['tasks']), task['type']))
+            start_time = perf_counter()
+            if task['type'] == 'od_matrix':
+                count = self.runOdMatrix(task, *self.task_points[index])
+            else:
+                count = self.runIsoArea(task, self.task_points[index][0])
+            summaries.append({'task': index, 'type': task['type'], 'output': self.resolvePath(task['output']), 'features': count, 'wall_time': perf_counter() - start_time})
+
+        report_path = self.job.get('performance_report')
+        self.profiler.finish(self.feedback, self.resolvePath(report_path) if report_path else None)
+        return summaries
+
+    def runIsoArea(self, task, analysis_points):
+        """Runs one iso-area task like the corresponding (from layer) processing algorithm. Returns the number of output features."""
+        output_path = self.resolvePath(task['output'])
+        max_dist = float(task['max_cost'])
+        interval = float(task.get('interval', max_dist))
+        cell_size = float(task.get('cell_size', 10))
+        raster_profile = int(task.get('raster_profile', 0))
+        ring_polygons = bool(task.get('ring_polygons', False))
+        net = self.net
+
+        if task['type'] == 'iso_pointcloud':
+            return self.writeFeatures(output_path, net.calcIsoPoints(analysis_points, max_dist, self.workers), QgsWkbTypes.PointM)
+
+        if task['type'] == 'iso_interpolation':
+            iso_pointcloud = net.calcIsoPoints(analysis_points, max_dist+(max_dist*0.1), self.workers)
+            net.calcIsoTinInterpolation(iso_pointcloud, cell_size, output_path, keep_raster=False, raster_profile=raster_profile)
+            return 0
+
+        method = task.get('method', 'tin')
+        if task['type'] == 'iso_polygons' and method == 'edge_buffer':
+            vertex_costs = net.calcIsoCosts(analysis_points, max_dist, self.workers)
+            featurelist = net.calcIsoEdgePolygons(analysis_points, vertex_costs, max_dist, interval, float(task.get('buffer_distance', 50.0)), ring_polygons)
+            return self.writeFeatures(output_path, featurelist, QgsWkbTypes.Polygon)
+        if task['type'] == 'iso_polygons' and method == 'alpha':
+            vertex_costs = net.calcIsoCosts(analysis_points, max_dist, self.workers)
+            featurelist = net.calcIsoAlphaPolygons(analysis_points, vertex_costs, max_dist, interval, float(task.get('alpha', 100.0)), ring_polygons)
+            return self.writeFeatures(output_path, featurelist, QgsWkbTypes.Polygon)
+
+        iso_pointcloud = net.calcIsoPoints(analysis_points, max_dist+(max_dist*0.1), self.workers)
+        interpolation_raster_path = self.resolvePath(task['interpolation_output']) if task.get('interpolation_output') else None
+        interpolation_raster = net.calcIsoTinInterpolation(iso_pointcloud, cell_size, interpolation_raster_path, raster_profile=raster_profile, cost_bound=net.calcIsoLevels(max_dist, interval)[-1])
+        if task['type'] == 'iso_contours':
+            return self.writeFeatures(output_path, net.calcIsoContours(max_dist, interval, interpolation_raster), QgsWkbTypes.LineString)
+        return self.writeFeatures(output_path, net.calcIsoPolygons(max_dist, interval, interpolation_raster, ring_polygons), QgsWkbTypes.Polygon)
+
+    def runOdMatrix(self, task, from_points, to_points=None):
+        """Writes the OD matrix of a task as CSV (like the OD matrix as CSV algorithm). Returns the number of OD pairs."""
+        to_points = to_points if to_points is not None else from_points
+        if task.get('hub_label_index'):
+            self.net.setupHubLabelIndex(self.resolvePath(task['hub_label_index']))
+        destination_rows = list(to_points.rows())
+        destination_vertex_ids = to_points.vertex_ids.tolist()
+        origin_rows = list(from_points.rows())
+
+        count = 0
+        with self.profiler.phase('sink writing'):
+            with open(self.resolvePath(task['output']), 'w', newline='') as csvfile:
+                csv_writer = csv.writer(csvfile, delimiter=';', quotechar='|', quoting=csv.QUOTE_MINIMAL)
+                csv_writer.writerow(["origin_id", "destination_id", "entry_cost", "network_cost", "exit_cost", "total_cost"])
+                for index, network_costs in self.net.calcNetworkCostRows(from_points.vertex_ids.tolist(), destination_vertex_ids, self.workers):
+                    start_point_id, start_vertex_id, start_entry_cost = origin_rows[index]
+                    for (query_point_id, query_vertex_id, query_entry_cost), network_cost in zip(destination_rows, network_costs):
+                        if isinf(network_cost):
+                            csv_writer.writerow([start_point_id, query_point_id, None, None, None, None])
+                        else:
+                            csv_writer.writerow([start_point_id, query_point_id, start_entry_cost, network_cost, query_entry_cost, start_entry_cost + network_cost + query_entry_cost])
+                    count = count + len(destination_rows)
+        self.net.hub_label_index = None
+        return count
+
+    def writeFeatures(self, path, featurelist, wkb_type):
+        """Writes a list of QgsFeature to a vector file, the format is taken from the file extension (GeoPackage by default)"""
+        with self.profiler.phase('sink writing'):
+            driver_name = QgsVectorFileWriter.driverForExtension(os.path.splitext(path)[1]) or 'GPKG'
+            fields = featurelist[0].fields() if featurelist else QgsFields()
+            writer = QgsVectorFileWriter(path, 'UTF-8', fields, wkb_type, self.net.AnalysisCrs, driver_name)
+            if writer.hasError() != QgsVectorFileWriter.NoError:
+                raise QgsProcessingException('Could not create {}: {}'.format(path, writer.errorMessage()))
+            writer.addFeatures(featurelist)
+            del writer
+        return len(featurelist)
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Cache.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import pickle
+import shutil
+import threading
+import time
+
+from collections import OrderedDict
+from functools import wraps
+from hashlib import blake2b
+from inspect import signature
+from numpy import asarray, float64, int32
+
+#process wide caches by (cache directory, time to live), shared by all algorithm runs of a QGIS session
+shared_caches = {}
+shared_tree_cache = None
+
+
+def graphFingerprint(array_graph):
+    """Returns a digest of the vertices, edges and costs of a Qneat3ArrayGraph. Cached results are only valid for the graph with the same fingerprint."""
+    digest = blake2b(digest_size=16)
+    for array in (array_graph.vertex_x, array_graph.vertex_y, array_graph.edge_from, array_graph.edge_to, array_graph.edge_cost):
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def valueSize(value):
+    """Rough size of a cached value in bytes: numpy arrays count with their buffers, everything else with its pickled size"""
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)) and all(hasattr(item, 'nbytes') for item in value):
+        return sum(int(item.nbytes) for item in value)
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+class Qneat3ResultCache():
+    """
+    Qneat3ResultCache:
+    LRU cache for the results of network queries (shortest paths, iso costs, iso pointclouds, iso polygons). Keys are tuples
+    starting with the fingerprint of the graph, followed by the kind of result, the snapped vertex ids and the query parameters.
+    Entries are dropped when the cache holds more than max_entries entries or max_bytes bytes, and when they are older than
+    ttl seconds (None = no expiry). If cache_dir is given the results are also pickled to files below cache_dir/<fingerprint>,
+    so they survive the process; a changed graph gets a new fingerprint and never sees the results of the old one.
+    Values are returned as stored, callers must not modify them.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=512*1024*1024, ttl=None, cache_dir=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict() #key -> (time stored, size, value)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.isExpired(entry[0]):
+                self.removeEntry(key)
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits = self.hits + 1
+                return entry[2]
+
+        value = self.readFile(key)
+        with self.lock:
+            if value is None:
+                self.misses = self.misses + 1
+                return default
+            self.hits = self.hits + 1
+            self.storeEntry(key, value)
+        return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.storeEntry(key, value)
+        self.writeFile(key, value)
+        return value
+
+    def invalidate(self, fingerprint=None):
+        """Drops all entries of the graph with the given fingerprint (all entries if None), in memory and on disk"""
+        with self.lock:
+            for key in [key for key in self.entries if fingerprint is None or key[0] == fingerprint]:
+                self.removeEntry(key)
+        if self.cache_dir:
+            paths = [os.path.join(self.cache_dir, fingerprint)] if fingerprint is not None else [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)] if os.path.isdir(self.cache_dir) else []
+            for path in paths:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def isExpired(self, stored_time):
+        return self.ttl is not None and time.time() - stored_time > self.ttl
+
+    def storeEntry(self, key, value):
+        if key in self.entries:
+            self.removeEntry(key)
+        size = valueSize(value)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (time.time(), size, value)
+        self.size = self.size + size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self.removeEntry(next(iter(self.entries)))
+
+    def removeEntry(self, key):
+        self.size = self.size - self.entries.pop(key)[1]
+
+    def filePath(self, key):
+        return os.path.join(self.cache_dir, str(key[0]), '{}-{}.pickle'.format(key[1], blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()))
+
+    def readFile(self, key):
+        if not self.cache_dir:
+            return None
+        path = self.filePath(key)
+        try:
+            if self.isExpired(os.path.getmtime(path)):
+                os.remove(path)
+                return None
+            with open(path, 'rb') as cache_file:
+                stored_key, value = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        #guards against digest collisions
+        return value if stored_key == key else None
+
+    def writeFile(self, key, value):
+        if not self.cache_dir:
+            return
+        path = self.filePath(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        #written to a temporary file first, so concurrent readers never see a partial file
+        temporary_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(temporary_path, 'wb') as cache_file:
+            pickle.dump((key, value), cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    def statistics(self):
+        with self.lock:
+            return OrderedDict([('entries', len(self.entries)), ('size_mb', round(self.size / (1024.0 * 1024.0), 1)), ('hits', self.hits), ('misses', self.misses)])
+
+
+class Qneat3DijkstraTreeCache():
+    """
+    Qneat3DijkstraTreeCache:
+    LRU cache of complete Dijkstra results (tree and cost arrays) per graph, criterion and source vertex, limited to max_bytes.
+    Trees are stored as int32 and costs as float64 (12 bytes per vertex instead of the 40+ bytes of python lists), so cached
+    costs equal the ones of QgsGraphAnalyzer. The arrays are read-only and handed out as they are. One cache is shared by all Qneat3Network objects of a process, but trees are only valid
+    on the graph they were calculated on: tying other analysis points splits other edges and renumbers the vertices, so
+    only networks built from the same layer, points and parameters (eg. a rerun of a model) share trees. Algorithms with
+    different point layers on the same network never hit each others trees, tie the union of their points in one network
+    instead (like the batch runner does for all tasks of a job).
+    """
+
+    def __init__(self, max_bytes=256*1024*1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() #(graph fingerprint, criterion, source vertex id) -> (tree, cost)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, fingerprint, criterion, vertex_id):
+        key = (fingerprint, criterion, vertex_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses = self.misses + 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits = self.hits + 1
+            return entry
+
+    def put(self, fingerprint, criterion, vertex_id, tree, cost):
+        """Stores a Dijkstra result in compact form and returns the compact (tree, cost) arrays"""
+        entry = (asarray(tree, dtype=int32), asarray(cost, dtype=float64))
+        for array in entry:
+            array.flags.writeable = False
+        key = (fingerprint, criterion, vertex_id)
+        size = entry[0].nbytes + entry[1].nbytes
+        with self.lock:
+            if key in self.entries:
+                self.size = self.size - sum(array.nbytes for array in self.entries.pop(key))
+            if size <= self.max_bytes:
+                self.entries[key] = entry
+                self.size = self.size + size
+            while self.size > self.max_bytes:
+                self.size = self.size - sum(array.nbytes for array in self.entries.popitem(last=False)[1])
+        return entry
+
+    def invalidate(self, fingerprint=None):
+        """Drops all trees of the graph with the given fingerprint (all trees if None)"""
+        with self.lock:
+            for key in [key for key in self.entries if fingerprint is None or key[0] == fingerprint]:
+                self.size = self.size - sum(array.nbytes for array in self.entries.pop(key))
+
+    def statistics(self):
+        with self.lock:
+            return OrderedDict([('trees', len(self.entries)), ('size_mb', round(self.size / (1024.0 * 1024.0), 1)), ('hits', self.hits), ('misses', self.misses)])
+
+
+def cachedQuery(kind, query_key, to_cache=None, from_cache=None):
+    """
+    Decorator caching the results of a method of an object with result_cache and graph_fingerprint attributes (eg. Qneat3Network)
+    while a result cache is set up. query_key maps the object and a dictionary of the method arguments (including defaults) to the
+    query part of the key. to_cache and from_cache convert results into plain python values (that can be pickled) and back.
+    """
+    def decorator(method):
+        method_signature = signature(method)
+
+        @wraps(method)
+        def cachedMethod(self, *args, **kwargs):
+            if self.result_cache is None:
+                return method(self, *args, **kwargs)
+            arguments = method_signature.bind(self, *args, **kwargs)
+            arguments.apply_defaults()
+            key = (self.graph_fingerprint, kind) + tuple(query_key(self, arguments.arguments))
+
+            value = self.result_cache.get(key)
+            if value is not None:
+                self.feedback.pushInfo("[QNEAT3Network][{}] Reusing cached {}".format(method.__name__, kind))
+                return from_cache(value) if from_cache is not None else value
+            result = method(self, *args, **kwargs)
+            if not self.feedback.isCanceled():
+                self.result_cache.put(key, to_cache(result) if to_cache is not None else result)
+            return result
+        return cachedMethod
+    return decorator
+
+
+def sharedResultCache(cache_dir=None, ttl=None):
+    """Returns the process wide Qneat3ResultCache for a cache directory (None = memory only) and time to live"""
+    key = (os.path.abspath(cache_dir) if cache_dir else None, ttl)
+    if key not in shared_caches:
+        shared_caches[key] = Qneat3ResultCache(ttl=ttl, cache_dir=key[0])
+    return shared_caches[key]
+
+
+def sharedTreeCache(max_bytes=None):
+    """Returns the process wide Qneat3DijkstraTreeCache, max_bytes changes its budget"""
+    global shared_tree_cache
+    if shared_tree_cache is None:
+        shared_tree_cache = Qneat3DijkstraTreeCache() if max_bytes is None else Qneat3DijkstraTreeCache(max_bytes)
+    elif max_bytes is not None:
+        shared_tree_cache.max_bytes = max_bytes
+    return shared_tree_cache
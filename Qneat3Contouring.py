@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Contouring.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from numpy import (arange, argsort, asarray, column_stack, concatenate, count_nonzero, cumsum, errstate, float64, full, isnan,
+                   maximum, minimum, repeat, roll, searchsorted, where)
+
+#Marching squares case table. Cell corners are weighted top left = 8, top right = 4, bottom right = 2, bottom left = 1
+#if their value is inside (<= level). Segments run between the crossed cell edges (T)op, (R)ight, (B)ottom, (L)eft and
+#are oriented so that the inside always lies on the same side. The saddle cases 5 and 10 are listed twice: with the
+#inside corners separated and connected (used if the value in the cell centre is inside as well).
+SEGMENTS = {1: [('L', 'B')],
+            2: [('B', 'R')],
+            3: [('L', 'R')],
+            4: [('R', 'T')],
+            5: [('R', 'T'), ('L', 'B')],
+            6: [('B', 'T')],
+            7: [('L', 'T')],
+            8: [('T', 'L')],
+            9: [('T', 'B')],
+            10: [('T', 'L'), ('B', 'R')],
+            11: [('T', 'R')],
+            12: [('R', 'L')],
+            13: [('R', 'B')],
+            14: [('B', 'L')]}
+SADDLE_SEGMENTS_CONNECTED = {5: [('L', 'T'), ('R', 'B')],
+                             10: [('T', 'R'), ('B', 'L')]}
+
+
+def traceLevels(raster_values, levels, closed=True):
+    """
+    Traces the isolines of several ascending levels through a 2D array, classifying every cell once for all levels.
+    Returns one list of (n, 2) arrays of (row, column) index coordinates per level. If closed is True the array is
+    treated as surrounded by values above all levels, so that all lines are closed rings, running just outside the
+    array border where needed. NaN values are treated as values above all levels.
+    """
+    levels = asarray(levels, dtype=float64)
+    if len(levels) == 0:
+        return []
+    #far above the highest level: crossings towards these values stay within a tiny fraction of a cell, but still
+    #differ by level, so that the rings of different levels are strictly nested and never share a segment
+    outside = levels[-1] + 1e6 * (abs(levels[-1]) + 1.0)
+    values = where(isnan(raster_values), outside, raster_values)
+    if closed:
+        padded_values = full((values.shape[0]+2, values.shape[1]+2), outside)
+        padded_values[1:-1, 1:-1] = values
+        values = padded_values
+    rows, cols = values.shape
+    if rows < 2 or cols < 2:
+        return [[] for level in levels]
+
+    #a value is inside level k (<= level) exactly if its band is <= k, so a cell is crossed by all levels from the
+    #lowest up to (excluding) the highest band of its corners
+    bands = searchsorted(levels, values, side='left')
+    corner_bands = [bands[:-1, :-1], bands[:-1, 1:], bands[1:, 1:], bands[1:, :-1]]
+    lowest = minimum.reduce(corner_bands)
+    highest = maximum.reduce(corner_bands)
+    cell_i, cell_j = (lowest < highest).nonzero()
+    lowest = lowest[cell_i, cell_j]
+    crossings = highest[cell_i, cell_j] - lowest
+    centre_values = (values[cell_i, cell_j] + values[cell_i, cell_j+1] + values[cell_i+1, cell_j+1] + values[cell_i+1, cell_j]) / 4.0
+
+    #list every crossed cell once per crossing level and group the list by level
+    cell_ids = repeat(arange(len(cell_i)), crossings)
+    cell_levels = repeat(lowest, crossings) + arange(len(cell_ids)) - repeat(cumsum(crossings) - crossings, crossings)
+    order = argsort(cell_levels, kind='stable')
+    level_starts = searchsorted(cell_levels[order], arange(len(levels)+1), side='left')
+
+    lines = []
+    for k, level in enumerate(levels.tolist()):
+        level_cells = cell_ids[order[level_starts[k]:level_starts[k+1]]]
+        i = cell_i[level_cells]
+        j = cell_j[level_cells]
+        cases = ((bands[i, j] <= k)*8 + (bands[i, j+1] <= k)*4 + (bands[i+1, j+1] <= k)*2 + (bands[i+1, j] <= k)).astype('int8')
+        lines.append(traceCells(values, level, i, j, cases, centre_values[level_cells] <= level, closed))
+    return lines
+
+
+def traceIsolines(raster_values, level, closed=True):
+    """Traces the isolines of one level through a 2D array, see traceLevels"""
+    return traceLevels(raster_values, [level], closed)[0]
+
+
+def traceCells(values, level, cell_i, cell_j, cell_cases, cell_centre_inside, closed):
+    """Builds the isolines of one level from the marching squares cases of the cells it crosses"""
+    rows, cols = values.shape
+
+    #ids of the four edges of every cell: horizontal edges are numbered i*cols+j, vertical edges rows*cols+i*cols+j
+    horizontal = cell_i * cols + cell_j
+    vertical = rows * cols + cell_i * cols + cell_j
+    cell_edges = {'T': horizontal, 'B': horizontal + cols, 'L': vertical, 'R': vertical + 1}
+
+    from_edges = []
+    to_edges = []
+    for case, segments in SEGMENTS.items():
+        case_mask = cell_cases == case
+        if case in SADDLE_SEGMENTS_CONNECTED:
+            for mask, case_segments in ((case_mask & ~cell_centre_inside, segments), (case_mask & cell_centre_inside, SADDLE_SEGMENTS_CONNECTED[case])):
+                for from_edge, to_edge in case_segments:
+                    from_edges.append(cell_edges[from_edge][mask])
+                    to_edges.append(cell_edges[to_edge][mask])
+        else:
+            for from_edge, to_edge in segments:
+                from_edges.append(cell_edges[from_edge][case_mask])
+                to_edges.append(cell_edges[to_edge][case_mask])
+    from_edges = concatenate(from_edges)
+    to_edges = concatenate(to_edges)
+    if len(from_edges) == 0:
+        return []
+
+    #interpolate the crossing position on every used edge
+    edge_ids = concatenate([from_edges, to_edges])
+    is_vertical = edge_ids >= rows * cols
+    local_ids = where(is_vertical, edge_ids - rows * cols, edge_ids)
+    node_i = local_ids // cols
+    node_j = local_ids % cols
+    start_values = values[node_i, node_j]
+    end_values = values[where(is_vertical, node_i + 1, node_i), where(is_vertical, node_j, node_j + 1)]
+    t = (level - start_values) / (end_values - start_values)
+    point_rows = where(is_vertical, node_i + t, node_i)
+    point_cols = where(is_vertical, node_j, node_j + t)
+    if closed:
+        #remove the padding offset
+        point_rows = point_rows - 1
+        point_cols = point_cols - 1
+    edge_points = dict(zip(edge_ids.tolist(), zip(point_rows.tolist(), point_cols.tolist())))
+
+    return stitchSegments(from_edges.tolist(), to_edges.tolist(), edge_points)
+
+
+def stitchSegments(from_edges, to_edges, edge_points):
+    """Chains oriented segments given as edge ids into lines. Open lines start at edges no segment ends on."""
+    next_edge = dict(zip(from_edges, to_edges))
+    line_starts = set(from_edges).difference(to_edges)
+
+    lines = []
+    for start_edge in list(line_starts) + from_edges:
+        if start_edge not in next_edge:
+            continue
+        edge = start_edge
+        points = [edge_points[edge]]
+        while edge in next_edge:
+            edge = next_edge.pop(edge)
+            points.append(edge_points[edge])
+            if edge == start_edge:
+                break
+        line = removeDuplicatePoints(points)
+        if len(line) >= 2:
+            lines.append(line)
+    return lines
+
+
+def removeDuplicatePoints(points):
+    line = [points[0]]
+    for point in points[1:]:
+        if point != line[-1]:
+            line.append(point)
+    return column_stack(([p[0] for p in line], [p[1] for p in line])) if len(line) > 1 else line
+
+
+def ringArea(ring):
+    """Returns the signed shoelace area of a closed ring"""
+    x = ring[:, 1]
+    y = ring[:, 0]
+    return 0.5 * float((x * roll(y, -1) - roll(x, -1) * y).sum())
+
+
+def isPointInRing(x, y, ring):
+    """Ray casting test of a point against a closed ring"""
+    ring_x = ring[:, 1]
+    ring_y = ring[:, 0]
+    next_x = roll(ring_x, -1)
+    next_y = roll(ring_y, -1)
+    with errstate(divide='ignore', invalid='ignore'):
+        crossing = ((ring_y > y) != (next_y > y)) & (x < (next_x - ring_x) * (y - ring_y) / (next_y - ring_y) + ring_x)
+    return count_nonzero(crossing) % 2 == 1
+
+
+def assemblePolygons(rings):
+    """
+    Sorts closed rings into shells and holes by their orientation and assigns every hole to the smallest shell
+    containing it. Returns a list of (shell, [holes]) tuples.
+    """
+    shells = []
+    holes = []
+    for ring in rings:
+        if len(ring) < 4:
+            continue
+        area = ringArea(ring)
+        #all segments keep the inside on the same side, so shells have positive and holes negative area
+        if area > 0:
+            shells.append((area, ring, []))
+        elif area < 0:
+            holes.append(ring)
+    shells.sort(key=lambda shell: shell[0])
+
+    for hole in holes:
+        hole_row, hole_col = hole[0]
+        for area, shell, shell_holes in shells:
+            if shell[:, 1].min() <= hole_col <= shell[:, 1].max() and shell[:, 0].min() <= hole_row <= shell[:, 0].max() and isPointInRing(hole_col, hole_row, shell):
+                shell_holes.append(hole)
+                break
+    return [(shell, shell_holes) for area, shell, shell_holes in shells]
+
+
+def isOutsideArray(polygon, shape):
+    """Checks if all rings of a polygon from assemblePolygons run outside an array of the given shape"""
+    shell, holes = polygon
+    return all(((ring[:, 0] < 0) | (ring[:, 0] > shape[0] - 1) | (ring[:, 1] < 0) | (ring[:, 1] > shape[1] - 1)).all() for ring in [shell] + holes)
+
+
+def toMapCoordinates(line, geotransform):
+    """Transforms (row, column) index coordinates into map coordinates of the cell centres"""
+    rows = line[:, 0] + 0.5
+    cols = line[:, 1] + 0.5
+    x = geotransform[0] + cols * geotransform[1] + rows * geotransform[2]
+    y = geotransform[3] + cols * geotransform[4] + rows * geotransform[5]
+    return x, y
+
+
+def mapPolygons(polygons, geotransform):
+    """Transforms the output of assemblePolygons into map coordinates"""
+    return [(toMapCoordinates(shell, geotransform), [toMapCoordinates(hole, geotransform) for hole in holes]) for shell, holes in polygons]
+
+
+def contourPolygons(raster_values, geotransform, level):
+    """Returns the area of raster_values <= level as list of (shell, [holes]) in map coordinates, each ring given as (x, y) arrays"""
+    return mapPolygons(assemblePolygons(traceIsolines(raster_values, level, closed=True)), geotransform)
+
+
+def contourAreas(raster_values, geotransform, levels, bands=False):
+    """
+    Returns the polygons of all levels from one traversal of raster_values, one list of (shell, [holes]) per level.
+    Each level covers the area of raster_values <= level, or if bands is True only the band between the previous
+    and the current level, assembled from the rings of both levels.
+    """
+    areas = []
+    previous_rings = []
+    for rings in traceLevels(raster_values, levels, closed=True):
+        if bands:
+            #the reversed rings of the previous level turn its shells into holes of the band and vice versa. Where both
+            #levels follow the array border the band keeps a hairline just outside of it, drop bands made of nothing else
+            polygons = [polygon for polygon in assemblePolygons(rings + [ring[::-1] for ring in previous_rings]) if not isOutsideArray(polygon, raster_values.shape)]
+        else:
+            polygons = assemblePolygons(rings)
+        areas.append(mapPolygons(polygons, geotransform))
+        previous_rings = rings
+    return areas
+
+
+def contourLines(raster_values, geotransform, level):
+    """Returns the isolines of one level in map coordinates, each line given as (x, y) arrays"""
+    return [toMapCoordinates(line, geotransform) for line in traceIsolines(raster_values, level, closed=False)]
+
+
+def contourLevels(raster_values, geotransform, levels):
+    """Returns the isolines of all levels from one traversal of raster_values, one list of lines per level"""
+    return [[toMapCoordinates(line, geotransform) for line in lines] for lines in traceLevels(raster_values, levels, closed=False)]
+
+
+def polygonGeometry(polygons):
+    """Builds one (multi)polygon QgsGeometry from the output of contourPolygons"""
+    from qgis.core import QgsGeometry, QgsLineString, QgsMultiPolygon, QgsPolygon
+
+    multipolygon = QgsMultiPolygon()
+    for (shell_x, shell_y), holes in polygons:
+        polygon = QgsPolygon()
+        polygon.setExteriorRing(QgsLineString(shell_x.tolist(), shell_y.tolist()))
+        for hole_x, hole_y in holes:
+            polygon.addInteriorRing(QgsLineString(hole_x.tolist(), hole_y.tolist()))
+        multipolygon.addGeometry(polygon)
+    return QgsGeometry(multipolygon)
+
+
+def lineGeometries(lines):
+    """Builds one linestring QgsGeometry per line from the output of contourLines"""
+    from qgis.core import QgsGeometry, QgsLineString
+
+    return [QgsGeometry(QgsLineString(x.tolist(), y.tolist())) for x, y in lines]
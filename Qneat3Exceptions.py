@@ -29,4 +29,11 @@ class Qneat3CrsException(Exception):
     
         self.message = "Coordinate Reference Systems don't match up: {} Reproject all datasets so that their CRSs match up.".format(list(crs))
 
-        super(Qneat3CrsException, self).__init__(self.message)
\ No newline at end of file
+        super(Qneat3CrsException, self).__init__(self.message)
+        
+class Qneat3JobException(Exception):
+    def __init__(self, message):
+    
+        self.message = "Invalid QNEAT3 job: {}".format(message)
+
+        super(Qneat3JobException, self).__init__(self.message)
@@ -17,18 +17,29 @@
 ***************************************************************************
 """
 
+import os
 import time
-import osgeo.gdal as gdal
 
+from collections import OrderedDict
+from concurrent.futures import as_completed
+from hashlib import blake2b
 from math import ceil
-from numpy import arange, meshgrid, linspace, nditer, zeros
-from osgeo import osr
+from numpy import arange, asarray, concatenate, float64, fromiter, full, hypot, inf, int32, int64, isfinite, zeros
 
-from qgis.core import QgsProject, QgsPoint, QgsVectorLayer, QgsRasterLayer, QgsFeature, QgsFeatureSink, QgsFeatureRequest,  QgsFields, QgsField, QgsGeometry, QgsPointXY, QgsLineString, QgsProcessingException, QgsDistanceArea, QgsUnitTypes      
-from qgis.analysis import QgsVectorLayerDirector, QgsNetworkDistanceStrategy, QgsNetworkSpeedStrategy, QgsGraphAnalyzer, QgsGraphBuilder, QgsInterpolator, QgsTinInterpolator, QgsGridFileWriter
+from qgis.core import QgsProject, QgsPoint, QgsVectorLayer, QgsFeature, QgsFeatureSink, QgsFeatureRequest,  QgsFields, QgsField, QgsGeometry, QgsPointXY, QgsLineString, QgsProcessingException, QgsDistanceArea, QgsUnitTypes      
+from qgis.analysis import QgsVectorLayerDirector, QgsNetworkDistanceStrategy, QgsNetworkSpeedStrategy, QgsNetworkStrategy, QgsGraphAnalyzer, QgsGraphBuilder
 from qgis.PyQt.QtCore import QVariant
 
-from QNEAT3.Qneat3Utilities import getFieldIndexFromQgsProcessingFeatureSource, getListOfPoints, getFieldDatatypeFromPythontype
+from QNEAT3.Qneat3Utilities import getFieldIndexFromQgsProcessingFeatureSource, getListOfPoints, getFieldDatatypeFromPythontype, featuresFromRecords, featuresToRecords
+from QNEAT3.Qneat3ArrayGraph import Qneat3ArrayGraph
+from QNEAT3.Qneat3Cache import cachedQuery, graphFingerprint
+from QNEAT3.Qneat3HubLabeling import Qneat3HubLabelIndex
+from QNEAT3.Qneat3Contouring import contourAreas, contourLevels, lineGeometries, polygonGeometry
+from QNEAT3.Qneat3Profiling import Qneat3Profiler, profiledPhase
+from QNEAT3.Qneat3Progress import Qneat3Progress
+from QNEAT3.Qneat3Parallel import calcBoundedCosts, createProcessPool, reduceMinimumCosts, workerBoundedCosts, workerCount, workerNetworkCosts, workerPointMinimumCosts
+from QNEAT3.Qneat3Raster import Qneat3RasterWriter, rasterTiles, sparseTileMap
+from QNEAT3.Qneat3Triangulation import alphaShapeBands, delaunayTriangles, interpolateTriangles
 from qgis._core import QgsSpatialIndex
 
 
@@ -38,6 +49,9 @@ class Qneat3Network():
     Provides basic logic for more advanced network analysis algorithms
     """
 
+    #cost columns a graph can be built with: network distance, travel time from the speed field, travel time at the default speed
+    CRITERIA = ('distance', 'time', 'default_speed_time')
+
     def __init__(self, 
                  input_network, #QgsProcessingParameterFeatureSource
                  input_points, #[QgsPointXY] or QgsProcessingParameterFeatureSource or QgsVectorLayer --> Implement List of QgsFeatures [QgsFeatures]
@@ -51,7 +65,10 @@ class Qneat3Network():
                  input_speedField, #str
                  input_defaultSpeed, #float
                  input_tolerance, #float
-                 feedback #feedback object from processing (log window)
+                 feedback, #feedback object from processing (log window)
+                 profiler=None, #Qneat3Profiler, a new one is created if not given
+                 input_allCriteria=False, #bool, build the cost columns of all CRITERIA in one pass
+                 input_edgeFeatures=False #bool, record the id of the network feature of each edge
                  ): 
         
         """
@@ -80,10 +97,17 @@ class Qneat3Network():
         @param input_tolerance: tolerance value when connecting graph edges
         @type feedback: QgsProcessingFeedback
         @param feedback: feedback object from processing algorithm
+        @type profiler: Qneat3Profiler
+        @param profiler: profiler recording the phases of the analysis
+        @type input_allCriteria: bool
+        @param input_allCriteria: if True the edges get the costs of all CRITERIA (criterion 0 stays the one of input_strategy), else only the ones of input_strategy
+        @type input_edgeFeatures: bool
+        @param input_edgeFeatures: if True the array graph gets the id of the feature each edge was built from (needed by Qneat3GraphUpdater)
         """
         
-        #initialize feedback
+        #initialize feedback and profiling
         self.feedback = feedback
+        self.profiler = profiler if profiler is not None else Qneat3Profiler()
         
         self.feedback.pushInfo("[QNEAT3Network][__init__] Setting up parameters")
         self.AnalysisCrs = input_analysisCrs
@@ -103,17 +127,24 @@ class Qneat3Network():
         if isinstance(input_points,(list,)):
             self.list_input_points = input_points #[QgsPointXY]
         else:
-            self.list_input_points = getListOfPoints(input_points) #[QgsPointXY]
+            with self.profiler.phase('feature read'):
+                self.list_input_points = getListOfPoints(input_points) #[QgsPointXY]
             self.input_points = input_points
     
         #Setup cost-strategy pattern.
         self.feedback.pushInfo("[QNEAT3Network][__init__] Setting analysis strategy: {}".format(input_strategy))
         self.default_speed = input_defaultSpeed
         
-        self.setNetworkStrategy(input_strategy, input_network, input_speedField, input_defaultSpeed)
+        self.setNetworkStrategy(input_strategy, input_network, input_speedField, input_defaultSpeed, input_allCriteria)
 
-        #add the strategy to the QgsGraphDirector
-        self.director.addStrategy(self.strategy)
+        #add the strategies to the QgsGraphDirector, each one fills one cost column (criterion) of the edges
+        for strategy in self.strategies:
+            self.director.addStrategy(strategy)
+        #the feature ids go into an extra cost column behind the criteria
+        self.edge_feature_criterion = None
+        if input_edgeFeatures:
+            self.edge_feature_criterion = len(self.strategies)
+            self.director.addStrategy(Qneat3FeatureIdStrategy())
         self.builder = QgsGraphBuilder(self.AnalysisCrs, True, input_tolerance)
         #tell the graph-director to make the graph using the builder object and tie the start point geometry to the graph
         
@@ -123,14 +154,23 @@ class Qneat3Network():
         start_time = time.time()
         self.feedback.pushInfo("[QNEAT3Network][__init__] Start Time: {}".format(time.strftime(":%Y-%m-%d %H:%M:%S", start_local_time)))
         self.feedback.pushInfo("[QNEAT3Network][__init__] Building...")
-        self.list_tiedPoints = self.director.makeGraph(self.builder, self.list_input_points, self.feedback)
-        self.network = self.builder.graph()
+        with self.profiler.phase('graph build'):
+            self.list_tiedPoints = self.director.makeGraph(self.builder, self.list_input_points, self.feedback)
+            self.network = self.builder.graph()
         end_local_time = time.localtime()
         end_time = time.time()
         self.feedback.pushInfo("[QNEAT3Network][__init__] End Time: {}".format(time.strftime(":%Y-%m-%d %H:%M:%S", end_local_time)))
         self.feedback.pushInfo("[QNEAT3Network][__init__] Total Build Time: {}".format(end_time-start_time))
         self.feedback.pushInfo("[QNEAT3Network][__init__] Analysis setup complete")
         
+        self.hub_label_index = None
+        self.array_graph = None
+        self.criterion_array_graphs = {}
+        self.path_cost_columns = {}
+        self.result_cache = None
+        self.tree_cache = None
+        self.graph_fingerprint = None
+        
             
     def setNetworkDirection(self, directionArgs):    
         if directionArgs.count("") == 0:
@@ -139,104 +179,455 @@ class Qneat3Network():
         else:
             self.directedAnalysis = False
             
-    def setNetworkStrategy(self, input_strategy, input_network, input_speedField, input_defaultSpeed):
-
+    def setNetworkStrategy(self, input_strategy, input_network, input_speedField, input_defaultSpeed, input_allCriteria=False):
+        """
+        Sets up the strategies of the cost columns: the one of input_strategy (criterion 0) and, if input_allCriteria is True,
+        the remaining CRITERIA in their order. self.criteria lists the names of the columns by criterion index.
+        """
         speedFieldId = getFieldIndexFromQgsProcessingFeatureSource(input_network, input_speedField)
-        if input_strategy == 0:
-            self.strategy = QgsNetworkDistanceStrategy()
-            self.strategy_int = 0
-        else:
-            self.strategy = QgsNetworkSpeedStrategy(speedFieldId, float(input_defaultSpeed), 1000.0 / 3600.0)
-            self.strategy_int = 1
+        strategies = {'distance': lambda: QgsNetworkDistanceStrategy(),
+                      'time': lambda: QgsNetworkSpeedStrategy(speedFieldId, float(input_defaultSpeed), 1000.0 / 3600.0),
+                      'default_speed_time': lambda: QgsNetworkSpeedStrategy(-1, float(input_defaultSpeed), 1000.0 / 3600.0)}
+        self.strategy_int = 0 if input_strategy == 0 else 1
+        self.criteria = [self.CRITERIA[self.strategy_int]]
+        if input_allCriteria:
+            self.criteria.extend(criterion for criterion in self.CRITERIA if criterion not in self.criteria)
+        self.strategies = [strategies[criterion]() for criterion in self.criteria]
+        self.strategy = self.strategies[0]
         self.multiplier = 3600
 
+    def criterionIndex(self, criterion_name):
+        """Returns the index of a cost column (one of CRITERIA) to pass as criterion to the queries"""
+        if criterion_name not in self.criteria:
+            raise QgsProcessingException('The network has no {} costs (built with the criteria {}).'.format(criterion_name, self.criteria))
+        return self.criteria.index(criterion_name)
+
+    @profiledPhase('dijkstra')
     def calcDijkstra(self, startpoint_id, criterion):
         """Calculates Dijkstra on whole network beginning from one startPoint. Returns a list containing a TreeId-Array and Cost-Array that match up with their indices [[tree],[cost]] """
+        if self.tree_cache is not None:
+            #cached trees are handed out as read-only numpy arrays (not converted to lists per query), callers only index them
+            entry = self.tree_cache.get(self.graph_fingerprint, criterion, startpoint_id)
+            if entry is None:
+                tree, cost = QgsGraphAnalyzer.dijkstra(self.network, startpoint_id, criterion)
+                entry = self.tree_cache.put(self.graph_fingerprint, criterion, startpoint_id, tree, cost)
+            return list(entry)
         tree, cost = QgsGraphAnalyzer.dijkstra(self.network, startpoint_id, criterion)
         dijkstra_query = list()
         dijkstra_query.insert(0, tree)
         dijkstra_query.insert(1, cost)
         return dijkstra_query
     
+    @cachedQuery('shortest path', lambda net, args: (args['startpoint_id'], args['endpoint_id'], args['criterion']))
+    def calcShortestPath(self, startpoint_id, endpoint_id, criterion=0):
+        """Returns (network cost, vertex ids of the path from start to end vertex) of the shortest path between two vertices. The path is empty if the end vertex is unreachable."""
+        tree, cost = self.calcDijkstra(startpoint_id, criterion)
+        if tree[endpoint_id] == -1 and endpoint_id != startpoint_id:
+            return inf, []
+        path = [endpoint_id]
+        while path[-1] != startpoint_id:
+            path.append(self.network.edge(int(tree[path[-1]])).fromVertex())
+        path.reverse()
+        return cost[endpoint_id], path
+    
+    def setupResultCache(self, result_cache):
+        """
+        Puts a Qneat3ResultCache in front of the shortest path, iso cost, iso pointcloud and iso polygon queries. Cached results
+        are bound to the fingerprint of the graph (including the tied analysis points), so they are reused by later runs on
+        the same network, points and strategy only.
+        """
+        self.result_cache = result_cache
+        self.feedback.pushInfo("[QNEAT3Network][setupResultCache] Result cache set up for graph {}".format(self.getGraphFingerprint()))
+    
+    def setupTreeCache(self, tree_cache):
+        """Keeps the Dijkstra results of calcDijkstra in a Qneat3DijkstraTreeCache, shared with other networks of the same graph fingerprint only (same layer, tied points and parameters)"""
+        self.tree_cache = tree_cache
+        self.feedback.pushInfo("[QNEAT3Network][setupTreeCache] Dijkstra tree cache set up for graph {} ({})".format(self.getGraphFingerprint(), dict(tree_cache.statistics())))
+    
+    def getGraphFingerprint(self):
+        if self.graph_fingerprint is None:
+            fingerprint = graphFingerprint(self.getArrayGraph())
+            if len(self.criteria) > 1:
+                #trees and results of the other criteria depend on their costs too
+                digest = blake2b(fingerprint.encode('utf-8'), digest_size=16)
+                for criterion in range(1, len(self.criteria)):
+                    digest.update(self.getArrayGraph(criterion).edge_cost.tobytes())
+                fingerprint = digest.hexdigest()
+            self.graph_fingerprint = fingerprint
+        return self.graph_fingerprint
+    
+    def analysisPointSet(self, analysis_point_list):
+        """Returns the analysis points as Qneat3AnalysisPointSet, lists of Qneat3AnalysisPoint objects are converted"""
+        if isinstance(analysis_point_list, Qneat3AnalysisPointSet):
+            return analysis_point_list
+        return Qneat3AnalysisPointSet.fromAnalysisPoints(analysis_point_list, self.network)
+    
+    def pointsKey(self, analysis_point_list, with_ids=False):
+        """Cache key part of a list of analysis points: their vertex ids and entry costs (and ids if the result contains them)"""
+        points = self.analysisPointSet(analysis_point_list)
+        if with_ids:
+            return tuple(zip(points.vertex_ids.tolist(), points.entry_costs.tolist(), points.point_ids))
+        return tuple(zip(points.vertex_ids.tolist(), points.entry_costs.tolist()))
+    
+    def rasterKey(self, interpolation_raster):
+        """Cache key part of an interpolation raster (tuple of raster values and geotransform)"""
+        raster_values, geotransform = interpolation_raster
+        return blake2b(raster_values.tobytes(), digest_size=16).hexdigest(), raster_values.shape, tuple(geotransform)
+    
+    def costsKey(self, vertex_costs):
+        """Cache key part of an array of vertex costs"""
+        return blake2b(asarray(vertex_costs, dtype=float64).tobytes(), digest_size=16).hexdigest()
+    
+    @profiledPhase('network costs')
+    def calcNetworkCosts(self, startpoint_id, target_vertex_ids, criterion=0):
+        """Returns the network costs from one vertex to a list of vertices (inf if unreachable). Uses the hub label index (criterion 0 only) instead of Dijkstra if one has been set up."""
+        if self.hub_label_index is not None and criterion == 0:
+            return self.hub_label_index.calcCosts(startpoint_id, target_vertex_ids)
+        cost = self.calcDijkstra(startpoint_id, criterion)[1]
+        return [cost[vertex_id] for vertex_id in target_vertex_ids]
+    
+    @profiledPhase('network costs')
+    def calcNetworkAndPathCosts(self, startpoint_id, target_vertex_ids, path_criteria):
+        """
+        Returns (network costs, path costs) from one vertex to a list of vertices: the network costs of criterion 0 (inf if unreachable)
+        and, per target vertex, a tuple of the costs of path_criteria summed along the optimal path of criterion 0 (None if unreachable),
+        eg. the distance and the travel time of the fastest paths from one Dijkstra search.
+        """
+        tree, cost = self.calcDijkstra(startpoint_id, 0)
+        return [cost[vertex_id] for vertex_id in target_vertex_ids], self.calcPathCosts(startpoint_id, tree, target_vertex_ids, path_criteria)
+    
+    def calcPathCosts(self, startpoint_id, tree, target_vertex_ids, path_criteria):
+        """Returns per target vertex a tuple of the costs of path_criteria summed along its path in a Dijkstra tree of startpoint_id (None if unreachable)"""
+        edge_from = self.getPathCostColumn(None)
+        columns = [self.getPathCostColumn(criterion) for criterion in path_criteria]
+        #the costs are summed from the start vertex outwards, each tree vertex is visited once for all targets
+        vertex_costs = {startpoint_id: tuple(0.0 for criterion in path_criteria)}
+        path_costs = []
+        for vertex_id in target_vertex_ids:
+            path = []
+            while vertex_id not in vertex_costs and tree[vertex_id] != -1:
+                path.append((vertex_id, tree[vertex_id]))
+                vertex_id = edge_from[tree[vertex_id]]
+            costs = vertex_costs.get(vertex_id)
+            if costs is not None:
+                for path_vertex_id, edge_id in reversed(path):
+                    costs = vertex_costs[path_vertex_id] = tuple(cost + column[edge_id] for cost, column in zip(costs, columns))
+            path_costs.append(costs)
+        return path_costs
+    
+    def getPathCostColumn(self, criterion):
+        """Returns the edge costs of a criterion (the from vertices of the edges for None) as python list indexed by edge id, built on first use"""
+        if criterion not in self.path_cost_columns:
+            self.path_cost_columns[criterion] = self.getArrayGraph().edge_from.tolist() if criterion is None else self.getArrayGraph(criterion).edge_cost.tolist()
+        return self.path_cost_columns[criterion]
+    
+    def calcNetworkCostRows(self, startpoint_ids, target_vertex_ids, workers=1, criterion=0):
+        """
+        Generator yielding (index of the start vertex, network costs to all target vertices) for a list of start vertices, ie. the rows
+        of an OD matrix. If workers is not 1 (0 = one process per CPU core) and no hub label index is set up, the Dijkstra searches
+        run in worker processes on the Qneat3ArrayGraph and the rows are yielded in order of completion.
+        """
+        if workerCount(workers) == 1 or (self.hub_label_index is not None and criterion == 0) or len(startpoint_ids) < 2:
+            for index, startpoint_id in enumerate(startpoint_ids):
+                yield index, self.calcNetworkCosts(startpoint_id, target_vertex_ids, criterion)
+            return
+        
+        self.feedback.pushInfo("[QNEAT3Network][calcNetworkCostRows] Starting {} worker processes".format(workerCount(workers)))
+        pool = createProcessPool(self.getArrayGraph(criterion), workers)
+        try:
+            futures = [pool.submit(workerNetworkCosts, index, startpoint_id, list(target_vertex_ids)) for index, startpoint_id in enumerate(startpoint_ids)]
+            for future in as_completed(futures):
+                if self.feedback.isCanceled():
+                    break
+                yield future.result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    @profiledPhase('hub label index')
+    def setupHubLabelIndex(self, index_path):
+        """
+        Loads the hub label index stored at index_path, which has to be built for the same graph (same fingerprint). If the file
+        does not exist yet, the index is built from the graph and written to index_path.
+        """
+        if os.path.isfile(index_path):
+            self.feedback.pushInfo("[QNEAT3Network][setupHubLabelIndex] Loading hub label index from {}".format(index_path))
+            try:
+                hub_label_index = Qneat3HubLabelIndex.load(index_path)
+            except ValueError as error:
+                raise QgsProcessingException(str(error))
+            #the fingerprint covers vertices, edges and costs, so the index of another network, points or strategy is never used
+            if hub_label_index.fingerprint != graphFingerprint(self.getArrayGraph()):
+                raise QgsProcessingException('The hub label index {} does not match the network graph. Delete it to build a new index for the current network, points and parameters.'.format(index_path))
+        else:
+            self.feedback.pushInfo("[QNEAT3Network][setupHubLabelIndex] Building hub label index. This may take some time depending on network size")
+            start_time = time.time()
+            hub_label_index = Qneat3HubLabelIndex.build(self.getArrayGraph(), self.feedback)
+            if self.feedback.isCanceled():
+                return
+            hub_label_index.save(index_path)
+            self.feedback.pushInfo("[QNEAT3Network][setupHubLabelIndex] Total Index Build Time: {}".format(time.time()-start_time))
+        self.hub_label_index = hub_label_index
+    
+    @profiledPhase('array graph build')
+    def getArrayGraph(self, criterion=0):
+        """Returns a Qneat3ArrayGraph copy of the network graph with the costs of a criterion, built on first use"""
+        if self.array_graph is None:
+            self.array_graph = Qneat3ArrayGraph.fromQgsGraph(self.network, 0)
+            if self.edge_feature_criterion is not None:
+                self.array_graph.edge_features = Qneat3ArrayGraph.costsFromQgsGraph(self.network, self.edge_feature_criterion).astype(int64)
+        if criterion == 0:
+            return self.array_graph
+        if criterion not in self.criterion_array_graphs:
+            #the graphs of the other criteria share vertices, edges and stars with the one of criterion 0
+            self.criterion_array_graphs[criterion] = self.array_graph.withCosts(Qneat3ArrayGraph.costsFromQgsGraph(self.network, criterion))
+        return self.criterion_array_graphs[criterion]
+    
+    @profiledPhase('dijkstra')
     def calcShortestTree(self, startpoint_id, criterion):
         tree = QgsGraphAnalyzer.shortestTree(self.network, startpoint_id, criterion)
         return tree
         
-    def calcIsoPoints(self, analysis_point_list, max_dist):
-        iso_pointcloud = dict()
-
-        for counter, point in enumerate(analysis_point_list):
-            self.feedback.pushInfo("[QNEAT3Network][calcIsoPoints] Processing Point {}".format(counter))
-            dijkstra_query = self.calcDijkstra(point.network_vertex_id, 0)
-            tree = dijkstra_query[0]
-            cost = dijkstra_query[1]
-            
-            current_start_point_id = point.point_id #id of the input point
-            current_vertex_id = point.network_vertex_id
-            entry_cost = point.entry_cost
-            
-            field_type = getFieldDatatypeFromPythontype(current_start_point_id)
+    @cachedQuery('iso points', lambda net, args: (net.pointsKey(args['analysis_point_list'], True), args['max_dist']), featuresToRecords, featuresFromRecords)
+    @profiledPhase('iso extraction')
+    def calcIsoPoints(self, analysis_point_list, max_dist, workers=1):
+        """
+        Returns the iso pointcloud as list of QgsFeature: one point per vertex reachable within max_dist from any analysis point,
+        holding the minimum cost over all analysis points and the id of the analysis point it is reached from. See calcMinimumCosts
+        for the workers parameter.
+        """
+        points = self.analysisPointSet(analysis_point_list)
+        vertex_costs, vertex_origins = self.calcMinimumCosts(points, max_dist, workers)
+        
+        fields = QgsFields()
+        fields.append(QgsField('vertex_id', QVariant.Int, '', 254, 0))
+        fields.append(QgsField('cost', QVariant.Double, '', 254, 7))
+        fields.append(QgsField('origin_point_id', getFieldDatatypeFromPythontype(points.point_ids[0]) if len(points) else QVariant.String, '', 254, 7))
+        
+        point_vertex_ids = points.vertex_ids.tolist()
+        entry_costs = points.entry_costs.tolist()
+        reachable_vertex_ids = isfinite(vertex_costs).nonzero()[0].tolist()
+        progress = Qneat3Progress(self.feedback, len(reachable_vertex_ids), "[QNEAT3Network][calcIsoPoints] Added {} Nodes to iso pointcloud...", chunk_size=10000)
+        iso_pointcloud = []
+        for vertex_id in reachable_vertex_ids:
+            origin = int(vertex_origins[vertex_id])
+            entry_cost = entry_costs[origin]
+            real_cost = float(vertex_costs[vertex_id])
             
-            #startpoints are not part of the Query so they have to be added manually before
-            #dikstra is called.
-            start_vertex_feat = QgsFeature()
-            start_vertex_fields = QgsFields()
-            start_vertex_fields.append(QgsField('vertex_id', QVariant.Int, '', 254, 0))
-            start_vertex_fields.append(QgsField('cost', QVariant.Double, '', 254, 7))
-            start_vertex_fields.append(QgsField('origin_point_id',field_type, '', 254, 7))
-            start_vertex_feat.setFields(start_vertex_fields)
-            start_vertex_feat['vertex_id'] = current_vertex_id
-            start_vertex_feat['cost'] = entry_cost
-            start_vertex_feat['origin_point_id'] = current_start_point_id
-            pt_m = QgsPoint(self.network.vertex(current_vertex_id).point().x(),self.network.vertex(current_vertex_id).point().y())
-            pt_m.addMValue(entry_cost)
-            geom = QgsGeometry(pt_m)
-            start_vertex_feat.setGeometry(geom)
+            feat = QgsFeature()
+            feat.setFields(fields)
+            feat['vertex_id'] = vertex_id
+            feat['cost'] = real_cost
+            feat['origin_point_id'] = points.point_ids[origin]
+            pt_xy = self.network.vertex(vertex_id).point() #QGIS API BUG: remove line)
+            pt_m = QgsPoint(pt_xy.x(),pt_xy.y()) #QGIS API BUG: Change back to QgsPoint(self.network.vertex(fromVertexId).point())
+            pt_m.addMValue(entry_cost if vertex_id == point_vertex_ids[origin] else (500-(real_cost-entry_cost))*2)
+            feat.setGeometry(QgsGeometry(pt_m))
+            iso_pointcloud.append(feat)
+            if progress.step():
+                break
+        
+        progress.finish()
+        return iso_pointcloud #list of QgsFeature (=QgsFeatureList)
+    
+    @cachedQuery('minimum costs', lambda net, args: (net.pointsKey(args['analysis_point_list']), args['max_dist']), lambda result: sparseMinimumCosts(*result), lambda value: denseMinimumCosts(*value))
+    @profiledPhase('dijkstra')
+    def calcMinimumCosts(self, analysis_point_list, max_dist, workers=1):
+        """
+        Calculates the bounded Dijkstra of every analysis point and reduces them into an array of minimum total costs (entry cost +
+        network cost, inf beyond max_dist) per vertex and an array with the index of the analysis point reaching each vertex cheapest.
+        The start vertices are always reached. If workers is not 1 (0 = one process per CPU core) the searches are spread over worker
+        processes, each reducing its share of analysis points into partial minimum-cost arrays; the main thread only merges them
+        and handles feedback and cancellation.
+        """
+        points = self.analysisPointSet(analysis_point_list)
+        vertex_costs = full(self.network.vertexCount(), inf)
+        vertex_origins = full(self.network.vertexCount(), -1, dtype=int32)
+        
+        if workerCount(workers) == 1 or len(points) < 2:
+            progress = Qneat3Progress(self.feedback, len(points), "[QNEAT3Network][calcMinimumCosts] Processed {} Points", chunk_size=1)
+            for counter, (vertex_id, entry_cost) in enumerate(zip(points.vertex_ids.tolist(), points.entry_costs.tolist())):
+                if progress.isCanceled():
+                    break
+                cost = asarray(self.calcDijkstra(vertex_id, 0)[1]) + entry_cost
+                cost[cost > max_dist] = inf
+                cost[vertex_id] = entry_cost
+                reduceMinimumCosts(vertex_costs, vertex_origins, cost, counter)
+                progress.step()
+            progress.finish()
+            return vertex_costs, vertex_origins
+        
+        #the workers read the snapped vertex ids and entry costs from shared memory, each task only names a slice of points
+        chunk_count = min(len(points), workerCount(workers)*4)
+        self.feedback.pushInfo("[QNEAT3Network][calcMinimumCosts] Processing {} Points in {} worker processes".format(len(points), workerCount(workers)))
+        progress = Qneat3Progress(self.feedback, chunk_count, "[QNEAT3Network][calcMinimumCosts] Merged {{}} of {} partial results".format(chunk_count), chunk_size=1)
+        pool = createProcessPool(self.getArrayGraph(), workers, points.sharedArrays())
+        try:
+            futures = [pool.submit(workerPointMinimumCosts, i, len(points), chunk_count, max_dist) for i in range(chunk_count)]
+            for future in as_completed(futures):
+                if progress.isCanceled():
+                    break
+                reduceMinimumCosts(vertex_costs, vertex_origins, *future.result())
+                progress.step()
+            progress.finish()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return vertex_costs, vertex_origins
+    
+    def calcIsoCosts(self, analysis_point_list, max_dist, workers=1):
+        """Returns an array holding the minimum total cost (entry cost + network cost) of every vertex over all analysis points. Vertices beyond max_dist get inf."""
+        vertex_costs = self.calcMinimumCosts(analysis_point_list, max_dist, workers)[0]
+        vertex_costs[vertex_costs > max_dist] = inf
+        return vertex_costs
+    
+    @cachedQuery('iso edge polygons', lambda net, args: (net.pointsKey(args['analysis_point_list']), net.costsKey(args['vertex_costs']), args['max_dist'], args['interval'], args['buffer_distance'], args['ring_polygons']), featuresToRecords, featuresFromRecords)
+    @profiledPhase('iso extraction')
+    def calcIsoEdgePolygons(self, analysis_point_list, vertex_costs, max_dist, interval, buffer_distance, ring_polygons=False, chunk_size=5000):
+        """
+        Calculates iso-area polygons without raster interpolation: the reachable parts of all edges (including the partially
+        reachable edges at each cost level) are buffered by buffer_distance and dissolved per level. Only the part of an edge
+        added between two levels is buffered, in chunks of chunk_size lines that are dissolved with a unary union each.
+        vertex_costs have to be the iso costs of analysis_point_list within max_dist (see calcIsoCosts).
+        """
+        levels = self.calcIsoLevels(max_dist, interval)
+        #the last level may exceed max_dist, edges are cut at max_dist like the vertex costs
+        reach_levels = [min(level, max_dist) for level in levels.tolist()]
+        points = self.analysisPointSet(analysis_point_list)
+        
+        #collect the line pieces that become reachable in each band between two levels
+        band_pieces = [[] for level in levels]
+        for index, (point_id, vertex_id, entry_cost) in enumerate(points.rows()):
+            #entry line from the analysis point to the network
+            for level_index, level in enumerate(reach_levels):
+                if entry_cost <= level:
+                    band_pieces[level_index].append([points.pointXY(index), self.network.vertex(vertex_id).point()])
+                    break
+                
+        #only the outgoing edges of reached vertices can be (partially) reached
+        for from_vertex_id in isfinite(vertex_costs).nonzero()[0].tolist():
+            from_vertex = self.network.vertex(from_vertex_id)
+            from_cost = vertex_costs[from_vertex_id]
+            from_point = from_vertex.point()
+            for edge_id in from_vertex.outgoingEdges():
+                edge = self.network.edge(edge_id)
+                edge_cost = edge.cost(0)
+                to_point = self.network.vertex(edge.toVertex()).point()
+                
+                previous_fraction = 0.0
+                for level_index, level in enumerate(reach_levels):
+                    if level < from_cost:
+                        continue
+                    fraction = 1.0 if edge_cost <= 0 else min(1.0, (level - from_cost) / edge_cost)
+                    if fraction > previous_fraction:
+                        band_pieces[level_index].append([self.interpolateEdgePoint(from_point, to_point, previous_fraction), self.interpolateEdgePoint(from_point, to_point, fraction)])
+                        previous_fraction = fraction
+                    if fraction >= 1.0:
+                        break
+        
+        band_geoms = []
+        for current_level, pieces in zip(levels, band_pieces):
+            self.feedback.pushInfo("[QNEAT3Network][calcIsoEdgePolygons] Buffering {} edge pieces of the {}-level band".format(len(pieces), current_level))
+            chunk_geoms = [QgsGeometry.fromMultiPolylineXY(pieces[i:i+chunk_size]).buffer(buffer_distance, 8) for i in range(0, len(pieces), chunk_size)]
+            band_geoms.append(QgsGeometry.unaryUnion(chunk_geoms) if chunk_geoms else QgsGeometry())
+        
+        featurelist = self.dissolveIsoBands(levels, band_geoms, ring_polygons)
+        self.feedback.pushInfo("[QNEAT3Network][calcIsoEdgePolygons] number of elements in polygon_featurelist: {}".format(len(featurelist)))
+        return featurelist
+    
+    def calcIsoEdgePolygonsPerOrigin(self, analysis_point_list, max_dist, interval, buffer_distance, ring_polygons=False, workers=1):
+        """
+        Generator yielding (analysis_point, featurelist) with the edge buffering iso-area polygons of every single analysis point.
+        The graph is built once; the bounded Dijkstra searches run on its Qneat3ArrayGraph copy, spread over worker processes
+        if workers is not 1 (0 = one process per CPU core). Results are yielded in order of completion.
+        """
+        array_graph = self.getArrayGraph()
+        vertex_costs = full(array_graph.vertex_count, inf)
+        points = self.analysisPointSet(analysis_point_list)
+        tasks = list(zip(range(len(points)), points.vertex_ids.tolist(), points.entry_costs.tolist()))
+        
+        if workerCount(workers) == 1:
+            results = (((task_id,) + calcBoundedCosts(array_graph, vertex_id, max_dist, entry_cost)) for task_id, vertex_id, entry_cost in tasks)
+            pool = None
+        else:
+            self.feedback.pushInfo("[QNEAT3Network][calcIsoEdgePolygonsPerOrigin] Starting {} worker processes".format(workerCount(workers)))
+            pool = createProcessPool(array_graph, workers)
+            futures = [pool.submit(workerBoundedCosts, task_id, vertex_id, max_dist, entry_cost) for task_id, vertex_id, entry_cost in tasks]
+            results = (future.result() for future in as_completed(futures))
+        
+        try:
+            for task_id, reached_vertex_ids, reached_costs in results:
+                if self.feedback.isCanceled():
+                    break
+                vertex_costs[reached_vertex_ids] = reached_costs
+                yield points[task_id], self.calcIsoEdgePolygons(points.subset([task_id]), vertex_costs, max_dist, interval, buffer_distance, ring_polygons)
+                vertex_costs[reached_vertex_ids] = inf
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+    
+    @cachedQuery('iso alpha polygons', lambda net, args: (net.pointsKey(args['analysis_point_list']), net.costsKey(args['vertex_costs']), args['max_dist'], args['interval'], args['alpha'], args['ring_polygons']), featuresToRecords, featuresFromRecords)
+    @profiledPhase('iso extraction')
+    def calcIsoAlphaPolygons(self, analysis_point_list, vertex_costs, max_dist, interval, alpha, ring_polygons=False, chunk_size=5000):
+        """
+        Calculates iso-area polygons as alpha shapes of the iso point cloud: the reachable vertices (and analysis points) are
+        triangulated once, every triangle with a circumradius <= alpha is assigned to the first level covering all of its
+        corners and the triangles of each band are dissolved with a unary union. No raster is allocated.
+        vertex_costs have to be the iso costs of analysis_point_list within max_dist (see calcIsoCosts).
+        """
+        levels = self.calcIsoLevels(max_dist, interval)
+        
+        points = self.analysisPointSet(analysis_point_list)
+        reachable_vertex_ids = isfinite(vertex_costs).nonzero()[0]
+        reachable_points = [self.network.vertex(int(vertex_id)).point() for vertex_id in reachable_vertex_ids]
+        x = concatenate([asarray([point.x() for point in reachable_points], dtype=float64), points.x])
+        y = concatenate([asarray([point.y() for point in reachable_points], dtype=float64), points.y])
+        costs = concatenate([vertex_costs[reachable_vertex_ids], zeros(len(points))])
+        
+        self.feedback.pushInfo("[QNEAT3Network][calcIsoAlphaPolygons] Triangulating {} reachable points".format(len(x)))
+        band_triangles = alphaShapeBands(x, y, costs, levels, alpha)
+        
+        band_geoms = []
+        for current_level, triangles in zip(levels, band_triangles):
+            self.feedback.pushInfo("[QNEAT3Network][calcIsoAlphaPolygons] Dissolving {} triangles of the {}-level band".format(len(triangles), current_level))
+            polygons = [[[QgsPointXY(x[i], y[i]) for i in (i0, i1, i2, i0)]] for i0, i1, i2 in triangles.tolist()]
+            chunk_geoms = [QgsGeometry.unaryUnion([QgsGeometry.fromMultiPolygonXY(polygons[i:i+chunk_size])]) for i in range(0, len(polygons), chunk_size)]
+            band_geoms.append(QgsGeometry.unaryUnion(chunk_geoms) if chunk_geoms else QgsGeometry())
+        
+        featurelist = self.dissolveIsoBands(levels, band_geoms, ring_polygons)
+        self.feedback.pushInfo("[QNEAT3Network][calcIsoAlphaPolygons] number of elements in polygon_featurelist: {}".format(len(featurelist)))
+        return featurelist
+    
+    def dissolveIsoBands(self, levels, band_geoms, ring_polygons=False):
+        """Turns the geometries reached within each band into cumulative (0 to level) or ring (previous to current level) iso-area features"""
+        featurelist = []
+        fields = QgsFields()
+        fields.append(QgsField('id', QVariant.Int, '', 254, 0))
+        fields.append(QgsField('cost_level', QVariant.Double, '', 20, 7))
+        
+        cumulative_geom = QgsGeometry()
+        for fid, (current_level, band_geom) in enumerate(zip(levels, band_geoms)):
+            if ring_polygons:
+                geom = band_geom if cumulative_geom.isEmpty() else band_geom.difference(cumulative_geom)
+            else:
+                geom = band_geom if cumulative_geom.isEmpty() else cumulative_geom.combine(band_geom)
+            if not band_geom.isEmpty():
+                cumulative_geom = band_geom if cumulative_geom.isEmpty() else cumulative_geom.combine(band_geom)
             
-            iso_pointcloud.update({current_vertex_id: start_vertex_feat})
+            if geom.isEmpty():
+                continue
             
-            i = 0
-            while i < len(cost):
-                #as long as costs at vertex i is greater than iso_distance and there exists an incoming edge (tree[i]!=-1) 
-                #consider it as a possible catchment polygon element
-                if tree[i] != -1:
-                    fromVertexId = self.network.edge(tree[i]).toVertex()
-                    real_cost = cost[fromVertexId]+entry_cost
-                    #if the costs of the current vertex are lower than the radius, append the vertex id to results.
-                    if real_cost <= max_dist:
-                        #build feature
-                                    
-                        feat = QgsFeature()
-                        fields = QgsFields()
-                        fields.append(QgsField('vertex_id', QVariant.Int, '', 254, 0))
-                        fields.append(QgsField('cost', QVariant.Double, '', 254, 7))
-                        fields.append(QgsField('origin_point_id',field_type, '', 254, 7))
-                        feat.setFields(fields)
-                        feat['vertex_id'] = fromVertexId
-                        feat['cost'] = real_cost
-                        feat['origin_point_id'] = current_start_point_id
-                        pt_xy = self.network.vertex(fromVertexId).point() #QGIS API BUG: remove line)
-                        pt_m = QgsPoint(pt_xy.x(),pt_xy.y()) #QGIS API BUG: Change back to QgsPoint(self.network.vertex(fromVertexId).point())
-                        pt_m.addMValue((500-cost[fromVertexId])*2)
-                        geom = QgsGeometry(pt_m)
-                        feat.setGeometry(geom)
-                        
-                        if fromVertexId not in iso_pointcloud:
-                            #ERROR: FIRST POINT IN POINTCLOUD WILL NEVER BE ADDED
-                            iso_pointcloud.update({fromVertexId: feat})
-                        if fromVertexId in iso_pointcloud.keys() and iso_pointcloud.get(fromVertexId)['cost'] > real_cost:
-                            #if the vertex already exists in the iso_pointcloud and the cost is greater than the existing cost
-                            del iso_pointcloud[fromVertexId]
-                            #iso_pointcloud.pop(toVertexId)
-                            iso_pointcloud.update({fromVertexId: feat})
-                        #count up to next vertex
-                i = i + 1 
-                if (i%10000)==0:
-                    self.feedback.pushInfo("[QNEAT3Network][calcIsoPoints] Added {} Nodes to iso pointcloud...".format(i))
-                    
-        return iso_pointcloud.values() #list of QgsFeature (=QgsFeatureList)
+            feat = QgsFeature()
+            feat.setFields(fields)
+            feat.setGeometry(geom)
+            feat['id'] = fid
+            feat['cost_level'] = float(current_level)
+            featurelist.insert(0, feat)
+        return featurelist
     
-    def calcQneatInterpolation(self,iso_pointcloud_featurelist, resolution, interpolation_raster_path):  
+    def interpolateEdgePoint(self, from_point, to_point, fraction):
+        return QgsPointXY(from_point.x() + (to_point.x() - from_point.x()) * fraction, from_point.y() + (to_point.y() - from_point.y()) * fraction)
+    
+    @profiledPhase('interpolation')
+    def calcQneatInterpolation(self,iso_pointcloud_featurelist, resolution, interpolation_raster_path, raster_profile=0):  
         #prepare spatial index
         uri = 'PointM?crs={}&field=vertex_id:int(254)&field=cost:double(254,7)&key=vertex_id&index=yes'.format(self.AnalysisCrs.authid())
         
@@ -260,280 +651,315 @@ class Qneat3Network():
         cols = int((xmax - xmin) / resolution)
         rows = int((ymax - ymin) / resolution)
         
-        output_interpolation_raster = gdal.GetDriverByName('GTiff').Create(interpolation_raster_path, cols, rows, 1, gdal.GDT_Float64 )
-        output_interpolation_raster.SetGeoTransform((xmin, resolution, 0, ymax, 0, -resolution))
-        
-        band = output_interpolation_raster.GetRasterBand(1)
-        band.SetNoDataValue(NoData_value)
-        
-        #initialize zero array with 2 dimensions (according to rows and cols)
-        raster_data = zeros(shape=(rows, cols))
-        
-        #compute raster cell MIDpoints
-        x_pos = linspace(xmin+(resolution/2), xmax -(resolution/2), raster_data.shape[1])
-        y_pos = linspace(ymax-(resolution/2), ymin + (resolution/2), raster_data.shape[0])
-        x_grid, y_grid = meshgrid(x_pos, y_pos) 
+        #the raster is interpolated and written tile by tile, so memory only depends on the tile size
+        writer = Qneat3RasterWriter(interpolation_raster_path, cols, rows, (xmin, resolution, 0, ymax, 0, -resolution), self.AnalysisCrs.toWkt(), NoData_value, raster_profile)
         
         self.feedback.pushInfo('[QNEAT3Network][calcQneatInterpolation] Beginning with interpolation')
         total_work = rows * cols
-        counter = 0
+        progress = Qneat3Progress(self.feedback, total_work, "[QNEAT3Network][calcQneatInterpolation] Interpolated {} cells...")
         
-        self.feedback.pushInfo('[QNEAT3Network][calcQneatInterpolation] Total workload: {} cells'.format(total_work))
+        self.feedback.pushInfo('[QNEAT3Network][calcQneatInterpolation] Total workload: {} cells in {} tiles'.format(total_work, writer.tileCount()))
         self.feedback.setProgress(0)
-        for i in range(rows):
-            for j in range(cols):
-                current_pixel_midpoint = QgsPointXY(x_grid[i,j],y_grid[i,j])
+        for xoff, yoff, tile_cols, tile_rows in writer.tiles():
+            if progress.isCanceled():
+                break
+            #initialize zero array and raster cell MIDpoints of the current tile
+            tile_data = zeros(shape=(tile_rows, tile_cols))
+            x_pos = xmin + (arange(xoff, xoff + tile_cols) + 0.5) * resolution
+            y_pos = ymax - (arange(yoff, yoff + tile_rows) + 0.5) * resolution
+            
+            for i in range(tile_rows):
+                if progress.canceled:
+                    break
+                for j in range(tile_cols):
+                    current_pixel_midpoint = QgsPointXY(x_pos[j],y_pos[i])
                 
-                nearest_vertex_fid = spt_idx.nearestNeighbor(current_pixel_midpoint, 1)[0]
+                    nearest_vertex_fid = spt_idx.nearestNeighbor(current_pixel_midpoint, 1)[0]
                 
-                nearest_feature = mIsoPointcloud.getFeature(nearest_vertex_fid)
+                    nearest_feature = mIsoPointcloud.getFeature(nearest_vertex_fid)
                 
-                nearest_vertex = self.network.vertex(nearest_feature['vertex_id'])
+                    nearest_vertex = self.network.vertex(nearest_feature['vertex_id'])
                 
-                edges = nearest_vertex.incomingEdges() + nearest_vertex.outgoingEdges()
+                    edges = nearest_vertex.incomingEdges() + nearest_vertex.outgoingEdges()
                 
-                vertex_found = False
-                nearest_counter = 2
-                while vertex_found == False:
-                    n_nearest_feature_fid = spt_idx.nearestNeighbor(current_pixel_midpoint, nearest_counter)[nearest_counter-1]
-                    n_nearest_feature = mIsoPointcloud.getFeature(n_nearest_feature_fid)
-                    n_nearest_vertex_id = n_nearest_feature['vertex_id']
+                    vertex_found = False
+                    nearest_counter = 2
+                    while vertex_found == False:
+                        n_nearest_feature_fid = spt_idx.nearestNeighbor(current_pixel_midpoint, nearest_counter)[nearest_counter-1]
+                        n_nearest_feature = mIsoPointcloud.getFeature(n_nearest_feature_fid)
+                        n_nearest_vertex_id = n_nearest_feature['vertex_id']
                     
-                    for edge_id in edges:
-                        from_vertex_id = self.network.edge(edge_id).fromVertex()
-                        to_vertex_id = self.network.edge(edge_id).toVertex()
+                        for edge_id in edges:
+                            from_vertex_id = self.network.edge(edge_id).fromVertex()
+                            to_vertex_id = self.network.edge(edge_id).toVertex()
                         
-                        if n_nearest_vertex_id == from_vertex_id: 
-                            vertex_found = True
-                            vertex_type = "from_vertex"
-                            from_point = n_nearest_feature.geometry().asPoint()
-                            from_vertex_cost = n_nearest_feature['cost']
-                        if n_nearest_vertex_id == to_vertex_id:
-                            vertex_found = True
-                            vertex_type = "to_vertex"
-                            to_point = n_nearest_feature.geometry().asPoint()
-                            to_vertex_cost = n_nearest_feature['cost']
+                            if n_nearest_vertex_id == from_vertex_id: 
+                                vertex_found = True
+                                vertex_type = "from_vertex"
+                                from_point = n_nearest_feature.geometry().asPoint()
+                                from_vertex_cost = n_nearest_feature['cost']
+                            if n_nearest_vertex_id == to_vertex_id:
+                                vertex_found = True
+                                vertex_type = "to_vertex"
+                                to_point = n_nearest_feature.geometry().asPoint()
+                                to_vertex_cost = n_nearest_feature['cost']
                     
-                    nearest_counter = nearest_counter + 1
-                    """
-                    if nearest_counter == 5:
-                        vertex_found = True
-                        vertex_type = "end_vertex"
-                    """
+                        nearest_counter = nearest_counter + 1
+                        """
+                        if nearest_counter == 5:
+                            vertex_found = True
+                            vertex_type = "end_vertex"
+                        """
                 
-                if vertex_type == "from_vertex":
-                    nearest_edge_geometry = QgsGeometry().fromPolylineXY([from_point, nearest_vertex.point()])
-                    res = nearest_edge_geometry.closestSegmentWithContext(current_pixel_midpoint)
-                    segment_point = res[1] #[0: distance, 1: point, 2: left_of, 3: epsilon for snapping]
-                    dist_to_segment = segment_point.distance(current_pixel_midpoint)
-                    dist_edge = from_point.distance(segment_point)
-                    #self.feedback.pushInfo("dist_to_segment = {}".format(dist_to_segment))
-                    #self.feedback.pushInfo("dist_on_edge = {}".format(dist_edge))
-                    #self.feedback.pushInfo("cost = {}".format(from_vertex_cost))
-                    pixel_cost = from_vertex_cost + dist_edge + dist_to_segment
-                    raster_data[i,j] = pixel_cost
-                elif vertex_type == "to_vertex":
-                    nearest_edge_geometry = QgsGeometry().fromPolylineXY([nearest_vertex.point(), to_point])
-                    res = nearest_edge_geometry.closestSegmentWithContext(current_pixel_midpoint)
-                    segment_point = res[1] #[0: distance, 1: point, 2: left_of, 3: epsilon for snapping]
-                    dist_to_segment = segment_point.distance(current_pixel_midpoint)
-                    dist_edge = to_point.distance(segment_point)
-                    #self.feedback.pushInfo("dist_to_segment = {}".format(dist_to_segment))
-                    #self.feedback.pushInfo("dist_on_edge = {}".format(dist_edge))
-                    #self.feedback.pushInfo("cost = {}".format(from_vertex_cost))
-                    pixel_cost = to_vertex_cost + dist_edge + dist_to_segment
-                    raster_data[i,j] = pixel_cost
-                else:
-                    pixel_cost = -99999#nearest_feature['cost'] + (nearest_vertex.point().distance(current_pixel_midpoint))
+                    if vertex_type == "from_vertex":
+                        nearest_edge_geometry = QgsGeometry().fromPolylineXY([from_point, nearest_vertex.point()])
+                        res = nearest_edge_geometry.closestSegmentWithContext(current_pixel_midpoint)
+                        segment_point = res[1] #[0: distance, 1: point, 2: left_of, 3: epsilon for snapping]
+                        dist_to_segment = segment_point.distance(current_pixel_midpoint)
+                        dist_edge = from_point.distance(segment_point)
+                        #self.feedback.pushInfo("dist_to_segment = {}".format(dist_to_segment))
+                        #self.feedback.pushInfo("dist_on_edge = {}".format(dist_edge))
+                        #self.feedback.pushInfo("cost = {}".format(from_vertex_cost))
+                        pixel_cost = from_vertex_cost + dist_edge + dist_to_segment
+                        tile_data[i,j] = pixel_cost
+                    elif vertex_type == "to_vertex":
+                        nearest_edge_geometry = QgsGeometry().fromPolylineXY([nearest_vertex.point(), to_point])
+                        res = nearest_edge_geometry.closestSegmentWithContext(current_pixel_midpoint)
+                        segment_point = res[1] #[0: distance, 1: point, 2: left_of, 3: epsilon for snapping]
+                        dist_to_segment = segment_point.distance(current_pixel_midpoint)
+                        dist_edge = to_point.distance(segment_point)
+                        #self.feedback.pushInfo("dist_to_segment = {}".format(dist_to_segment))
+                        #self.feedback.pushInfo("dist_on_edge = {}".format(dist_edge))
+                        #self.feedback.pushInfo("cost = {}".format(from_vertex_cost))
+                        pixel_cost = to_vertex_cost + dist_edge + dist_to_segment
+                        tile_data[i,j] = pixel_cost
+                    else:
+                        pixel_cost = -99999#nearest_feature['cost'] + (nearest_vertex.point().distance(current_pixel_midpoint))
                             
                     
-                """
-                nearest_feature_pointxy = nearest_feature.geometry().asPoint()
-                nearest_feature_cost = nearest_feature['cost']
-                
-                dist_to_vertex = current_pixel_midpoint.distance(nearest_feature_pointxy)
-                #implement time cost
-                pixel_cost = dist_to_vertex + nearest_feature_cost
-                
-                raster_data[i,j] = pixel_cost
-                """
-                counter = counter+1
-                if counter%1000 == 0:
-                    self.feedback.pushInfo("[QNEAT3Network][calcQneatInterpolation] Interpolated {} cells...".format(counter))
-                self.feedback.setProgress((counter/total_work)*100)
+                    """
+                    nearest_feature_pointxy = nearest_feature.geometry().asPoint()
+                    nearest_feature_cost = nearest_feature['cost']
                 
+                    dist_to_vertex = current_pixel_midpoint.distance(nearest_feature_pointxy)
+                    #implement time cost
+                    pixel_cost = dist_to_vertex + nearest_feature_cost
                 
-        band.WriteArray(raster_data)
-        outRasterSRS = osr.SpatialReference()
-        outRasterSRS.ImportFromWkt(self.AnalysisCrs.toWkt())
-        output_interpolation_raster.SetProjection(outRasterSRS.ExportToWkt())
-        band.FlushCache()
-
-        
+                    tile_data[i,j] = pixel_cost
+                    """
+                    if progress.step():
+                        break
+            
+            writer.writeTile(tile_data, xoff, yoff)
         
-    def calcIsoTinInterpolation(self, iso_point_layer, resolution, interpolation_raster_path):
+        progress.finish()
+        writer.close()
+    
+    @profiledPhase('interpolation')
+    def calcIsoTinInterpolation(self, iso_pointcloud, resolution, interpolation_raster_path=None, keep_raster=True, raster_profile=0, cost_bound=None):
+        """
+        Linearly interpolates the costs of the iso pointcloud (list of QgsFeature as returned by calcIsoPoints) on its Delaunay
+        triangulation into a numpy array. Returns the interpolation raster as tuple (raster_values, geotransform). The raster is
+        only written to disk (as compressed GeoTIFF) if interpolation_raster_path is given. If keep_raster is False the raster
+        is interpolated and written tile by tile without ever being held in memory as a whole and None is returned.
+        raster_profile is an index of Qneat3RasterWriter.PROFILE_NAMES.
+        The raster is sparse: only tiles touched by triangles are interpolated (and written), all others stay NoData. If
+        cost_bound is given, triangles whose corners all cost more than cost_bound are dropped and the raster extent is
+        clipped to the remaining triangles.
+        """
         if self.AnalysisCrs.isGeographic():
-            raise QgsProcessingException('The TIN-Interpolation algorithm in QGIS is designed to work with projected coordinate systems.Please use a projected coordinate system (eg. UTM zones) instead of geographic coordinate systems (eg. WGS84)!')
+            raise QgsProcessingException('The TIN-Interpolation algorithm in QNEAT3 is designed to work with projected coordinate systems.Please use a projected coordinate system (eg. UTM zones) instead of geographic coordinate systems (eg. WGS84)!')
         
-        layer_data = QgsInterpolator.LayerData()
-        QgsInterpolator.LayerData
+        x = []
+        y = []
+        costs = []
+        for feat in iso_pointcloud:
+            pt = feat.geometry().asPoint()
+            x.append(pt.x())
+            y.append(pt.y())
+            costs.append(feat['cost'])
+        x = asarray(x)
+        y = asarray(y)
+        costs = asarray(costs)
+        if len(x) < 3:
+            raise QgsProcessingException('The iso pointcloud contains less than three points, increase the size of the iso-area.')
         
-        layer_data.source = iso_point_layer #in QGIS2: vectorLayer
-        layer_data.valueSource = QgsInterpolator.ValueAttribute
-        layer_data.interpolationAttribute =  1 #take second field to get costs
-        layer_data.sourceType = QgsInterpolator.SourcePoints
-
-        tin_interpolator = QgsTinInterpolator([layer_data], QgsTinInterpolator.TinInterpolation.Linear)
+        self.feedback.pushInfo("[QNEAT3Network][calcIsoTinInterpolation] Triangulating {} points...".format(len(x)))
+        triangles = delaunayTriangles(x, y)
+        if cost_bound is not None:
+            bounded_triangles = triangles[costs[triangles].min(axis=1) <= cost_bound]
+            if len(bounded_triangles) > 0:
+                triangles = bounded_triangles
+        triangle_x = x[triangles]
+        triangle_y = y[triangles]
+        box_xmin, box_xmax = triangle_x.min(axis=1), triangle_x.max(axis=1)
+        box_ymin, box_ymax = triangle_y.min(axis=1), triangle_y.max(axis=1)
         
-        rect = iso_point_layer.extent()
-        ncol = int((rect.xMaximum() - rect.xMinimum()) / resolution)
-        nrows = int((rect.yMaximum() - rect.yMinimum()) / resolution)
+        #same cell layout as QgsGridFileWriter: the extent is split into ncol x nrows cells, values are taken at cell centres
+        xmin, xmax, ymin, ymax = box_xmin.min(), box_xmax.max(), box_ymin.min(), box_ymax.max()
+        ncol = max(1, int((xmax - xmin) / resolution))
+        nrows = max(1, int((ymax - ymin) / resolution))
+        geotransform = (xmin, (xmax - xmin) / ncol, 0, ymax, 0, -(ymax - ymin) / nrows)
         
-        writer = QgsGridFileWriter(tin_interpolator, interpolation_raster_path, rect, ncol, nrows)
-        writer.writeFile(self.feedback)  # Creating .asc raste
-        return QgsRasterLayer(interpolation_raster_path, "temp_qneat3_interpolation_raster")
-
-    def calcIsoContours(self, max_dist, interval, interpolation_raster_path):
-        featurelist = []
+        NoData_value = -9999
+        tile_mask = sparseTileMap(geotransform, nrows, ncol, Qneat3RasterWriter.TILE_SIZE, box_xmin, box_xmax, box_ymin, box_ymax)
+        self.feedback.pushInfo("[QNEAT3Network][calcIsoTinInterpolation] Rasterizing {} triangles into {} x {} cells ({} of {} tiles)...".format(len(triangles), ncol, nrows, tile_mask.sum(), tile_mask.size))
         
-        try:
-            import matplotlib.pyplot as plt
-        except:
-            return featurelist
-    
-        ds_in = gdal.Open(interpolation_raster_path)
-        band_in = ds_in.GetRasterBand(1)
-        xsize_in = band_in.XSize
-        ysize_in = band_in.YSize
-    
-        geotransform_in = ds_in.GetGeoTransform()
-    
-        srs = osr.SpatialReference()
-        srs.ImportFromWkt( ds_in.GetProjectionRef() )
-
-        raster_values = band_in.ReadAsArray(0, 0, xsize_in, ysize_in)
-        raster_values[raster_values < 0] = max_dist + 1000 #necessary to produce rectangular array from raster
-        #nodata values get replaced by the maximum value + 1
+        if not keep_raster:
+            writer = Qneat3RasterWriter(interpolation_raster_path, ncol, nrows, geotransform, self.AnalysisCrs.toWkt(), NoData_value, raster_profile)
+            for xoff, yoff, tile_values in self.interpolateTinTiles(x, y, costs, triangles, geotransform, nrows, ncol, NoData_value, tile_mask):
+                writer.writeTile(tile_values, xoff, yoff)
+            writer.close()
+            return None
         
-        x_pos = linspace(geotransform_in[0], geotransform_in[0] + geotransform_in[1] * raster_values.shape[1], raster_values.shape[1])
-        y_pos = linspace(geotransform_in[3], geotransform_in[3] + geotransform_in[5] * raster_values.shape[0], raster_values.shape[0])
-        x_grid, y_grid = meshgrid(x_pos, y_pos)        
+        raster_values = full((nrows, ncol), float(NoData_value))
+        for xoff, yoff, tile_values in self.interpolateTinTiles(x, y, costs, triangles, geotransform, nrows, ncol, NoData_value, tile_mask):
+            raster_values[yoff:yoff+tile_values.shape[0], xoff:xoff+tile_values.shape[1]] = tile_values
         
-        start = interval
-        end = interval * ceil(max_dist/interval) +interval
+        if interpolation_raster_path:
+            self.writeIsoRaster(raster_values, geotransform, NoData_value, interpolation_raster_path, raster_profile, tile_mask)
+        return raster_values, geotransform
     
-        levels = arange(start, end, interval)
+    def interpolateTinTiles(self, x, y, costs, triangles, geotransform, nrows, ncol, nodata_value, tile_mask):
+        """Yields (xoff, yoff, tile_values) for all tiles switched on in tile_mask, passing only the triangles overlapping each tile"""
+        triangle_x = x[triangles]
+        triangle_y = y[triangles]
+        box_xmin, box_xmax = triangle_x.min(axis=1), triangle_x.max(axis=1)
+        box_ymin, box_ymax = triangle_y.min(axis=1), triangle_y.max(axis=1)
+        progress = Qneat3Progress(self.feedback, int(tile_mask.sum()), chunk_size=1)
         
-        fid = 0
-        for current_level in nditer(levels):
-            self.feedback.pushInfo("[QNEAT3Network][calcIsoContours] Calculating {}-level contours".format(current_level))
-            contours = plt.contourf(x_grid, y_grid, raster_values, [0, current_level], antialiased=True)
+        for xoff, yoff, tile_cols, tile_rows in rasterTiles(nrows, ncol, Qneat3RasterWriter.TILE_SIZE, tile_mask):
+            if progress.isCanceled():
+                break
+            tile_geotransform = (geotransform[0] + xoff * geotransform[1], geotransform[1], 0, geotransform[3] + yoff * geotransform[5], 0, geotransform[5])
+            tile_xmax = tile_geotransform[0] + tile_cols * geotransform[1]
+            tile_ymin = tile_geotransform[3] + tile_rows * geotransform[5]
+            in_tile = (box_xmax >= tile_geotransform[0]) & (box_xmin <= tile_xmax) & (box_ymax >= tile_ymin) & (box_ymin <= tile_geotransform[3])
             
-            for contour_paths in contours.get_paths():                    
-                for polygon in contour_paths.to_polygons():
-                    x = polygon[:,0]
-                    y = polygon[:,1]
-
-                    polylinexy_list = [QgsPointXY(i[0], i[1]) for i in zip(x,y)]
-                
-                    feat = QgsFeature()
-                    fields = QgsFields()
-                    fields.append(QgsField('id', QVariant.Int, '', 254, 0))
-                    fields.append(QgsField('cost_level', QVariant.Double, '', 20, 7))
-                    feat.setFields(fields)
-                    geom = QgsGeometry().fromPolylineXY(polylinexy_list)
-                    feat.setGeometry(geom)
-                    feat['id'] = fid
-                    feat['cost_level'] = float(current_level)
-                    featurelist.insert(0, feat)
-                        
-            fid=fid+1    
-        return featurelist
+            yield xoff, yoff, interpolateTriangles(x, y, costs, triangles[in_tile], tile_geotransform, tile_rows, tile_cols, nodata_value)
+            progress.step()
+        progress.finish()
     
-    
-    def calcIsoPolygons(self, max_dist, interval, interpolation_raster_path):
-        featurelist = []
-        
-        try:
-            import matplotlib.pyplot as plt
-        except:
-            return featurelist
-    
-        ds_in = gdal.Open(interpolation_raster_path)
-        band_in = ds_in.GetRasterBand(1)
-        xsize_in = band_in.XSize
-        ysize_in = band_in.YSize
-    
-        geotransform_in = ds_in.GetGeoTransform()
-    
-        srs = osr.SpatialReference()
-        srs.ImportFromWkt( ds_in.GetProjectionRef() )
+    @profiledPhase('raster writing')
+    def writeIsoRaster(self, raster_values, geotransform, nodata_value, interpolation_raster_path, raster_profile=0, tile_mask=None):
+        writer = Qneat3RasterWriter(interpolation_raster_path, raster_values.shape[1], raster_values.shape[0], geotransform, self.AnalysisCrs.toWkt(), nodata_value, raster_profile)
+        for xoff, yoff, tile_cols, tile_rows in writer.tiles(tile_mask):
+            writer.writeTile(raster_values[yoff:yoff+tile_rows, xoff:xoff+tile_cols], xoff, yoff)
+        writer.close()
 
-        raster_values = band_in.ReadAsArray(0, 0, xsize_in, ysize_in)
+    def prepareIsoRaster(self, max_dist, interpolation_raster):
+        """Returns a copy of the interpolation raster values ready for contouring, together with its geotransform"""
+        raster_values, geotransform = interpolation_raster
+        raster_values = raster_values.copy()
         raster_values[raster_values < 0] = max_dist + 1000 #necessary to produce rectangular array from raster
         #nodata values get replaced by the maximum value + 1
-        
-        x_pos = linspace(geotransform_in[0], geotransform_in[0] + geotransform_in[1] * raster_values.shape[1], raster_values.shape[1])
-        y_pos = linspace(geotransform_in[3], geotransform_in[3] + geotransform_in[5] * raster_values.shape[0], raster_values.shape[0])
-        x_grid, y_grid = meshgrid(x_pos, y_pos)        
-        
+        return raster_values, geotransform
+    
+    def calcIsoLevels(self, max_dist, interval):
         start = interval
         end = interval * ceil(max_dist/interval) +interval
+        return arange(start, end, interval)
     
-        levels = arange(start, end, interval)
-
-        fid = 0
-        for current_level in nditer(levels):
-            self.feedback.pushInfo("[QNEAT3Network][calcIsoPolygons] calculating {}-level contours".format(current_level))
-            contours = plt.contourf(x_grid, y_grid, raster_values, [0, current_level], antialiased=True)
-        
-            for contour_path in contours.get_paths(): 
+    @cachedQuery('iso contours', lambda net, args: (args['max_dist'], args['interval'], net.rasterKey(args['interpolation_raster'])), featuresToRecords, featuresFromRecords)
+    @profiledPhase('contouring')
+    def calcIsoContours(self, max_dist, interval, interpolation_raster):
+        featurelist = []
     
-                polygon_list = []
-                
-                for vertex in contour_path.to_polygons():
-                    x = vertex[:,0]
-                    y = vertex[:,1]
-
-                    polylinexy_list = [QgsPointXY(i[0], i[1]) for i in zip(x,y)]
-                    polygon_list.append(polylinexy_list)
-                
+        raster_values, geotransform = self.prepareIsoRaster(max_dist, interpolation_raster)
+        levels = self.calcIsoLevels(max_dist, interval)
+        
+        fields = QgsFields()
+        fields.append(QgsField('id', QVariant.Int, '', 254, 0))
+        fields.append(QgsField('cost_level', QVariant.Double, '', 20, 7))
+        
+        self.feedback.pushInfo("[QNEAT3Network][calcIsoContours] Calculating contours of {} levels".format(len(levels)))
+        for fid, (current_level, lines) in enumerate(zip(levels, contourLevels(raster_values, geotransform, levels))):
+            for geom in lineGeometries(lines):
                 feat = QgsFeature()
-                fields = QgsFields()
-                fields.append(QgsField('id', QVariant.Int, '', 254, 0))
-                fields.append(QgsField('cost_level', QVariant.Double, '', 20, 7))
                 feat.setFields(fields)
-                geom = QgsGeometry().fromPolygonXY(polygon_list)
                 feat.setGeometry(geom)
                 feat['id'] = fid
                 feat['cost_level'] = float(current_level)
-                
-
                 featurelist.insert(0, feat)
-            fid=fid+1    
-        """Maybe move to algorithm"""
-        #featurelist = featurelist[::-1] #reverse
+        return featurelist
+    
+    @cachedQuery('iso polygons', lambda net, args: (args['max_dist'], args['interval'], net.rasterKey(args['interpolation_raster']), args['ring_polygons']), featuresToRecords, featuresFromRecords)
+    @profiledPhase('contouring')
+    def calcIsoPolygons(self, max_dist, interval, interpolation_raster, ring_polygons=False):
+        """
+        Calculates the iso-area polygons of all levels by one marching squares traversal of the raster. Each feature covers the whole area from 0 up to
+        its level, or if ring_polygons is True only the band between the previous and the current level.
+        """
+        featurelist = []
+    
+        raster_values, geotransform = self.prepareIsoRaster(max_dist, interpolation_raster)
+        levels = self.calcIsoLevels(max_dist, interval)
+        
+        fields = QgsFields()
+        fields.append(QgsField('id', QVariant.Int, '', 254, 0))
+        fields.append(QgsField('cost_level', QVariant.Double, '', 20, 7))
+        
+        self.feedback.pushInfo("[QNEAT3Network][calcIsoPolygons] Calculating contours of {} levels".format(len(levels)))
+        for fid, (current_level, polygons) in enumerate(zip(levels, contourAreas(raster_values, geotransform, levels, ring_polygons))):
+            if not polygons:
+                continue
+            geom = polygonGeometry(polygons)
+            
+            feat = QgsFeature()
+            feat.setFields(fields)
+            feat.setGeometry(geom)
+            feat['id'] = fid
+            feat['cost_level'] = float(current_level)
+            featurelist.insert(0, feat)
+            
         self.feedback.pushInfo("[QNEAT3Network][calcIsoPolygons] number of elements in contour_featurelist: {}".format(len(featurelist)))
         return featurelist
         
+
+class Qneat3FeatureIdStrategy(QgsNetworkStrategy):
+    """Network strategy recording the id of the feature an edge is built from as its cost"""
+
+    def requiredAttributes(self):
+        return set()
+
+    def cost(self, distance, feature):
+        return feature.id()
+
+def sparseMinimumCosts(vertex_costs, vertex_origins):
+    """Compact cache value of the result of calcMinimumCosts: vertex count and ids, costs and origins of the reached vertices"""
+    reached_vertex_ids = isfinite(vertex_costs).nonzero()[0].astype(int32)
+    return len(vertex_costs), reached_vertex_ids, vertex_costs[reached_vertex_ids], vertex_origins[reached_vertex_ids]
+
+def denseMinimumCosts(vertex_count, reached_vertex_ids, reached_costs, reached_origins):
+    vertex_costs = full(vertex_count, inf)
+    vertex_origins = full(vertex_count, -1, dtype=int32)
+    vertex_costs[reached_vertex_ids] = reached_costs
+    vertex_origins[reached_vertex_ids] = reached_origins
+    return vertex_costs, vertex_origins
+
 class Qneat3AnalysisPoint():
     
     def __init__(self, layer_name, feature, point_id_field_name, net, vertex_geom, entry_cost_calculation_method, feedback):
-        self.layer_name = layer_name
         self.point_feature = feature
-        self.point_id = feature[point_id_field_name] 
-        self.point_geom = feature.geometry().asPoint()
-        self.network_vertex_id = self.getNearestVertexId(net.network, vertex_geom)
-        self.network_vertex = self.getNearestVertex(net.network, vertex_geom)
+        self.setupPoint(layer_name, feature[point_id_field_name], feature.geometry().asPoint(), net, vertex_geom, entry_cost_calculation_method, feedback)
+    
+    def setupPoint(self, layer_name, point_id, point_geom, net, vertex_geom, entry_cost_calculation_method, feedback):
+        self.layer_name = layer_name
+        self.point_id = point_id
+        self.point_geom = point_geom
+        with net.profiler.phase('point tying'):
+            self.network_vertex_id = self.getNearestVertexId(net.network, vertex_geom)
+            self.network_vertex = self.getNearestVertex(net.network, vertex_geom)
         self.crs = net.AnalysisCrs
         self.strategy = net.strategy_int
         self.entry_speed = net.default_speed
-        if entry_cost_calculation_method == 0:
-            self.entry_cost = self.calcEntryCostEllipsoidal(feedback)
-        elif entry_cost_calculation_method == 1:
-            self.entry_cost = self.calcEntryCostPlanar(feedback)
-        else:
-            self.entry_cost = self.calcEntryCostEllipsoidal(feedback)
+        with net.profiler.phase('entry cost'):
+            if entry_cost_calculation_method == 0:
+                self.entry_cost = self.calcEntryCostEllipsoidal(feedback)
+            elif entry_cost_calculation_method == 1:
+                self.entry_cost = self.calcEntryCostPlanar(feedback)
+            else:
+                self.entry_cost = self.calcEntryCostEllipsoidal(feedback)
         
     def calcEntryCostEllipsoidal(self, feedback):
         dist_calculator = QgsDistanceArea()
@@ -567,3 +993,120 @@ class Qneat3AnalysisPoint():
     def __str__(self):
         return u"Qneat3AnalysisPoint: {} analysis_id: {:30} FROM {:30} TO {:30} network_id: {:d}".format(self.layer_name, self.point_id, self.point_geom.__str__(), self.network_vertex.point().__str__(), self.network_vertex_id)    
                                                                                                                                                                                                                         
+
+
+class Qneat3AnalysisPointSet():
+    """
+    Qneat3AnalysisPointSet:
+    Columnar store of analysis points: ids (list), x, y, snapped vertex ids and entry costs (numpy arrays) instead of one
+    Qneat3AnalysisPoint object per point. Indexing and iteration create lightweight Qneat3AnalysisPointView objects on access,
+    so every method taking a list of analysis points also takes a point set; loops over many points should use the arrays
+    (or rows()) directly.
+    """
+    
+    def __init__(self, layer_name, point_ids, x, y, vertex_ids, entry_costs, network):
+        self.layer_name = layer_name
+        self.point_ids = list(point_ids)
+        self.x = asarray(x, dtype=float64)
+        self.y = asarray(y, dtype=float64)
+        self.vertex_ids = asarray(vertex_ids, dtype=int32)
+        self.entry_costs = asarray(entry_costs, dtype=float64)
+        self.network = network #QgsGraph the vertex ids refer to
+    
+    @classmethod
+    def fromArrays(cls, layer_name, point_ids, x, y, net, tied_points, entry_cost_calculation_method, feedback):
+        """Snaps the points (x, y as returned by readPointArrays) to the vertices of their tied points (slice of net.list_tiedPoints) and calculates all entry costs at once"""
+        x = asarray(x, dtype=float64)
+        y = asarray(y, dtype=float64)
+        with net.profiler.phase('point tying'):
+            vertex_ids = fromiter((net.network.findVertex(tied_point) for tied_point in tied_points), dtype=int32, count=len(tied_points))
+            vertex_x = fromiter((tied_point.x() for tied_point in tied_points), dtype=float64, count=len(tied_points))
+            vertex_y = fromiter((tied_point.y() for tied_point in tied_points), dtype=float64, count=len(tied_points))
+        
+        with net.profiler.phase('entry cost'):
+            if entry_cost_calculation_method == 1:
+                entry_costs = hypot(vertex_x - x, vertex_y - y)
+            else:
+                dist_calculator = QgsDistanceArea()
+                dist_calculator.setSourceCrs(QgsProject().instance().crs(), QgsProject().instance().transformContext())
+                dist_calculator.setEllipsoid(QgsProject().instance().crs().ellipsoidAcronym())
+                entry_costs = fromiter((dist_calculator.measureLine([QgsPointXY(px, py), QgsPointXY(vx, vy)]) for px, py, vx, vy in zip(x.tolist(), y.tolist(), vertex_x.tolist(), vertex_y.tolist())), dtype=float64, count=len(x))
+            if net.strategy_int != 0:
+                entry_costs = entry_costs/(net.default_speed*(1000.0 / 3600.0)) #length/(m/s) todo: Make dynamic
+        feedback.pushInfo("[QNEAT3Network][Qneat3AnalysisPointSet] {} entry costs of {} points calculated ({})".format("Planar" if entry_cost_calculation_method == 1 else "Ellipsoidal", len(x), layer_name))
+        return cls(layer_name, point_ids, x, y, vertex_ids, entry_costs, net.network)
+    
+    @classmethod
+    def fromAnalysisPoints(cls, analysis_point_list, network):
+        """Point set of a list of Qneat3AnalysisPoint (or Qneat3AnalysisPointView) objects"""
+        return cls(analysis_point_list[0].layer_name if analysis_point_list else "",
+                   [point.point_id for point in analysis_point_list],
+                   [point.point_geom.x() for point in analysis_point_list],
+                   [point.point_geom.y() for point in analysis_point_list],
+                   [point.network_vertex_id for point in analysis_point_list],
+                   [point.entry_cost for point in analysis_point_list],
+                   network)
+    
+    def subset(self, indices):
+        return Qneat3AnalysisPointSet(self.layer_name, [self.point_ids[i] for i in indices], self.x[indices], self.y[indices], self.vertex_ids[indices], self.entry_costs[indices], self.network)
+    
+    def sharedArrays(self):
+        """The numeric columns by name, as handed to worker processes (see createProcessPool)"""
+        return OrderedDict([('x', self.x), ('y', self.y), ('vertex_ids', self.vertex_ids), ('entry_costs', self.entry_costs)])
+    
+    def rows(self):
+        """Iterates (point id, vertex id, entry cost) tuples of plain python values"""
+        return zip(self.point_ids, self.vertex_ids.tolist(), self.entry_costs.tolist())
+    
+    def pointXY(self, index):
+        return QgsPointXY(float(self.x[index]), float(self.y[index]))
+    
+    def __len__(self):
+        return len(self.point_ids)
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index = index + len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Qneat3AnalysisPointView(self, int(index))
+    
+    def __iter__(self):
+        return (Qneat3AnalysisPointView(self, index) for index in range(len(self)))
+
+
+class Qneat3AnalysisPointView():
+    """Read only view of one point of a Qneat3AnalysisPointSet with the attributes of Qneat3AnalysisPoint"""
+    
+    __slots__ = ('point_set', 'index')
+    
+    def __init__(self, point_set, index):
+        self.point_set = point_set
+        self.index = index
+    
+    @property
+    def layer_name(self):
+        return self.point_set.layer_name
+    
+    @property
+    def point_id(self):
+        return self.point_set.point_ids[self.index]
+    
+    @property
+    def point_geom(self):
+        return self.point_set.pointXY(self.index)
+    
+    @property
+    def network_vertex_id(self):
+        return int(self.point_set.vertex_ids[self.index])
+    
+    @property
+    def network_vertex(self):
+        return self.point_set.network.vertex(self.network_vertex_id)
+    
+    @property
+    def entry_cost(self):
+        return float(self.point_set.entry_costs[self.index])
+    
+    def __str__(self):
+        return u"Qneat3AnalysisPoint: {} analysis_id: {:30} FROM {:30} TO {:30} network_id: {:d}".format(self.layer_name, self.point_id, self.point_geom.__str__(), self.network_vertex.point().__str__(), self.network_vertex_id)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3GraphUpdate.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import time
+
+from math import floor
+from numpy import asarray, inf, int64, isin, nan
+from qgis.core import QgsDistanceArea, QgsFeatureRequest, QgsPointXY, QgsProcessingFeedback, QgsProject, QgsWkbTypes
+
+from QNEAT3.Qneat3Utilities import getFieldIndexFromQgsProcessingFeatureSource
+
+
+class Qneat3GraphUpdater():
+    """
+    Qneat3GraphUpdater:
+    Applies edits of the network layer to a Qneat3ArrayGraph built from it, instead of building the graph again. The
+    edges of deleted and changed features are removed, changed and added features are read again and turned into edges
+    the way QgsVectorLayerDirector does it (one edge per segment and direction, distance costs measured on the WGS84
+    ellipsoid, time costs from the speed field in km/h). Segment end points are merged with existing vertices within
+    the tolerance, so vertex ids stay valid; vertices of the old edges of a changed feature lying on its new segments
+    (eg. tied points) split the segments again. The graph needs the feature id of every edge, recorded while it is built
+    (see input_edgeFeatures of Qneat3Network).
+    """
+
+    SPEED_TO_METRIC = 1000.0 / 3600.0
+
+    def __init__(self, network_layer, strategy=0, direction_field='', value_forward='', value_backward='', value_both='',
+                 default_direction=2, speed_field='', default_speed=5.0, tolerance=0.0, feedback=None):
+        """
+        Constructor for a Qneat3GraphUpdater object, the parameters match the ones the graph was built with (see Qneat3Network).
+        @type network_layer: QgsVectorLayer
+        @param network_layer: line layer of the network holding the edits
+        @type default_direction: int
+        @param default_direction: QgsVectorLayerDirector direction (0 forward, 1 backward, 2 both)
+        """
+        self.network_layer = network_layer
+        self.strategy = strategy
+        self.direction_field_id = getFieldIndexFromQgsProcessingFeatureSource(network_layer, direction_field)
+        self.value_forward = value_forward
+        self.value_backward = value_backward
+        self.value_both = value_both
+        self.default_direction = default_direction
+        self.speed_field_id = getFieldIndexFromQgsProcessingFeatureSource(network_layer, speed_field) if strategy != 0 else -1
+        self.default_speed = default_speed
+        self.tolerance = tolerance
+        self.feedback = feedback if feedback is not None else QgsProcessingFeedback()
+
+        #same measurement as the default of QgsGraphBuilder
+        self.distance_area = QgsDistanceArea()
+        self.distance_area.setSourceCrs(network_layer.crs(), QgsProject.instance().transformContext())
+        self.distance_area.setEllipsoid('WGS84')
+
+    @classmethod
+    def fromNetworkSettings(cls, network, network_layer, feedback=None):
+        """Creates an updater for the "network" settings of a batch job (see Qneat3BatchRunner)"""
+        from QNEAT3.Qneat3BatchRunner import Qneat3BatchRunner
+
+        default_direction = network.get('default_direction', 2)
+        return cls(network_layer, int(network.get('strategy', 0)), network.get('direction_field', ''),
+                   network.get('value_forward', ''), network.get('value_backward', ''), network.get('value_both', ''),
+                   Qneat3BatchRunner.DIRECTIONS.get(default_direction, default_direction), network.get('speed_field', ''),
+                   float(network.get('default_speed', 5.0)), float(network.get('tolerance', 0.0)), feedback)
+
+    def update(self, array_graph, changed_ids=(), added_ids=(), deleted_ids=()):
+        """
+        Returns (patched Qneat3ArrayGraph, summary dict) for the given ids of changed, added and deleted features of the
+        network layer. The given graph is left untouched, so it can keep answering queries until the patched one replaces it.
+        """
+        if array_graph.edge_features is None:
+            raise ValueError('the graph has no feature ids of its edges, build it again to update it')
+        start_time = time.time()
+        removed_feature_ids = set(int(feature_id) for feature_id in changed_ids) | set(int(feature_id) for feature_id in deleted_ids)
+        read_feature_ids = set(int(feature_id) for feature_id in changed_ids) | set(int(feature_id) for feature_id in added_ids)
+
+        removed_edge_ids = isin(array_graph.edge_features, asarray(sorted(removed_feature_ids), dtype=int64)).nonzero()[0]
+        old_feature_vertices = {}
+        for edge_id in removed_edge_ids.tolist():
+            vertices = old_feature_vertices.setdefault(int(array_graph.edge_features[edge_id]), set())
+            vertices.add(int(array_graph.edge_from[edge_id]))
+            vertices.add(int(array_graph.edge_to[edge_id]))
+
+        self.new_vertices = ([], []) #x, y of the added vertices, their ids follow the ones of the graph
+        self.new_vertex_cells = {} #grid cell (see vertexCell) -> indices of the added vertices in it
+        edges = ([], [], [], []) #from vertex, to vertex, cost, feature id of the added edges
+        request = QgsFeatureRequest().setFilterFids(read_feature_ids)
+        request.setSubsetOfAttributes([field_id for field_id in (self.direction_field_id, self.speed_field_id) if field_id >= 0])
+        for feature in self.network_layer.getFeatures(request):
+            self.addFeatureEdges(array_graph, feature, old_feature_vertices.get(feature.id(), ()), edges)
+
+        patched_graph = array_graph.patched(removed_edge_ids, self.new_vertices[0], self.new_vertices[1], *edges)
+        summary = {'edges_removed': len(removed_edge_ids), 'edges_added': len(edges[0]), 'vertices_added': len(self.new_vertices[0]),
+                   'vertices': patched_graph.vertex_count, 'edges': patched_graph.edge_count, 'seconds': round(time.time() - start_time, 3)}
+        self.feedback.pushInfo("[QNEAT3GraphUpdater][update] Removed {edges_removed} and added {edges_added} edges in {seconds} s".format(**summary))
+        return patched_graph, summary
+
+    def addFeatureEdges(self, array_graph, feature, old_vertex_ids, edges):
+        direction = self.featureDirection(feature)
+        speed = self.featureSpeed(feature)
+        geometry = feature.geometry()
+        if QgsWkbTypes.flatType(geometry.wkbType()) == QgsWkbTypes.MultiLineString:
+            lines = geometry.asMultiPolyline()
+        elif QgsWkbTypes.flatType(geometry.wkbType()) == QgsWkbTypes.LineString:
+            lines = [geometry.asPolyline()]
+        else:
+            lines = []
+
+        for line in lines:
+            for point1, point2 in zip(line[:-1], line[1:]):
+                vertex_ids = [self.vertexId(array_graph, point1.x(), point1.y())]
+                vertex_ids.extend(self.verticesOnSegment(array_graph, point1, point2, old_vertex_ids))
+                vertex_ids.append(self.vertexId(array_graph, point2.x(), point2.y()))
+                for from_vertex_id, to_vertex_id in zip(vertex_ids[:-1], vertex_ids[1:]):
+                    if from_vertex_id == to_vertex_id:
+                        continue
+                    cost = self.edgeCost(self.distance_area.measureLine(self.vertexPoint(array_graph, from_vertex_id), self.vertexPoint(array_graph, to_vertex_id)), speed)
+                    if direction in (0, 2):
+                        for column, value in zip(edges, (from_vertex_id, to_vertex_id, cost, feature.id())):
+                            column.append(value)
+                    if direction in (1, 2):
+                        for column, value in zip(edges, (to_vertex_id, from_vertex_id, cost, feature.id())):
+                            column.append(value)
+
+    def featureDirection(self, feature):
+        """Returns the direction of a feature like QgsVectorLayerDirector: 0 forward, 1 backward, 2 both"""
+        if self.direction_field_id < 0:
+            return self.default_direction
+        value = feature.attribute(self.direction_field_id)
+        value = '' if value is None else str(value)
+        if value == self.value_both:
+            return 2
+        if value == self.value_forward:
+            return 0
+        if value == self.value_backward:
+            return 1
+        return self.default_direction
+
+    def featureSpeed(self, feature):
+        """Returns the speed of a feature in km/h as QgsNetworkSpeedStrategy reads it: the default speed without speed field, 0 for empty or not numeric values"""
+        if self.speed_field_id < 0:
+            return self.default_speed
+        try:
+            return float(feature.attribute(self.speed_field_id))
+        except (TypeError, ValueError):
+            return 0.0
+
+    def edgeCost(self, distance, speed):
+        """Returns the cost of an edge like QgsNetworkSpeedStrategy: the travel time at speed, at the default speed if that time is not positive (speed 0 yields inf)"""
+        if self.strategy == 0:
+            return distance
+        if speed == 0:
+            cost = inf if distance > 0 else nan
+        else:
+            cost = distance / (speed * self.SPEED_TO_METRIC)
+        if cost <= 0:
+            return distance / (self.default_speed * self.SPEED_TO_METRIC)
+        return cost
+
+    def vertexId(self, array_graph, x, y):
+        """Returns the id of the vertex at x, y (within the tolerance), adds a new vertex if there is none"""
+        cell_x, cell_y = self.vertexCell(x, y)
+        #added vertices within the tolerance lie in the same or a neighbouring cell, the first one added wins
+        neighbour_cells = [(cell_x + i, cell_y + j) for i in (-1, 0, 1) for j in (-1, 0, 1)] if self.tolerance > 0 else [(cell_x, cell_y)]
+        matches = [new_vertex_id for cell in neighbour_cells for new_vertex_id in self.new_vertex_cells.get(cell, ())
+                   if (self.new_vertices[0][new_vertex_id] - x) ** 2 + (self.new_vertices[1][new_vertex_id] - y) ** 2 <= self.tolerance ** 2]
+        if matches:
+            return array_graph.vertex_count + min(matches)
+        vertex_id, distance = array_graph.nearestVertexId(x, y)
+        if vertex_id != -1 and distance <= self.tolerance:
+            return vertex_id
+        self.new_vertex_cells.setdefault((cell_x, cell_y), []).append(len(self.new_vertices[0]))
+        self.new_vertices[0].append(x)
+        self.new_vertices[1].append(y)
+        return array_graph.vertex_count + len(self.new_vertices[0]) - 1
+
+    def vertexCell(self, x, y):
+        """Returns the cell of x, y in a grid of tolerance sized cells (the exact coordinates if the tolerance is 0)"""
+        if self.tolerance > 0:
+            return floor(x / self.tolerance), floor(y / self.tolerance)
+        return x, y
+
+    def vertexPoint(self, array_graph, vertex_id):
+        if vertex_id < array_graph.vertex_count:
+            return QgsPointXY(float(array_graph.vertex_x[vertex_id]), float(array_graph.vertex_y[vertex_id]))
+        return QgsPointXY(self.new_vertices[0][vertex_id - array_graph.vertex_count], self.new_vertices[1][vertex_id - array_graph.vertex_count])
+
+    def verticesOnSegment(self, array_graph, point1, point2, vertex_ids):
+        """Returns the ids of the given vertices lying inside the segment point1 - point2, ordered from point1 to point2"""
+        dx, dy = point2.x() - point1.x(), point2.y() - point1.y()
+        length_squared = dx * dx + dy * dy
+        if length_squared == 0:
+            return []
+        max_distance = max(self.tolerance, 1e-9 * max(1.0, abs(point1.x()), abs(point1.y())))
+        on_segment = []
+        for vertex_id in vertex_ids:
+            x, y = float(array_graph.vertex_x[vertex_id]), float(array_graph.vertex_y[vertex_id])
+            position = ((x - point1.x()) * dx + (y - point1.y()) * dy) / length_squared
+            if position <= 0.0 or position >= 1.0:
+                continue
+            if abs((x - point1.x()) * dy - (y - point1.y()) * dx) / length_squared ** 0.5 <= max_distance:
+                on_segment.append((position, vertex_id))
+        return [vertex_id for position, vertex_id in sorted(on_segment)]
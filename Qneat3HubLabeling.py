@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3HubLabeling.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from heapq import heappush, heappop
+from numpy import arange, argsort, asarray, cumsum, float64, full, inf, int32, int64, minimum, repeat, zeros
+
+from QNEAT3.Qneat3Cache import graphFingerprint
+from QNEAT3.Qneat3Progress import Qneat3Progress
+from QNEAT3.Qneat3RawArrays import mapRawArrays, readRawHeader, writeRawArrays
+
+
+class Qneat3HubLabelIndex():
+    """
+    Qneat3HubLabelIndex:
+    Hub labeling (pruned landmark labeling) of a directed Qneat3ArrayGraph. Every vertex stores
+    an out-label (costs to its hubs) and an in-label (costs from its hubs), sorted by hub rank.
+    The network cost between two vertices is the minimum over their common hubs, so no graph
+    search is needed at query time. The index is stored as raw arrays and memory-mapped on load,
+    together with the fingerprint of the graph (see graphFingerprint) it was built for.
+    """
+
+    MAGIC = b'QHLI'
+    VERSION = 2
+    HEADER = '<4sIqqqq16s' #magic, version, vertex count, edge count, out-label count, in-label count, graph fingerprint
+
+    def __init__(self, vertex_count, edge_count, fingerprint, out_offsets, out_hubs, out_costs, in_offsets, in_hubs, in_costs):
+        self.vertex_count = vertex_count
+        self.edge_count = edge_count
+        self.fingerprint = fingerprint
+        self.out_offsets = out_offsets
+        self.out_hubs = out_hubs
+        self.out_costs = out_costs
+        self.in_offsets = in_offsets
+        self.in_hubs = in_hubs
+        self.in_costs = in_costs
+
+        self._prepared_targets = (None, None)
+
+    @classmethod
+    def build(cls, array_graph, feedback=None):
+        """Builds the index with one forward and one backward pruned Dijkstra per vertex, in order of decreasing vertex degree"""
+        vertex_count = array_graph.vertex_count
+        vertex_order = argsort(-array_graph.degree(), kind='stable').tolist()
+
+        out_hubs = [[] for i in range(vertex_count)]
+        out_costs = [[] for i in range(vertex_count)]
+        in_hubs = [[] for i in range(vertex_count)]
+        in_costs = [[] for i in range(vertex_count)]
+
+        forward_adjacency = array_graph.getAdjacency(False)
+        backward_adjacency = array_graph.getAdjacency(True)
+        hub_costs = [inf]*vertex_count #label of the current hub, indexed by hub rank
+
+        progress = Qneat3Progress(feedback, vertex_count, "[QNEAT3HubLabelIndex][build] Labeled {{}} of {} vertices...".format(vertex_count), chunk_size=100) if feedback is not None else None
+        for hub_vertex_id, rank in zip(vertex_order, range(vertex_count)):
+            if progress is not None and progress.step():
+                break
+
+            #forward search: cost(hub -> v) gets added to the in-label of v
+            cls.prunedSearch(rank, hub_vertex_id, forward_adjacency, out_hubs[hub_vertex_id], out_costs[hub_vertex_id], in_hubs, in_costs, hub_costs)
+            #backward search: cost(v -> hub) gets added to the out-label of v
+            cls.prunedSearch(rank, hub_vertex_id, backward_adjacency, in_hubs[hub_vertex_id], in_costs[hub_vertex_id], out_hubs, out_costs, hub_costs)
+
+        if progress is not None:
+            progress.finish()
+        out_offsets, out_hubs, out_costs = cls.flattenLabels(out_hubs, out_costs)
+        in_offsets, in_hubs, in_costs = cls.flattenLabels(in_hubs, in_costs)
+        return cls(vertex_count, array_graph.edge_count, graphFingerprint(array_graph), out_offsets, out_hubs, out_costs, in_offsets, in_hubs, in_costs)
+
+    @staticmethod
+    def prunedSearch(rank, hub_vertex_id, adjacency, hub_label_hubs, hub_label_costs, label_hubs, label_costs, hub_costs):
+        offsets, neighbours, costs, edges = adjacency
+
+        for hub, cost in zip(hub_label_hubs, hub_label_costs):
+            hub_costs[hub] = cost
+
+        settled = set()
+        tentative = {hub_vertex_id: 0.0}
+        heap = [(0.0, hub_vertex_id)]
+        while heap:
+            current_cost, vertex_id = heappop(heap)
+            if vertex_id in settled:
+                continue
+            settled.add(vertex_id)
+
+            #prune if the labels of higher ranked hubs already cover this vertex
+            covered_cost = inf
+            for hub, cost in zip(label_hubs[vertex_id], label_costs[vertex_id]):
+                if hub_costs[hub] + cost < covered_cost:
+                    covered_cost = hub_costs[hub] + cost
+            if covered_cost <= current_cost:
+                continue
+
+            label_hubs[vertex_id].append(rank)
+            label_costs[vertex_id].append(current_cost)
+
+            for i in range(offsets[vertex_id], offsets[vertex_id+1]):
+                neighbour_id = neighbours[i]
+                new_cost = current_cost + costs[i]
+                if neighbour_id not in settled and new_cost < tentative.get(neighbour_id, inf):
+                    tentative[neighbour_id] = new_cost
+                    heappush(heap, (new_cost, neighbour_id))
+
+        for hub in hub_label_hubs:
+            hub_costs[hub] = inf
+
+    @staticmethod
+    def flattenLabels(label_hubs, label_costs):
+        offsets = zeros(len(label_hubs)+1, dtype=int64)
+        offsets[1:] = cumsum([len(label) for label in label_hubs])
+        hubs = asarray([hub for label in label_hubs for hub in label], dtype=int32)
+        costs = asarray([cost for label in label_costs for cost in label], dtype=float64)
+        return offsets, hubs, costs
+
+    def calcCost(self, from_vertex_id, to_vertex_id):
+        """Returns the network cost between two vertices (inf if to_vertex_id cannot be reached)"""
+        return self.calcCosts(from_vertex_id, [to_vertex_id])[0]
+
+    def calcCosts(self, from_vertex_id, to_vertex_ids):
+        """
+        Returns the network costs from one vertex to a list of vertices (inf if unreachable).
+        The in-labels of the target list are gathered once and reused as long as the same list object is passed.
+        """
+        if self._prepared_targets[0] is not to_vertex_ids:
+            self._prepared_targets = (to_vertex_ids, self.prepareTargets(to_vertex_ids))
+        label_positions, label_starts, labeled_targets = self._prepared_targets[1]
+
+        #scatter the out-label of the origin into a dense table indexed by hub rank
+        hub_costs = full(self.vertex_count, inf)
+        start, end = self.out_offsets[from_vertex_id], self.out_offsets[from_vertex_id+1]
+        hub_costs[self.out_hubs[start:end]] = self.out_costs[start:end]
+
+        result = full(len(to_vertex_ids), inf)
+        if len(label_starts) > 0:
+            path_costs = hub_costs[self.in_hubs[label_positions]] + self.in_costs[label_positions]
+            result[labeled_targets] = minimum.reduceat(path_costs, label_starts)
+        return result
+
+    def prepareTargets(self, to_vertex_ids):
+        """Returns the positions of the in-label entries of all targets, where each target's entries start and which targets have labels at all"""
+        targets = asarray(to_vertex_ids, dtype=int64)
+        starts = asarray(self.in_offsets[targets], dtype=int64)
+        lengths = asarray(self.in_offsets[targets+1], dtype=int64) - starts
+        labeled_targets = (lengths > 0).nonzero()[0]
+        starts = starts[labeled_targets]
+        lengths = lengths[labeled_targets]
+
+        label_starts = zeros(len(lengths), dtype=int64)
+        label_starts[1:] = cumsum(lengths)[:-1]
+        #ranges [start, start+length) of all targets in one flat index array
+        label_positions = repeat(starts - label_starts, lengths) + arange(lengths.sum(), dtype=int64)
+        return label_positions, label_starts, labeled_targets
+
+    def save(self, path):
+        """Writes header and label arrays to a single file, aligning every array to 8 bytes so it can be memory-mapped"""
+        writeRawArrays(path, self.HEADER, (self.MAGIC, self.VERSION, self.vertex_count, self.edge_count, len(self.out_hubs), len(self.in_hubs), bytes.fromhex(self.fingerprint)),
+                       self.arrayLayout(self.out_offsets, self.out_hubs, self.out_costs, self.in_offsets, self.in_hubs, self.in_costs))
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps a hub label index written by save()"""
+        magic, version, vertex_count, edge_count, out_count, in_count, fingerprint = readRawHeader(path, cls.HEADER)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("{} is not a QNEAT3 hub label index (version {}), delete it to build a new index".format(path, cls.VERSION))
+        arrays = mapRawArrays(path, cls.HEADER, cls.arrayLayout(vertex_count+1, out_count, out_count, vertex_count+1, in_count, in_count))
+        return cls(vertex_count, edge_count, fingerprint.hex(), *arrays)
+
+    @staticmethod
+    def arrayLayout(out_offsets, out_hubs, out_costs, in_offsets, in_hubs, in_costs):
+        return [(out_offsets, int64), (out_hubs, int32), (out_costs, float64), (in_offsets, int64), (in_hubs, int32), (in_costs, float64)]
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Parallel.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import atexit
+import os
+import sys
+import shutil
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from numpy import full, inf, int32, isfinite, ndim
+
+from QNEAT3.Qneat3SharedMemory import Qneat3SharedArrays, attachArrayGraph, shareArrayGraph, sharedMemoryAvailable
+
+#worker pools need ProcessPoolExecutor.shutdown(cancel_futures=True) and multiprocessing.shared_memory (Python 3.9), QGIS
+#builds with an older python run every analysis in the calling process
+PROCESS_POOLS = sys.version_info >= (3, 9)
+
+#graph and analysis point arrays (name -> array) of the current worker process, set once by initWorker
+worker_graph = None
+worker_points = None
+#shared memory blocks the worker process is attached to
+worker_shared_arrays = []
+
+
+def pythonExecutable():
+    """
+    Returns the python interpreter worker processes are started with. Inside QGIS sys.executable is the QGIS
+    application itself, so the interpreter shipped next to it (or the one on the PATH) is searched instead.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+
+    candidates = []
+    for prefix in (sys.exec_prefix, os.path.dirname(sys.executable)):
+        candidates.append(os.path.join(prefix, 'python3.exe' if os.name == 'nt' else 'python3'))
+        candidates.append(os.path.join(prefix, 'python.exe' if os.name == 'nt' else 'python'))
+        candidates.append(os.path.join(prefix, 'bin', 'python3'))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return shutil.which('python3') or shutil.which('python') or sys.executable
+
+
+def workerCount(workers):
+    """Translates a worker parameter (0 = one per CPU core) into a number of processes, always 1 without PROCESS_POOLS"""
+    if not PROCESS_POOLS:
+        return 1
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+class Qneat3ProcessPool(ProcessPoolExecutor):
+    """ProcessPoolExecutor owning the shared memory blocks its workers are attached to, they are unlinked on shutdown"""
+
+    def __init__(self, shared_arrays, **kwargs):
+        self.shared_arrays = shared_arrays
+        try:
+            super().__init__(**kwargs)
+        except Exception:
+            self.unlinkSharedArrays()
+            raise
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+        self.unlinkSharedArrays()
+
+    def unlinkSharedArrays(self):
+        for shared_arrays in self.shared_arrays:
+            shared_arrays.unlink()
+        self.shared_arrays = []
+
+
+def createProcessPool(array_graph, workers, point_arrays=None):
+    """
+    Starts a pool of spawned worker processes holding the Qneat3ArrayGraph and optionally a dictionary of analysis point
+    arrays (name -> array, see workerPointMinimumCosts). A graph mapped from a graph file is sent as its path, all other
+    arrays are exported to shared memory the workers attach to without copying; the shared memory is freed when the pool
+    is shut down. If shared memory is too small every worker gets its own copy instead.
+    """
+    shared_arrays = []
+    graph_argument = array_graph
+    if array_graph.path is None:
+        shared_graph = shareArrayGraph(array_graph)
+        if shared_graph is not None:
+            shared_arrays.append(shared_graph)
+            graph_argument = (shared_graph.descriptor(), array_graph.crs)
+    
+    points_argument = point_arrays
+    if point_arrays and sharedMemoryAvailable(Qneat3SharedArrays.requiredSize(point_arrays.items())):
+        shared_points = Qneat3SharedArrays.create(point_arrays.items())
+        shared_arrays.append(shared_points)
+        points_argument = shared_points.descriptor()
+    
+    context = get_context('spawn')
+    context.set_executable(pythonExecutable())
+    return Qneat3ProcessPool(shared_arrays, max_workers=workerCount(workers), mp_context=context, initializer=initWorker, initargs=(graph_argument, points_argument))
+
+
+def initWorker(array_graph, point_arrays=None):
+    """Sets the graph and point arrays of a worker process, attaching to the shared memory blocks given as (block name, layout) descriptors"""
+    global worker_graph, worker_points
+    if isinstance(array_graph, tuple):
+        descriptor, crs = array_graph
+        array_graph, shared_graph = attachArrayGraph(descriptor, crs)
+        worker_shared_arrays.append(shared_graph)
+    if isinstance(point_arrays, tuple):
+        shared_points = Qneat3SharedArrays.attach(point_arrays)
+        worker_shared_arrays.append(shared_points)
+        point_arrays = shared_points.arrays
+    worker_graph = array_graph
+    worker_points = point_arrays
+    if worker_shared_arrays:
+        atexit.register(releaseWorker)
+
+
+def releaseWorker():
+    """Drops all views on shared memory before detaching, so the blocks can be closed when the worker process exits"""
+    global worker_graph, worker_points
+    worker_graph = None
+    worker_points = None
+    while worker_shared_arrays:
+        worker_shared_arrays.pop().close()
+
+
+def calcBoundedCosts(array_graph, startpoint_id, max_cost, entry_cost=0.0):
+    """Runs a Dijkstra bounded by max_cost (including the entry cost) and returns (vertex ids, costs) of all reached vertices"""
+    tree, cost = array_graph.dijkstra(startpoint_id, max_cost - entry_cost)
+    reached_vertex_ids = isfinite(cost).nonzero()[0].astype(int32)
+    return reached_vertex_ids, cost[reached_vertex_ids] + entry_cost
+
+
+def workerBoundedCosts(task_id, startpoint_id, max_cost, entry_cost=0.0):
+    """calcBoundedCosts on the graph of the worker process. Returns the task id along with the result to match it up again."""
+    return (task_id,) + calcBoundedCosts(worker_graph, startpoint_id, max_cost, entry_cost)
+
+
+def calcMinimumCosts(array_graph, tasks, max_cost):
+    """
+    Runs calcBoundedCosts for a list of (task id, startpoint id, entry cost) tasks and reduces the results into one array of
+    minimum costs per vertex (inf if unreached) and one array with the id of the task reaching each vertex cheapest (-1 if unreached).
+    """
+    costs = full(array_graph.vertex_count, inf)
+    task_ids = full(array_graph.vertex_count, -1, dtype=int32)
+    for task_id, startpoint_id, entry_cost in tasks:
+        reached_vertex_ids, reached_costs = calcBoundedCosts(array_graph, startpoint_id, max_cost, entry_cost)
+        reduceMinimumCosts(costs, task_ids, reached_costs, task_id, reached_vertex_ids)
+    return costs, task_ids
+
+
+def workerMinimumCosts(tasks, max_cost):
+    """calcMinimumCosts on the graph of the worker process"""
+    return calcMinimumCosts(worker_graph, tasks, max_cost)
+
+
+def workerPointMinimumCosts(start, stop, step, max_cost):
+    """calcMinimumCosts for the analysis points start:stop:step of the 'vertex_ids' and 'entry_costs' point arrays of the worker process (task ids are the point indices)"""
+    tasks = zip(range(start, stop, step), worker_points['vertex_ids'][start:stop:step].tolist(), worker_points['entry_costs'][start:stop:step].tolist())
+    return calcMinimumCosts(worker_graph, tasks, max_cost)
+
+
+def calcNetworkCosts(array_graph, startpoint_id, target_vertex_ids):
+    """Returns the network costs from one vertex to a list of vertices (inf if unreachable)"""
+    return array_graph.dijkstra(startpoint_id)[1][target_vertex_ids].tolist()
+
+
+def workerNetworkCosts(task_id, startpoint_id, target_vertex_ids):
+    """calcNetworkCosts on the graph of the worker process"""
+    return task_id, calcNetworkCosts(worker_graph, startpoint_id, target_vertex_ids)
+
+
+def calcShortestPath(array_graph, from_vertex_id, to_vertex_id):
+    """Returns (network cost, vertex ids of the path) of the shortest path between two vertices (inf and an empty path if unreachable)"""
+    tree, cost = array_graph.dijkstra(from_vertex_id, target_id=to_vertex_id)
+    return float(cost[to_vertex_id]), array_graph.shortestPath(tree, cost, to_vertex_id)
+
+
+def workerShortestPath(task_id, from_vertex_id, to_vertex_id):
+    """calcShortestPath on the graph of the worker process"""
+    return (task_id,) + calcShortestPath(worker_graph, from_vertex_id, to_vertex_id)
+
+
+def reduceMinimumCosts(costs, task_ids, partial_costs, partial_task_ids, vertex_ids=None):
+    """Merges partial minimum costs (of all vertices or of the given vertex ids) into costs and task_ids in place"""
+    if vertex_ids is None:
+        better = (partial_costs < costs).nonzero()[0]
+        costs[better] = partial_costs[better]
+        task_ids[better] = partial_task_ids[better] if ndim(partial_task_ids) else partial_task_ids
+    else:
+        better = partial_costs < costs[vertex_ids]
+        costs[vertex_ids[better]] = partial_costs[better]
+        task_ids[vertex_ids[better]] = partial_task_ids[better] if ndim(partial_task_ids) else partial_task_ids
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Profiling.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import json
+import platform
+import sys
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from importlib.util import find_spec
+from time import perf_counter, process_time
+
+try:
+    import resource
+except ImportError:
+    #not available on windows, psutil is used there if it is installed
+    resource = None
+
+
+def peakMemory():
+    """Returns the peak resident memory of the current process in bytes (None if it can not be determined on this platform)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024 #bytes on macOS, kilobytes elsewhere
+    if find_spec('psutil') is not None:
+        import psutil
+        memory_info = psutil.Process().memory_info()
+        return getattr(memory_info, 'peak_wset', memory_info.rss)
+    return None
+
+
+class Qneat3Profiler():
+    """
+    Qneat3Profiler:
+    Records wall time, CPU time and peak memory per named phase of an algorithm run (feature read, graph build,
+    dijkstra, interpolation, ...). A phase can be entered many times, its calls are summed up. Phases may be nested:
+    the time of an inner phase is only accounted to the inner phase, so the phases of a run add up to its total time.
+    CPU time only covers the current process, worker processes are not included.
+    """
+
+    def __init__(self, name=''):
+        self.name = name
+        self.phases = OrderedDict() #phase name -> [calls, wall time, cpu time, peak memory, peak memory growth]
+        self.stack = [] #[phase name, start wall time, start cpu time, start peak memory, wall time of inner phases, cpu time of inner phases]
+        self.start_time = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.start_wall = perf_counter()
+        self.start_cpu = process_time()
+        self.start_memory = peakMemory()
+
+    def start(self, name):
+        """Enters a phase. Entering the phase that is already running (eg. a profiled method calling itself) is not recorded twice."""
+        running = next((entry for entry in reversed(self.stack) if entry is not None), None)
+        if running is not None and running[0] == name:
+            self.stack.append(None)
+            return
+        self.stack.append([name, perf_counter(), process_time(), peakMemory(), 0.0, 0.0])
+
+    def stop(self):
+        """Leaves the current phase"""
+        entry = self.stack.pop()
+        if entry is None:
+            return
+        name, start_wall, start_cpu, start_memory, inner_wall, inner_cpu = entry
+        wall = perf_counter() - start_wall
+        cpu = process_time() - start_cpu
+        memory = peakMemory()
+
+        #inner phases are accounted to the next recorded phase of the stack
+        for parent in reversed(self.stack):
+            if parent is not None:
+                parent[4] = parent[4] + wall
+                parent[5] = parent[5] + cpu
+                break
+
+        phase = self.phases.setdefault(name, [0, 0.0, 0.0, None, None])
+        phase[0] = phase[0] + 1
+        phase[1] = phase[1] + wall - inner_wall
+        phase[2] = phase[2] + cpu - inner_cpu
+        if memory is not None:
+            phase[3] = memory if phase[3] is None else max(phase[3], memory)
+            phase[4] = max(phase[4] or 0, memory - start_memory)
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def report(self):
+        """Returns the performance report as dictionary (times in seconds, memory in megabytes)"""
+        total_wall = perf_counter() - self.start_wall
+        total_cpu = process_time() - self.start_cpu
+        peak_memory = peakMemory()
+
+        phases = []
+        for name, (calls, wall, cpu, memory, memory_growth) in self.phases.items():
+            phases.append(OrderedDict([('name', name),
+                                       ('calls', calls),
+                                       ('wall_time', wall),
+                                       ('cpu_time', cpu),
+                                       ('wall_time_share', wall / total_wall if total_wall > 0 else 0.0),
+                                       ('peak_memory_mb', toMegabytes(memory)),
+                                       ('peak_memory_growth_mb', toMegabytes(memory_growth))]))
+
+        report = OrderedDict()
+        report['algorithm'] = self.name
+        report['start_time'] = self.start_time
+        report['python_version'] = platform.python_version()
+        report['platform'] = platform.platform()
+        report['wall_time'] = total_wall
+        report['cpu_time'] = total_cpu
+        report['unaccounted_wall_time'] = total_wall - sum(phase['wall_time'] for phase in phases)
+        report['peak_memory_mb'] = toMegabytes(peak_memory)
+        report['phases'] = phases
+        return report
+
+    def writeReport(self, path, report=None):
+        with open(path, 'w') as report_file:
+            json.dump(report if report is not None else self.report(), report_file, indent=2)
+
+    def finish(self, feedback, report_path=None):
+        """Pushes a summary of all phases to the log and writes the JSON report to report_path (if given)"""
+        report = self.report()
+        for phase in report['phases']:
+            feedback.pushInfo("[QNEAT3Profiler] {}: {:.3f} s wall, {:.3f} s CPU, {} call(s)".format(phase['name'], phase['wall_time'], phase['cpu_time'], phase['calls']))
+        feedback.pushInfo("[QNEAT3Profiler] Total: {:.3f} s wall, {:.3f} s CPU, peak memory {} MB".format(report['wall_time'], report['cpu_time'], report['peak_memory_mb']))
+        if report_path:
+            self.writeReport(report_path, report)
+            feedback.pushInfo("[QNEAT3Profiler] Performance report written to {}".format(report_path))
+        return report
+
+
+def toMegabytes(value):
+    return None if value is None else round(value / (1024.0 * 1024.0), 1)
+
+
+def profiledPhase(name):
+    """Decorator recording a method of an object with a profiler attribute (eg. Qneat3Network) as phase name"""
+    def decorator(method):
+        @wraps(method)
+        def profiledMethod(self, *args, **kwargs):
+            self.profiler.start(name)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.profiler.stop()
+        return profiledMethod
+    return decorator
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Progress.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from time import monotonic
+
+
+class Qneat3Progress():
+    """
+    Qneat3Progress:
+    Throttled progress reporting for hot loops. Every feedback call crosses into the Qt GUI, so progress is only
+    forwarded every interval seconds, info messages are collected and pushed together with it, and cancellation is
+    only checked once per chunk of steps. Loops call step() per iteration and stop as soon as it returns True.
+    """
+
+    def __init__(self, feedback, total, message=None, start=0.0, end=100.0, interval=0.5, chunk_size=1000):
+        """
+        Constructor for a Qneat3Progress object.
+        @type feedback: QgsProcessingFeedback
+        @param feedback: feedback object of the running algorithm
+        @type total: int
+        @param total: expected number of steps
+        @type message: str
+        @param message: optional status message, formatted with the number of steps done on every update
+        @type start, end: float
+        @param start, end: progress range (in percent) covered by the steps
+        """
+        self.feedback = feedback
+        self.total = max(total, 1)
+        self.message = message
+        self.start = start
+        self.end = end
+        self.interval = interval
+        self.chunk_size = chunk_size
+
+        self.done = 0
+        self.next_check = chunk_size
+        self.last_update = monotonic()
+        self.messages = []
+        self.canceled = feedback.isCanceled()
+
+    def step(self, count=1):
+        """Adds count steps. Returns True if the algorithm got canceled (checked at chunk boundaries only)."""
+        self.done = self.done + count
+        if self.done >= self.next_check:
+            self.next_check = self.done + self.chunk_size
+            self.canceled = self.feedback.isCanceled()
+            if monotonic() - self.last_update >= self.interval:
+                self.update()
+        return self.canceled
+
+    def isCanceled(self):
+        """Checks cancellation immediately, eg. at the boundary of an outer loop"""
+        self.canceled = self.canceled or self.feedback.isCanceled()
+        return self.canceled
+
+    def pushInfo(self, message):
+        """Collects an info message, it is pushed together with the next progress update"""
+        self.messages.append(message)
+        if monotonic() - self.last_update >= self.interval:
+            self.update()
+
+    def update(self):
+        if self.message is not None:
+            self.messages.append(self.message.format(self.done))
+        if self.messages:
+            self.feedback.pushInfo("\n".join(self.messages))
+            self.messages = []
+        self.feedback.setProgress(self.start + (self.end - self.start) * min(self.done / self.total, 1.0))
+        self.last_update = monotonic()
+
+    def finish(self):
+        """Pushes outstanding messages and the final progress"""
+        self.update()
+        return self.isCanceled()
@@ -27,12 +27,6 @@ import os
 from qgis.core import QgsProcessingProvider
 from qgis.PyQt.QtGui import QIcon
 
-from importlib import util
-matplotlib_specification = util.find_spec("matplotlib", "pyplot")
-matplotlib_found = matplotlib_specification is not None #evaluates to true if matplotlib.pyplot can be importet
-
-
-#import all algorithms that work with basic qgis modules
 from .algs import ( 
     ShortestPathBetweenPoints,
     IsoAreaAsPointcloudFromPoint,
@@ -40,6 +34,11 @@ from .algs import (
     IsoAreaAsInterpolationFromPoint,
     IsoAreaAsInterpolationFromLayer,
     #IsoAreaAsQneatInterpolationFromPoint,
+    IsoAreaAsContoursFromPoint,
+    IsoAreaAsContoursFromLayer,
+    IsoAreaAsPolygonsFromPoint,
+    IsoAreaAsPolygonsFromLayer,
+    IsoAreaAsPolygonsPerOriginFromLayer,
     OdMatrixFromPointsAsCsv, 
     OdMatrixFromPointsAsLines, 
     OdMatrixFromPointsAsTable, 
@@ -47,27 +46,11 @@ from .algs import (
     OdMatrixFromLayersAsLines
     )
 
-#import all algorithms that require manually installed modules
-if matplotlib_found:
-    from .algs import (
-        IsoAreaAsContoursFromPoint,
-        IsoAreaAsContoursFromLayer,
-        IsoAreaAsPolygonsFromPoint,
-        IsoAreaAsPolygonsFromLayer
-        )
-else: #import dummy if manually installed modules are missing
-    from .algs import (
-        DummyAlgorithm 
-        )
-
 pluginPath = os.path.split(os.path.dirname(__file__))[0]
 
 class Qneat3Provider(QgsProcessingProvider):
     def __init__(self):
         super().__init__()
-        self.matplotlib_specification = util.find_spec("matplotlib", "pyplot")
-        self.matplotlib_found = self.matplotlib_specification is not None #evaluates to true if matplotlib.pyplot can be importet
-
 
     def id(self, *args, **kwargs):
         return 'qneat3'
@@ -87,17 +70,14 @@ class Qneat3Provider(QgsProcessingProvider):
         self.addAlgorithm(IsoAreaAsPointcloudFromLayer.IsoAreaAsPointcloudFromLayer())
         self.addAlgorithm(IsoAreaAsInterpolationFromPoint.IsoAreaAsInterpolationFromPoint())
         self.addAlgorithm(IsoAreaAsInterpolationFromLayer.IsoAreaAsInterpolationFromLayer())
+        self.addAlgorithm(IsoAreaAsContoursFromPoint.IsoAreaAsContoursFromPoint())
+        self.addAlgorithm(IsoAreaAsContoursFromLayer.IsoAreaAsContoursFromLayer())
+        self.addAlgorithm(IsoAreaAsPolygonsFromPoint.IsoAreaAsPolygonsFromPoint())
+        self.addAlgorithm(IsoAreaAsPolygonsFromLayer.IsoAreaAsPolygonsFromLayer())
+        self.addAlgorithm(IsoAreaAsPolygonsPerOriginFromLayer.IsoAreaAsPolygonsPerOriginFromLayer())
         #self.addAlgorithm(IsoAreaAsQneatInterpolationFromPoint.IsoAreaAsQneatInterpolationFromPoint())
         self.addAlgorithm(OdMatrixFromPointsAsCsv.OdMatrixFromPointsAsCsv())
         self.addAlgorithm(OdMatrixFromPointsAsLines.OdMatrixFromPointsAsLines())
         self.addAlgorithm(OdMatrixFromPointsAsTable.OdMatrixFromPointsAsTable())
         self.addAlgorithm(OdMatrixFromLayersAsTable.OdMatrixFromLayersAsTable())
         self.addAlgorithm(OdMatrixFromLayersAsLines.OdMatrixFromLayersAsLines())
-        
-        if self.matplotlib_found:
-            self.addAlgorithm(IsoAreaAsContoursFromPoint.IsoAreaAsContoursFromPoint())
-            self.addAlgorithm(IsoAreaAsPolygonsFromPoint.IsoAreaAsPolygonsFromPoint())
-            self.addAlgorithm(IsoAreaAsPolygonsFromLayer.IsoAreaAsPolygonsFromLayer())
-            self.addAlgorithm(IsoAreaAsContoursFromLayer.IsoAreaAsContoursFromLayer())
-        else:
-            self.addAlgorithm(DummyAlgorithm.DummyAlgorithm())
\ No newline at end of file
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Raster.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import osgeo.gdal as gdal
+
+from numpy import arange, cumsum, floor, int64, repeat, zeros
+from osgeo import osr
+
+
+class Qneat3RasterWriter():
+    """
+    Qneat3RasterWriter:
+    Writes a single band GeoTIFF window by window, so that interpolation rasters never have to be held in memory
+    as a whole. The file is internally tiled with the same tile size that is used to iterate over it. The output
+    profile selects data type, compression, overviews and Cloud Optimized GeoTIFF layout. Destinations with the
+    extension of another GDAL format are written as a GeoTIFF first and converted on close, only the data type of
+    the profile applies to them.
+    """
+
+    TILE_SIZE = 512 #must be a multiple of 16 (GeoTIFF block size)
+
+    #data type, compression, build overviews, COG layout (indexed like PROFILE_NAMES)
+    PROFILES = [(gdal.GDT_Float64, 'DEFLATE', False, False),
+                (gdal.GDT_Float32, 'DEFLATE', True, False),
+                (gdal.GDT_Float32, 'ZSTD', True, False),
+                (gdal.GDT_Float32, 'DEFLATE', True, True)]
+    PROFILE_NAMES = ['GeoTIFF, Float64, DEFLATE compressed with predictor',
+                     'GeoTIFF, Float32, DEFLATE compressed with predictor, overviews',
+                     'GeoTIFF, Float32, ZSTD compressed with predictor, overviews',
+                     'Cloud Optimized GeoTIFF (COG), Float32, DEFLATE compressed with predictor']
+
+    def __init__(self, path, cols, rows, geotransform, crs_wkt, nodata_value, profile=0, tile_size=TILE_SIZE):
+        self.path = path
+        self.cols = cols
+        self.rows = rows
+        self.tile_size = tile_size
+        self.driver_name = self.driverName(path)
+        self.data_type, compression, self.build_overviews, self.cog = self.PROFILES[profile]
+        self.compression = compression if self.isCompressionAvailable(compression) else 'DEFLATE'
+        if self.driver_name != 'GTiff':
+            self.build_overviews, self.cog = False, False
+
+        #a COG or another format can not be written window by window: write a tiled GeoTIFF next to the target first and convert it on close
+        self.converted = self.cog or self.driver_name != 'GTiff'
+        self.dataset_path = path + '.tmp.tif' if self.converted else path
+        options = ['TILED=YES', 'BLOCKXSIZE={}'.format(tile_size), 'BLOCKYSIZE={}'.format(tile_size), 'COMPRESS={}'.format(self.compression), 'PREDICTOR=3', 'SPARSE_OK=TRUE', 'BIGTIFF=IF_SAFER']
+        self.dataset = gdal.GetDriverByName('GTiff').Create(self.dataset_path, cols, rows, 1, self.data_type, options)
+        self.dataset.SetGeoTransform(geotransform)
+
+        srs = osr.SpatialReference()
+        srs.ImportFromWkt(crs_wkt)
+        self.dataset.SetProjection(srs.ExportToWkt())
+
+        self.band = self.dataset.GetRasterBand(1)
+        self.band.SetNoDataValue(nodata_value)
+
+    @staticmethod
+    def driverName(path):
+        """Returns the short name of the GDAL raster driver writing files with the extension of path"""
+        extension = os.path.splitext(path)[1][1:].lower()
+        if extension in ('', 'tif', 'tiff'):
+            return 'GTiff'
+        for i in range(gdal.GetDriverCount()):
+            driver = gdal.GetDriver(i)
+            metadata = driver.GetMetadata() or {}
+            writable = metadata.get(gdal.DCAP_CREATE) == 'YES' or metadata.get(gdal.DCAP_CREATECOPY) == 'YES'
+            if metadata.get(gdal.DCAP_RASTER) == 'YES' and writable and extension in metadata.get(gdal.DMD_EXTENSIONS, '').lower().split():
+                return driver.ShortName
+        raise ValueError('No GDAL driver writes rasters with the extension .{}'.format(extension))
+
+    @staticmethod
+    def isCompressionAvailable(compression):
+        """ZSTD is an optional part of the GDAL build, DEFLATE is always available"""
+        creation_options = gdal.GetDriverByName('GTiff').GetMetadataItem('DMD_CREATIONOPTIONLIST') or ''
+        return compression in creation_options
+
+    def tiles(self, tile_mask=None):
+        """Yields the windows (xoff, yoff, xsize, ysize) covering the raster, skipping the tiles switched off in tile_mask"""
+        return rasterTiles(self.rows, self.cols, self.tile_size, tile_mask)
+
+    def tileCount(self, tile_mask=None):
+        return int(tile_mask.sum()) if tile_mask is not None else len(range(0, self.rows, self.tile_size)) * len(range(0, self.cols, self.tile_size))
+
+    def writeTile(self, values, xoff, yoff):
+        self.band.WriteArray(values, xoff, yoff)
+
+    def close(self):
+        self.band.FlushCache()
+        self.band = None
+
+        if self.converted:
+            if self.cog:
+                #the COG driver builds the overviews itself and reorders the file for range requests
+                gdal.GetDriverByName('COG').CreateCopy(self.path, self.dataset, options=['COMPRESS={}'.format(self.compression), 'PREDICTOR=YES', 'BLOCKSIZE={}'.format(self.tile_size), 'OVERVIEW_RESAMPLING=AVERAGE', 'BIGTIFF=IF_SAFER'])
+            else:
+                gdal.GetDriverByName(self.driver_name).CreateCopy(self.path, self.dataset)
+            self.dataset = None
+            os.remove(self.dataset_path)
+            return
+
+        if self.build_overviews:
+            self.dataset.BuildOverviews('AVERAGE', self.overviewLevels())
+        self.dataset = None
+
+    def overviewLevels(self):
+        """Returns the decimation factors halving the raster until it fits into a single tile"""
+        levels = []
+        factor = 2
+        while max(self.cols, self.rows) / factor >= self.tile_size / 2:
+            levels.append(factor)
+            factor = factor * 2
+        return levels
+
+
+def rasterTiles(rows, cols, tile_size, tile_mask=None):
+    """Yields the windows (xoff, yoff, xsize, ysize) of a raster, row of tiles by row of tiles. tile_mask is a boolean (tile rows, tile columns) array."""
+    for tile_row, yoff in enumerate(range(0, rows, tile_size)):
+        for tile_col, xoff in enumerate(range(0, cols, tile_size)):
+            if tile_mask is None or tile_mask[tile_row, tile_col]:
+                yield xoff, yoff, min(tile_size, cols - xoff), min(tile_size, rows - yoff)
+
+
+def sparseTileMap(geotransform, rows, cols, tile_size, box_xmin, box_xmax, box_ymin, box_ymax):
+    """
+    Returns a boolean (tile rows, tile columns) array marking the tiles of a north-up raster that overlap
+    at least one of the given bounding boxes (arrays of box coordinates).
+    """
+    tile_rows = len(range(0, rows, tile_size))
+    tile_cols = len(range(0, cols, tile_size))
+    tile_width = tile_size * geotransform[1]
+    tile_height = -tile_size * geotransform[5]
+
+    col_min = floor((box_xmin - geotransform[0]) / tile_width).clip(0, tile_cols - 1).astype(int64)
+    col_max = floor((box_xmax - geotransform[0]) / tile_width).clip(0, tile_cols - 1).astype(int64)
+    row_min = floor((geotransform[3] - box_ymax) / tile_height).clip(0, tile_rows - 1).astype(int64)
+    row_max = floor((geotransform[3] - box_ymin) / tile_height).clip(0, tile_rows - 1).astype(int64)
+
+    #expand the tile ranges of all boxes into flat tile indices
+    widths = col_max - col_min + 1
+    counts = widths * (row_max - row_min + 1)
+    box_ids = repeat(arange(len(counts)), counts)
+    local_ids = arange(counts.sum(), dtype=int64) - repeat(cumsum(counts) - counts, counts)
+
+    tile_mask = zeros((tile_rows, tile_cols), dtype=bool)
+    tile_mask[row_min[box_ids] + local_ids // widths[box_ids], col_min[box_ids] + local_ids % widths[box_ids]] = True
+    return tile_mask
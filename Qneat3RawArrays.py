@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3RawArrays.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Raw array files: a struct header followed by numpy arrays, each aligned to 8 bytes, so that every array
+can be memory-mapped in place. Used by the hub label index and the array graph files.
+"""
+
+import os
+import struct
+
+from numpy import asarray, dtype, memmap, zeros
+
+
+def writeRawArrays(path, header_format, header_values, layout):
+    """Writes the header packed with header_format and the (array, array type) pairs of layout to path"""
+    #written to a temporary file first, so processes mapping the old file never see a partial one
+    temporary_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temporary_path, 'wb') as raw_file:
+        raw_file.write(struct.pack(header_format, *header_values))
+        raw_file.write(b'\0' * (-struct.calcsize(header_format) % 8))
+        for array, array_type in layout:
+            data = asarray(array, dtype=array_type).tobytes()
+            raw_file.write(data)
+            raw_file.write(b'\0' * (-len(data) % 8))
+    os.replace(temporary_path, path)
+
+
+def readRawHeader(path, header_format):
+    """Returns the unpacked header of a raw array file"""
+    header_size = struct.calcsize(header_format)
+    with open(path, 'rb') as raw_file:
+        header = raw_file.read(header_size)
+    if len(header) < header_size:
+        raise ValueError("{} is too short for a QNEAT3 array file".format(path))
+    return struct.unpack(header_format, header)
+
+
+def mapRawArrays(path, header_format, layout, mode='r'):
+    """Memory-maps the arrays of a raw array file, layout lists the (length, array type) pairs in file order"""
+    arrays = []
+    offset = struct.calcsize(header_format)
+    offset = offset + (-offset % 8)
+    for length, array_type in layout:
+        arrays.append(memmap(path, dtype=array_type, mode=mode, offset=offset, shape=(length,)) if length > 0 else zeros(0, dtype=array_type))
+        nbytes = length * dtype(array_type).itemsize
+        offset = offset + nbytes + (-nbytes % 8)
+    if os.path.getsize(path) < offset:
+        raise ValueError("{} is truncated".format(path))
+    return arrays
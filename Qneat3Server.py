@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Server.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from math import ceil
+from numpy import arange, asarray, full, inf, int32, isfinite
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+from QNEAT3.Qneat3ArrayGraph import Qneat3ArrayGraph
+from QNEAT3.Qneat3Cache import graphFingerprint
+from QNEAT3.Qneat3Contouring import contourAreas
+from QNEAT3.Qneat3Parallel import calcBoundedCosts, calcNetworkCosts, calcShortestPath, createProcessPool, reduceMinimumCosts, workerBoundedCosts, workerCount, workerNetworkCosts, workerShortestPath
+from QNEAT3.Qneat3Triangulation import delaunayTriangles, interpolateTriangles
+
+
+class Qneat3RoutingService():
+    """
+    Qneat3RoutingService:
+    Answers shortest path, OD matrix and iso-area queries on a resident Qneat3ArrayGraph. Query points are snapped to
+    their nearest vertex, the planar distance to it is added as entry cost (like entry cost calculation method 1 of
+    the algorithms). If workers is not 1 (0 = one per CPU core) the Dijkstra searches run in a pool of worker processes,
+    so concurrent queries do not compete for the interpreter lock of the server process.
+    The service does not use QGIS; only fromNetworkConfig needs it to build the graph from a network layer (not to map a graph file)
+    and updateNetwork to read edited features of the network layer.
+    """
+
+    MAX_RASTER_CELLS = 25000000
+
+    def __init__(self, array_graph, strategy=0, default_speed=5.0, workers=1, crs=None):
+        """
+        Constructor for a Qneat3RoutingService object.
+        @type array_graph: Qneat3ArrayGraph
+        @param array_graph: graph holding the costs of the analysis strategy
+        @type strategy: int
+        @param strategy: 0 for distance, 1 for time (entry costs are converted with default_speed in km/h)
+        @type crs: str
+        @param crs: authority id of the graph coordinate system, written to the GeoJSON responses
+        """
+        self.graph = array_graph
+        self.strategy = strategy
+        self.default_speed = default_speed
+        self.workers = workers
+        self.crs = crs
+        self.pool = createProcessPool(array_graph, workers) if workerCount(workers) != 1 else None
+        self.result_cache = None
+        self.graph_fingerprint = None
+        self.network = None #"network" settings and their resolved paths, set by fromNetworkConfig
+        self.network_path = None
+        self.graph_path = None
+        self.update_lock = threading.Lock()
+
+    @classmethod
+    def fromNetworkConfig(cls, path, feedback=None, workers=1):
+        """
+        Builds the graph from the "network" settings of a JSON file in the batch job format (see Qneat3BatchRunner) and keeps
+        the Qneat3Network resident. Requires QGIS (started headless beforehand, see Qneat3BatchRunner.startQgis).
+        If the network has a "graph_file" that exists, the graph is memory-mapped from it instead (no QGIS needed, worker
+        processes map the same file); otherwise the built graph is written to it. Delete the graph file after changing
+        the settings of the network, edits of the network layer can be applied with updateNetwork.
+        """
+        from QNEAT3.Qneat3Exceptions import Qneat3JobException
+
+        with open(path) as config_file:
+            network = json.load(config_file).get('network')
+        if not isinstance(network, dict) or not (network.get('path') or network.get('graph_file')):
+            raise Qneat3JobException('{} has no "network" with a "path" or "graph_file"'.format(path))
+        def resolvePath(network_path):
+            return network_path if os.path.isabs(network_path) else os.path.join(os.path.dirname(os.path.abspath(path)), network_path)
+        graph_path = resolvePath(network['graph_file']) if network.get('graph_file') else None
+
+        if graph_path and os.path.isfile(graph_path):
+            array_graph = Qneat3ArrayGraph.load(graph_path)
+            service = cls(array_graph, int(network.get('strategy', 0)), float(network.get('default_speed', 5.0)), workers, array_graph.crs)
+            service.setNetworkSettings(network, resolvePath(network['path']) if network.get('path') else None, graph_path)
+            return service
+        if not network.get('path'):
+            raise Qneat3JobException('the graph file {} does not exist and the network has no "path" to build it from'.format(network['graph_file']))
+
+        from qgis.core import QgsVectorLayer
+        from QNEAT3.Qneat3BatchRunner import Qneat3ConsoleFeedback, createNetwork
+
+        feedback = feedback if feedback is not None else Qneat3ConsoleFeedback()
+        network_layer = QgsVectorLayer(resolvePath(network['path']), 'network', 'ogr')
+        if not network_layer.isValid():
+            raise Qneat3JobException('the network {} can not be read'.format(network['path']))
+
+        #updateNetwork needs the feature ids of the edges
+        net = createNetwork(network, network_layer, [], feedback, edge_features=True)
+        array_graph = net.getArrayGraph()
+        array_graph.crs = net.AnalysisCrs.authid()
+        if graph_path:
+            array_graph.save(graph_path)
+            #map the file right away, so the worker processes share it
+            array_graph = Qneat3ArrayGraph.load(graph_path)
+        service = cls(array_graph, net.strategy_int, net.default_speed, workers, array_graph.crs)
+        service.setNetworkSettings(network, resolvePath(network['path']), graph_path)
+        service.net = net
+        return service
+
+    def setNetworkSettings(self, network, network_path, graph_path=None):
+        self.network = network
+        self.network_path = network_path
+        self.graph_path = graph_path
+
+    def updateNetwork(self, changed_ids=(), added_ids=(), deleted_ids=(), swap=None):
+        """
+        Applies edits of the network layer (ids of changed, added and deleted features) to the graph with a Qneat3GraphUpdater
+        (requires QGIS) instead of building it again. The patched graph gets its own worker processes and replaces the old
+        one, which answers queries until then; only the cached results of the old graph are dropped. If the network has a
+        graph file it is rewritten. swap (optional) is a context manager held while the graphs are swapped, eg. to wait for
+        running queries. Returns the summary of the update.
+        """
+        from qgis.core import QgsVectorLayer
+        from QNEAT3.Qneat3GraphUpdate import Qneat3GraphUpdater
+
+        if not self.network_path:
+            raise ValueError('the network has no "path" to read the edited features from')
+        with self.update_lock:
+            network_layer = QgsVectorLayer(self.network_path, 'network', 'ogr')
+            if not network_layer.isValid():
+                raise ValueError('the network {} can not be read'.format(self.network_path))
+            array_graph, summary = Qneat3GraphUpdater.fromNetworkSettings(self.network, network_layer).update(self.graph, changed_ids, added_ids, deleted_ids)
+            self.replaceGraph(array_graph, swap)
+        return summary
+
+    def replaceGraph(self, array_graph, swap=None):
+        """
+        Replaces the graph with array_graph (written to the graph file if there is one), which gets its own worker processes.
+        The old graph answers queries until the swap, its cached results are dropped afterwards. swap: see updateNetwork.
+        """
+        if self.graph_path:
+            #replaces the file atomically, processes mapping the old file keep their copy
+            array_graph.save(self.graph_path)
+            array_graph = Qneat3ArrayGraph.load(self.graph_path)
+        pool = createProcessPool(array_graph, self.workers) if workerCount(self.workers) != 1 else None
+
+        with swap if swap is not None else threading.Lock(): #an unshared lock never blocks
+            old_pool, old_fingerprint = self.pool, self.graph_fingerprint
+            self.graph, self.pool = array_graph, pool
+            if self.result_cache is not None:
+                self.graph_fingerprint = graphFingerprint(array_graph)
+        if self.result_cache is not None:
+            self.result_cache.invalidate(old_fingerprint)
+        if old_pool is not None:
+            old_pool.shutdown(wait=True)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+
+    def setupResultCache(self, result_cache):
+        """Caches shortest paths and iso-areas by snapped vertex ids and query parameters in a Qneat3ResultCache"""
+        self.graph_fingerprint = graphFingerprint(self.graph)
+        self.result_cache = result_cache
+
+    def cachedResult(self, kind, query_key, calculate):
+        if self.result_cache is None:
+            return calculate()
+        key = (self.graph_fingerprint, kind) + query_key
+        result = self.result_cache.get(key)
+        if result is None:
+            result = self.result_cache.put(key, calculate())
+        return result
+
+    def snap(self, point):
+        """Returns (vertex id, entry cost) of a query point given as [x, y]"""
+        x, y = (float(coordinate) for coordinate in point)
+        vertex_id, distance = self.graph.nearestVertexId(x, y)
+        return vertex_id, distance if self.strategy == 0 else distance / (self.default_speed * (1000.0 / 3600.0))
+
+    def map(self, local_function, worker_function, tasks):
+        """Runs local_function(graph, *task) for every task, in the worker processes if there are any. Returns the results in task order."""
+        if self.pool is None:
+            return [local_function(self.graph, *task) for task in tasks]
+        results = [None]*len(tasks)
+        for future in [self.pool.submit(worker_function, task_id, *task) for task_id, task in enumerate(tasks)]:
+            result = future.result()
+            results[result[0]] = result[1] if len(result) == 2 else result[1:]
+        return results
+
+    def geoJson(self, geojson):
+        if self.crs:
+            geojson['crs'] = {'type': 'name', 'properties': {'name': self.crs}}
+        return geojson
+
+    def route(self, from_point, to_point):
+        """Returns the shortest path between two points as GeoJSON LineString feature (without geometry if unreachable)"""
+        from_vertex_id, entry_cost = self.snap(from_point)
+        to_vertex_id, exit_cost = self.snap(to_point)
+        network_cost, path = self.cachedResult('shortest path', (from_vertex_id, to_vertex_id), lambda: self.map(calcShortestPath, workerShortestPath, [(from_vertex_id, to_vertex_id)])[0])
+
+        reachable = isfinite(network_cost)
+        properties = {'origin_vertex_id': from_vertex_id,
+                      'destination_vertex_id': to_vertex_id,
+                      'entry_cost': entry_cost,
+                      'network_cost': network_cost if reachable else None,
+                      'exit_cost': exit_cost,
+                      'total_cost': entry_cost + network_cost + exit_cost if reachable else None}
+        geometry = None
+        if reachable:
+            coordinates = [[float(from_point[0]), float(from_point[1])]]
+            coordinates.extend([self.graph.vertex_x[vertex_id], self.graph.vertex_y[vertex_id]] for vertex_id in path)
+            coordinates.append([float(to_point[0]), float(to_point[1])])
+            geometry = {'type': 'LineString', 'coordinates': asarray(coordinates).tolist()}
+        return self.geoJson({'type': 'Feature', 'geometry': geometry, 'properties': properties})
+
+    def odMatrix(self, from_points, to_points=None):
+        """Returns the total costs (entry cost + network cost + exit cost, None if unreachable) between all origins and destinations"""
+        to_points = to_points if to_points is not None else from_points
+        origins = [self.snap(point) for point in from_points]
+        destinations = [self.snap(point) for point in to_points]
+        destination_vertex_ids = [vertex_id for vertex_id, exit_cost in destinations]
+
+        rows = self.map(calcNetworkCosts, workerNetworkCosts, [(vertex_id, destination_vertex_ids) for vertex_id, entry_cost in origins])
+        costs = []
+        for (origin_vertex_id, entry_cost), network_costs in zip(origins, rows):
+            costs.append([entry_cost + network_cost + exit_cost if isfinite(network_cost) else None for network_cost, (vertex_id, exit_cost) in zip(network_costs, destinations)])
+        return {'origin_vertex_ids': [vertex_id for vertex_id, entry_cost in origins],
+                'destination_vertex_ids': destination_vertex_ids,
+                'costs': costs}
+
+    def isoCosts(self, starts, max_cost):
+        """Returns arrays of the minimum total costs per vertex (inf beyond max_cost) and of the index of the start reaching it. starts are (vertex id, entry cost) of the snapped points."""
+        vertex_costs = full(self.graph.vertex_count, inf)
+        vertex_origins = full(self.graph.vertex_count, -1, dtype=int32)
+        results = self.map(calcBoundedCosts, workerBoundedCosts, [(vertex_id, max_cost, entry_cost) for vertex_id, entry_cost in starts])
+        for point_index, (reached_vertex_ids, reached_costs) in enumerate(results):
+            reduceMinimumCosts(vertex_costs, vertex_origins, reached_costs, point_index, reached_vertex_ids)
+        return vertex_costs, vertex_origins
+
+    def isoArea(self, points, max_cost, interval=None, output='points', cell_size=10.0):
+        """
+        Returns the iso-area of the points as GeoJSON FeatureCollection: the reachable vertices with their costs (output 'points')
+        or one polygon per cost level (output 'polygons') contoured from the TIN interpolation of the vertex costs, covering the
+        whole area from 0 up to the level like the iso-area as polygons algorithms do.
+        """
+        starts = tuple(self.snap(point) for point in points)
+        return self.cachedResult('iso area', (starts, max_cost, interval, output, cell_size), lambda: self.calcIsoArea(starts, max_cost, interval, output, cell_size))
+
+    def calcIsoArea(self, starts, max_cost, interval, output, cell_size):
+        if output == 'points':
+            vertex_costs, vertex_origins = self.isoCosts(starts, max_cost)
+            vertex_ids = isfinite(vertex_costs).nonzero()[0]
+            features = [{'type': 'Feature',
+                         'geometry': {'type': 'Point', 'coordinates': [x, y]},
+                         'properties': {'vertex_id': vertex_id, 'cost': cost, 'origin_point_index': origin}}
+                        for vertex_id, x, y, cost, origin in zip(vertex_ids.tolist(), self.graph.vertex_x[vertex_ids].tolist(), self.graph.vertex_y[vertex_ids].tolist(),
+                                                                 vertex_costs[vertex_ids].tolist(), vertex_origins[vertex_ids].tolist())]
+            return self.geoJson({'type': 'FeatureCollection', 'features': features})
+        if output != 'polygons':
+            raise ValueError('unknown output {} (expected points or polygons)'.format(output))
+
+        #interpolate beyond max_cost so the outer level closes properly, like the iso-area algorithms do
+        interval = interval if interval else max_cost
+        vertex_costs = self.isoCosts(starts, max_cost + max_cost * 0.1)[0]
+        vertex_ids = isfinite(vertex_costs).nonzero()[0]
+        x, y, costs = self.graph.vertex_x[vertex_ids], self.graph.vertex_y[vertex_ids], vertex_costs[vertex_ids]
+        triangles = delaunayTriangles(x, y)
+        if len(triangles) == 0:
+            return self.geoJson({'type': 'FeatureCollection', 'features': []})
+
+        ncol = max(1, int((x.max() - x.min()) / cell_size))
+        nrows = max(1, int((y.max() - y.min()) / cell_size))
+        if ncol * nrows > self.MAX_RASTER_CELLS:
+            raise ValueError('cell_size {} is too small for the iso-area ({} x {} cells)'.format(cell_size, ncol, nrows))
+        geotransform = (x.min(), (x.max() - x.min()) / ncol, 0, y.max(), 0, -(y.max() - y.min()) / nrows)
+        raster_values = interpolateTriangles(x, y, costs, triangles, geotransform, nrows, ncol, -9999)
+        raster_values[raster_values < 0] = max_cost + 1000
+
+        features = []
+        levels = arange(interval, interval * ceil(max_cost / interval) + interval, interval).tolist()
+        for level, polygons in zip(levels, contourAreas(raster_values, geotransform, levels)):
+            if not polygons:
+                continue
+            coordinates = [[asarray((shell_x, shell_y)).T.tolist()] + [asarray((hole_x, hole_y)).T.tolist() for hole_x, hole_y in holes] for (shell_x, shell_y), holes in polygons]
+            features.insert(0, {'type': 'Feature', 'geometry': {'type': 'MultiPolygon', 'coordinates': coordinates}, 'properties': {'cost_level': level}})
+        return self.geoJson({'type': 'FeatureCollection', 'features': features})
+
+
+def parseFeatureIds(value):
+    """Parses feature ids given as list (JSON) or as string "1,2,3" (query string)"""
+    if isinstance(value, str):
+        value = [feature_id for feature_id in value.split(',') if feature_id]
+    return [int(feature_id) for feature_id in value]
+
+
+def parsePoints(value):
+    """Parses points given as list of [x, y] (JSON) or as string "x,y;x,y" (query string)"""
+    if isinstance(value, str):
+        value = [point.split(',') for point in value.split(';') if point]
+    points = [[float(x), float(y)] for x, y in value]
+    if not points:
+        raise ValueError('no points given')
+    return points
+
+
+class Qneat3RequestHandler(BaseHTTPRequestHandler):
+    """
+    Qneat3RequestHandler:
+    JSON interface of the routing server. Parameters are passed in the query string (GET) or as JSON object (POST):
+        /route   from, to                                      -> GeoJSON Feature
+        /od      from, to (optional)                           -> JSON cost matrix
+        /iso     points, max_cost, interval, output, cell_size -> GeoJSON FeatureCollection
+        /update  changed, added, deleted (POST only)           -> summary of the graph update
+        /health                                                -> server status
+    Points are [x, y] lists in JSON or "x,y;x,y" strings in query strings, given in the coordinate system of the network.
+    /update takes the ids of the edited features of the network layer as lists in JSON or "1,2,3" strings in query strings.
+    """
+
+    server_version = 'QNEAT3'
+    timeout = 60
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.handleQuery(url.path, {key: values[-1] for key, values in parse_qs(url.query).items()})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            parameters = json.loads(self.rfile.read(length) or b'{}') if length else {}
+            if not isinstance(parameters, dict):
+                raise ValueError('the request body is no JSON object')
+        except ValueError as error:
+            self.sendJson(400, {'error': str(error)})
+            return
+        parameters.update({key: values[-1] for key, values in parse_qs(url.query).items()})
+        self.handleQuery(url.path, parameters)
+
+    def handleQuery(self, path, parameters):
+        if path == '/health':
+            self.sendJson(200, {'status': 'ok', 'vertices': self.server.service.graph.vertex_count, 'edges': self.server.service.graph.edge_count,
+                                'active_requests': self.server.activeRequests(), 'max_requests': self.server.max_requests})
+            return
+        if path == '/update':
+            self.handleUpdate(parameters)
+            return
+        if path not in ('/route', '/od', '/iso'):
+            self.sendJson(404, {'error': 'unknown path {}'.format(path)})
+            return
+
+        #bounded request queue: answer right away instead of piling up requests the workers can not keep up with
+        if not self.server.request_slots.acquire(blocking=False):
+            self.sendJson(503, {'error': 'too many requests, try again later'})
+            return
+        try:
+            self.server.countRequest(1)
+            service = self.server.service
+            if path == '/route':
+                result = service.route(parsePoints(parameters['from'])[0], parsePoints(parameters['to'])[0])
+            elif path == '/od':
+                result = service.odMatrix(parsePoints(parameters['from']), parsePoints(parameters['to']) if 'to' in parameters else None)
+            else:
+                result = service.isoArea(parsePoints(parameters['points']), float(parameters['max_cost']), float(parameters.get('interval', 0)) or None,
+                                         parameters.get('output', 'points'), float(parameters.get('cell_size', 10.0)))
+        except KeyError as error:
+            self.sendJson(400, {'error': 'missing parameter {}'.format(error)})
+        except (TypeError, ValueError, IndexError) as error:
+            self.sendJson(400, {'error': str(error)})
+        except Exception as error:
+            self.sendJson(500, {'error': str(error)})
+        else:
+            self.sendJson(200, result, 'application/geo+json' if path != '/od' else 'application/json')
+        finally:
+            self.server.countRequest(-1)
+            self.server.request_slots.release()
+
+    def handleUpdate(self, parameters):
+        if self.command != 'POST':
+            self.sendJson(405, {'error': '/update only accepts POST requests'})
+            return
+        try:
+            summary = self.server.service.updateNetwork(parseFeatureIds(parameters.get('changed', [])), parseFeatureIds(parameters.get('added', [])),
+                                                        parseFeatureIds(parameters.get('deleted', [])), self.server.drainedRequests())
+        except (TypeError, ValueError) as error:
+            self.sendJson(400, {'error': str(error)})
+        except Exception as error:
+            self.sendJson(500, {'error': str(error)})
+        else:
+            self.sendJson(200, summary)
+
+    def sendJson(self, status, content, content_type='application/json'):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class Qneat3RoutingServer(ThreadingMixIn, HTTPServer):
+    """
+    Qneat3RoutingServer:
+    Threaded HTTP server answering queries of a Qneat3RoutingService. At most max_requests queries are processed
+    (or waiting for a worker process) at a time, further requests are rejected with 503.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, service, host='127.0.0.1', port=8080, max_requests=None, quiet=False):
+        self.service = service
+        self.max_requests = max_requests if max_requests else 4 * workerCount(service.workers)
+        self.request_slots = threading.BoundedSemaphore(self.max_requests)
+        self.active_requests = 0
+        self.counter_lock = threading.Lock()
+        self.quiet = quiet
+        super().__init__((host, port), Qneat3RequestHandler)
+
+    def countRequest(self, count):
+        with self.counter_lock:
+            self.active_requests = self.active_requests + count
+
+    def activeRequests(self):
+        with self.counter_lock:
+            return self.active_requests
+
+    @contextlib.contextmanager
+    def drainedRequests(self):
+        """Waits until the running queries are done and rejects new ones (503) until the block is left"""
+        for slot in range(self.max_requests):
+            self.request_slots.acquire()
+        try:
+            yield
+        finally:
+            for slot in range(self.max_requests):
+                self.request_slots.release()
+
+    def serve(self):
+        """Serves until interrupted (Ctrl+C), then shuts down the worker processes"""
+        print("[QNEAT3Server] Serving {} vertices on http://{}:{}".format(self.service.graph.vertex_count, *self.server_address[:2]), file=sys.stderr)
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+            self.service.close()
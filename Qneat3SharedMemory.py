@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3SharedMemory.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import shutil
+
+from collections import OrderedDict
+from numpy import asarray, ndarray
+try:
+    from multiprocessing import shared_memory
+except ImportError: #Python < 3.8, workers get copies of the arrays
+    shared_memory = None
+
+from QNEAT3.Qneat3ArrayGraph import Qneat3ArrayGraph
+
+#arrays of a Qneat3ArrayGraph in the order of Qneat3ArrayGraph.arrayLayout
+GRAPH_ARRAYS = ('vertex_x', 'vertex_y', 'edge_from', 'edge_to', 'edge_cost',
+                'out_offsets', 'out_edges', 'out_targets', 'out_costs',
+                'in_offsets', 'in_edges', 'in_sources', 'in_costs')
+
+
+class Qneat3SharedArrays():
+    """
+    Qneat3SharedArrays:
+    Named numpy arrays in one multiprocessing.shared_memory block. Lifecycle: the owning process calls create() (copies the
+    arrays into the block) and passes descriptor() to other processes, which attach() to it and get zero-copy views. Every
+    process calls close() when it does not need the arrays anymore, the owner finally calls unlink() to free the block.
+    Processes have to be started by the owner (eg. a multiprocessing pool), so they share its resource tracker.
+    """
+
+    def __init__(self, block, layout, owner):
+        self.block = block
+        self.layout = layout #[(name, dtype string, length, offset)]
+        self.owner = owner
+        self.arrays = OrderedDict((name, ndarray((length,), dtype=array_type, buffer=block.buf, offset=offset)) for name, array_type, length, offset in layout)
+
+    @classmethod
+    def create(cls, named_arrays):
+        """Creates a block holding copies of the (name, array) pairs, every array aligned to 8 bytes"""
+        named_arrays = [(name, asarray(array)) for name, array in named_arrays]
+        layout = []
+        size = 0
+        for name, array in named_arrays:
+            layout.append((name, array.dtype.str, len(array), size))
+            size = size + array.nbytes + (-array.nbytes % 8)
+        block = shared_memory.SharedMemory(create=True, size=max(size, 8))
+        shared_arrays = cls(block, layout, True)
+        for name, array in named_arrays:
+            shared_arrays.arrays[name][:] = array
+        return shared_arrays
+
+    @classmethod
+    def attach(cls, descriptor):
+        block_name, layout = descriptor
+        return cls(shared_memory.SharedMemory(name=block_name), layout, False)
+
+    @staticmethod
+    def requiredSize(named_arrays):
+        return sum(array.nbytes + (-array.nbytes % 8) for name, array in named_arrays)
+
+    def descriptor(self):
+        """Picklable (block name, layout) tuple to attach to the block from another process"""
+        return self.block.name, self.layout
+
+    def close(self):
+        """Releases the views and detaches from the block, the arrays must not be used afterwards"""
+        if self.block is not None:
+            self.arrays = OrderedDict()
+            self.block.close()
+
+    def unlink(self):
+        """Closes and frees the block (owner only), processes still attached keep their mapping until they close it"""
+        if self.block is not None:
+            block = self.block
+            self.close()
+            if self.owner:
+                block.unlink()
+            self.block = None
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+def sharedMemoryAvailable(nbytes):
+    """Checks that a shared memory block of nbytes fits into /dev/shm (a full tmpfs crashes the process writing into it)"""
+    if shared_memory is None:
+        return False
+    if os.path.isdir('/dev/shm'):
+        return shutil.disk_usage('/dev/shm').free > nbytes
+    return True
+
+
+def shareArrayGraph(array_graph):
+    """Copies the arrays of a Qneat3ArrayGraph into a Qneat3SharedArrays block, returns None if shared memory is too small"""
+    named_arrays = [(name, getattr(array_graph, name)) for name in GRAPH_ARRAYS]
+    if not sharedMemoryAvailable(Qneat3SharedArrays.requiredSize(named_arrays)):
+        return None
+    return Qneat3SharedArrays.create(named_arrays)
+
+
+def attachArrayGraph(descriptor, crs=None):
+    """Attaches to a block created by shareArrayGraph and returns (Qneat3ArrayGraph on the shared arrays, Qneat3SharedArrays)"""
+    shared_arrays = Qneat3SharedArrays.attach(descriptor)
+    arrays = [shared_arrays[name] for name in GRAPH_ARRAYS]
+    return Qneat3ArrayGraph(*arrays[:5], csr_arrays=arrays[5:], crs=crs), shared_arrays
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Triangulation.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from importlib.util import find_spec
+
+from numpy import arange, asarray, ceil, column_stack, cumsum, errstate, floor, full, hypot, inf, int32, int64, repeat, searchsorted, zeros
+
+
+def delaunayTriangles(x, y):
+    """
+    Returns the Delaunay triangulation of the given points as (n, 3) array of point indices. Uses scipy.spatial
+    if it is installed and falls back to the GEOS triangulation shipped with QGIS otherwise.
+    """
+    if len(x) < 3:
+        return zeros((0, 3), dtype=int32)
+    if find_spec('scipy') is not None:
+        from scipy.spatial import Delaunay, QhullError
+        try:
+            return Delaunay(column_stack((x, y))).simplices.astype(int32)
+        except QhullError:
+            #all points collinear or coincident
+            return zeros((0, 3), dtype=int32)
+    return geosDelaunayTriangles(x, y)
+
+
+def geosDelaunayTriangles(x, y):
+    """Triangulates the points with QgsGeometry.delaunayTriangulation and maps the triangle corners back to point indices"""
+    from qgis.core import QgsGeometry, QgsPointXY
+
+    x = x.tolist()
+    y = y.tolist()
+    point_index = {}
+    for i, coordinates in enumerate(zip(x, y)):
+        point_index.setdefault(coordinates, i)
+
+    triangulation = QgsGeometry.fromMultiPointXY([QgsPointXY(px, py) for px, py in zip(x, y)]).delaunayTriangulation()
+    triangles = []
+    for triangle in triangulation.asGeometryCollection():
+        ring = triangle.asPolygon()[0]
+        triangles.append([point_index[(pt.x(), pt.y())] for pt in ring[:3]])
+    return asarray(triangles, dtype=int32).reshape(-1, 3)
+
+
+def circumradii(x, y, triangles):
+    """Returns the circumcircle radius of every triangle (inf for degenerated triangles)"""
+    x0, x1, x2 = x[triangles[:, 0]], x[triangles[:, 1]], x[triangles[:, 2]]
+    y0, y1, y2 = y[triangles[:, 0]], y[triangles[:, 1]], y[triangles[:, 2]]
+    a = hypot(x1 - x0, y1 - y0)
+    b = hypot(x2 - x1, y2 - y1)
+    c = hypot(x0 - x2, y0 - y2)
+    double_area = abs((x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0))
+    with errstate(divide='ignore', invalid='ignore'):
+        radii = (a * b * c) / (2.0 * double_area)
+    radii[double_area == 0] = inf
+    return radii
+
+
+def alphaShapeBands(x, y, costs, levels, alpha):
+    """
+    Assigns the triangles of the alpha shape of the points to cost bands. A triangle is part of the alpha shape if its
+    circumradius does not exceed alpha and it becomes reachable at the first level covering the costs of all three corners.
+    Returns a list holding an (n, 3) array of triangle corner indices per level.
+    """
+    triangles = delaunayTriangles(x, y)
+    if len(triangles) == 0:
+        return [triangles for level in levels]
+
+    triangle_costs = costs[triangles].max(axis=1)
+    in_shape = circumradii(x, y, triangles) <= alpha
+    bands = []
+    previous_level = -inf
+    for level in levels:
+        bands.append(triangles[in_shape & (triangle_costs > previous_level) & (triangle_costs <= level)])
+        previous_level = level
+    return bands
+
+
+def interpolateTriangles(x, y, values, triangles, geotransform, nrows, ncols, nodata_value, block_size=4000000):
+    """
+    Linear interpolation of values on a triangulation into a (nrows, ncols) raster sampled at the cell centres of a north-up
+    geotransform. Cells outside of all triangles get nodata_value. The candidate cells of the triangle bounding boxes
+    are expanded into flat arrays and tested with barycentric coordinates in blocks of about block_size cells.
+    """
+    raster_values = full((nrows, ncols), float(nodata_value))
+    if len(triangles) == 0 or nrows == 0 or ncols == 0:
+        return raster_values
+
+    origin_x, cell_size_x, origin_y, cell_size_y = geotransform[0], geotransform[1], geotransform[3], -geotransform[5]
+    x0, x1, x2 = x[triangles[:, 0]], x[triangles[:, 1]], x[triangles[:, 2]]
+    y0, y1, y2 = y[triangles[:, 0]], y[triangles[:, 1]], y[triangles[:, 2]]
+    v0, v1, v2 = values[triangles[:, 0]], values[triangles[:, 1]], values[triangles[:, 2]]
+    det = (y1 - y2) * (x0 - x2) + (x2 - x1) * (y0 - y2)
+
+    #range of cell centres inside the bounding box of every triangle
+    col_min = ceil((column_stack((x0, x1, x2)).min(axis=1) - origin_x) / cell_size_x - 0.5).clip(0, ncols).astype(int64)
+    col_max = floor((column_stack((x0, x1, x2)).max(axis=1) - origin_x) / cell_size_x - 0.5).clip(-1, ncols - 1).astype(int64)
+    row_min = ceil((origin_y - column_stack((y0, y1, y2)).max(axis=1)) / cell_size_y - 0.5).clip(0, nrows).astype(int64)
+    row_max = floor((origin_y - column_stack((y0, y1, y2)).min(axis=1)) / cell_size_y - 0.5).clip(-1, nrows - 1).astype(int64)
+    widths = (col_max - col_min + 1).clip(0)
+    cell_counts = widths * (row_max - row_min + 1).clip(0)
+    cell_counts[det == 0] = 0
+    cell_offsets = cumsum(cell_counts)
+
+    block_start = 0
+    while block_start < len(triangles):
+        #take as many triangles as fit into one block, but at least one
+        first_offset = cell_offsets[block_start] - cell_counts[block_start]
+        block_end = max(block_start + 1, int(searchsorted(cell_offsets, first_offset + block_size, side='right')))
+        block = arange(block_start, block_end)
+        block_counts = cell_counts[block]
+        block_start = block_end
+        if block_counts.sum() == 0:
+            continue
+
+        triangle_ids = repeat(block, block_counts)
+        local_ids = arange(block_counts.sum(), dtype=int64) - repeat(cumsum(block_counts) - block_counts, block_counts)
+        rows = row_min[triangle_ids] + local_ids // widths[triangle_ids]
+        cols = col_min[triangle_ids] + local_ids % widths[triangle_ids]
+        px = origin_x + (cols + 0.5) * cell_size_x
+        py = origin_y - (rows + 0.5) * cell_size_y
+
+        tx2 = x2[triangle_ids]
+        ty2 = y2[triangle_ids]
+        tdet = det[triangle_ids]
+        l0 = ((y1[triangle_ids] - ty2) * (px - tx2) + (tx2 - x1[triangle_ids]) * (py - ty2)) / tdet
+        l1 = ((ty2 - y0[triangle_ids]) * (px - tx2) + (x0[triangle_ids] - tx2) * (py - ty2)) / tdet
+        l2 = 1.0 - l0 - l1
+        inside = (l0 >= -1e-9) & (l1 >= -1e-9) & (l2 >= -1e-9)
+
+        triangle_ids = triangle_ids[inside]
+        raster_values[rows[inside], cols[inside]] = l0[inside] * v0[triangle_ids] + l1[inside] * v1[triangle_ids] + l2[inside] * v2[triangle_ids]
+    return raster_values
@@ -17,10 +17,17 @@
 ***************************************************************************
 """
 
-from qgis.core import QgsWkbTypes, QgsMessageLog, QgsVectorLayer, QgsFeature, QgsGeometry, QgsFields, QgsField, QgsFeatureRequest
+from array import array
+from numpy import float64, frombuffer
+
+from qgis.core import (QgsWkbTypes, QgsMessageLog, QgsVectorLayer, QgsFeature, QgsGeometry, QgsFields, QgsField, QgsFeatureRequest, QgsPointXY,
+                       QgsProcessingParameterBoolean, QgsProcessingParameterDefinition, QgsProcessingParameterEnum, QgsProcessingParameterFile,
+                       QgsProcessingParameterFileDestination)
 
 from qgis.PyQt.QtCore import QVariant
+from QNEAT3.Qneat3Cache import sharedResultCache, sharedTreeCache
 from QNEAT3.Qneat3Exceptions import Qneat3GeometryException
+from QNEAT3.Qneat3Raster import Qneat3RasterWriter
 
 def AssignAnalysisCrs(vlayer):
     logPanel("Setting analysis CRS")
@@ -67,16 +74,43 @@ def getFeatureFromPointParameter(qgs_point_xy):
     feature['point_id']="Start Point"
     return feature
 
-def getFeaturesFromQgsIterable(qgs_feature_storage):#qgs_feature_storage can be any vectorLayer/QgsProcessingParameterFeatureSource/etc
-    fRequest = QgsFeatureRequest().setFilterFids(qgs_feature_storage.allFeatureIds())
+def getFeaturesFromQgsIterable(qgs_feature_storage, attribute_names=None):#qgs_feature_storage can be any vectorLayer/QgsProcessingParameterFeatureSource/etc
+    #plain request in provider order (no fid filter, which would materialize all feature ids first), optionally fetching only some attributes
+    fRequest = QgsFeatureRequest()
+    if attribute_names is not None:
+        fRequest.setSubsetOfAttributes(attribute_names, qgs_feature_storage.fields())
     return qgs_feature_storage.getFeatures(fRequest)
 
 def mergeFeaturesFromQgsIterable(qgs_feature_storage_list):
     result_feature_list = []
     for qgs_feature_storage in qgs_feature_storage_list:
-        fRequest = QgsFeatureRequest().setFilterFids(qgs_feature_storage.allFeatureIds())
-        result_feature_list.extend(qgs_feature_storage.getFeatures(fRequest))
+        result_feature_list.extend(getFeaturesFromQgsIterable(qgs_feature_storage))
     return result_feature_list
+
+def readPointArrays(qgs_feature_storage, point_id_field_name=None): #qgs_feature_storage can be any vectorLayer/QgsProcessingParameterFeatureSource/etc
+    #single pass over a point dataset fetching only the geometry and the id attribute
+    #returns x and y as numpy arrays and the point ids as list (None if no id field is given)
+    given_geom_type = qgs_feature_storage.wkbType()
+    if given_geom_type != QgsWkbTypes().Point:
+        raise Qneat3GeometryException(given_geom_type, QgsWkbTypes().Point)
+    
+    fRequest = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoFlags)
+    fRequest.setSubsetOfAttributes([point_id_field_name] if point_id_field_name else [], qgs_feature_storage.fields())
+    id_field_index = qgs_feature_storage.fields().lookupField(point_id_field_name) if point_id_field_name else -1
+    
+    x = array('d')
+    y = array('d')
+    point_ids = [] if point_id_field_name else None
+    for feat in qgs_feature_storage.getFeatures(fRequest):
+        pt = feat.geometry().asPoint()
+        x.append(pt.x())
+        y.append(pt.y())
+        if point_ids is not None:
+            point_ids.append(feat.attribute(id_field_index))
+    return frombuffer(x, dtype=float64), frombuffer(y, dtype=float64), point_ids
+
+def getPointsFromArrays(x, y):
+    return [QgsPointXY(px, py) for px, py in zip(x.tolist(), y.tolist())]
         
         
 def getFieldIndexFromQgsProcessingFeatureSource(feature_source, field_name):
@@ -86,13 +120,8 @@ def getFieldIndexFromQgsProcessingFeatureSource(feature_source, field_name):
         return -1
     
 def getListOfPoints(qgs_feature_storage): #qgs_feature_storage can be any vectorLayer/QgsProcessingParameterFeatureSource/etc
-    given_geom_type = qgs_feature_storage.wkbType() #GetStringRepresentation of WKB Type
-
-    if given_geom_type == QgsWkbTypes().Point:
-        qgsfeatureiterator = getFeaturesFromQgsIterable(qgs_feature_storage)
-        return [f.geometry().asPoint() for f in qgsfeatureiterator]
-    else:
-        raise Qneat3GeometryException(given_geom_type, QgsWkbTypes().Point)
+    x, y, point_ids = readPointArrays(qgs_feature_storage)
+    return getPointsFromArrays(x, y)
         
 def getFieldDatatype(qgs_feature_storage, fieldname):
     fields_list = qgs_feature_storage.fields()
@@ -109,4 +138,74 @@ def getFieldDatatypeFromPythontype(pythonvar):
     else: 
         return QVariant.String
 
-    
\ No newline at end of file
+    
+def featuresToRecords(feature_list):
+    #plain python copy of a feature list (eg. for pickling), restored by featuresFromRecords
+    fields = feature_list[0].fields() if feature_list else QgsFields()
+    field_definitions = [(field.name(), field.type(), field.length(), field.precision()) for field in fields]
+    return field_definitions, [(bytes(feat.geometry().asWkb()), feat.attributes()) for feat in feature_list]
+
+def featuresFromRecords(records):
+    field_definitions, feature_records = records
+    fields = QgsFields()
+    for name, field_type, length, precision in field_definitions:
+        fields.append(QgsField(name, field_type, '', length, precision))
+    feature_list = []
+    for wkb, attributes in feature_records:
+        feat = QgsFeature(fields)
+        geom = QgsGeometry()
+        geom.fromWkb(wkb)
+        feat.setGeometry(geom)
+        feat.setAttributes(attributes)
+        feature_list.append(feat)
+    return feature_list
+
+
+def performanceReportParameter(algorithm):
+    #optional JSON report of the profiled phases, added after the outputs of an algorithm
+    report = QgsProcessingParameterFileDestination(algorithm.PERFORMANCE_REPORT, algorithm.tr('Performance report'), algorithm.tr('JSON files (*.json)'), optional=True, createByDefault=False)
+    report.setFlags(report.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+    return report
+
+def finishPerformanceReport(algorithm, profiler, feedback, report_path, results):
+    #logs the profiled phases, writes the report if one is requested and adds it to the algorithm results
+    profiler.finish(feedback, report_path)
+    if report_path:
+        results[algorithm.PERFORMANCE_REPORT] = report_path
+    return results
+
+def rasterOutputProfileParameter(algorithm):
+    #data type, compression, overviews and COG layout of the written interpolation raster, see Qneat3RasterWriter.PROFILES
+    return QgsProcessingParameterEnum(algorithm.RASTER_OUTPUT_PROFILE,
+                                      algorithm.tr('Raster output profile'),
+                                      [algorithm.tr(profile_name) for profile_name in Qneat3RasterWriter.PROFILE_NAMES],
+                                      defaultValue=0)
+
+def resultCacheParameters(algorithm):
+    #reuse of identical query results for the QGIS session, optionally kept in a cache directory
+    return [QgsProcessingParameterBoolean(algorithm.CACHE_RESULTS,
+                                          algorithm.tr('Reuse results of identical queries (cached for the QGIS session)'),
+                                          defaultValue=False),
+            QgsProcessingParameterFile(algorithm.RESULT_CACHE_DIRECTORY,
+                                       algorithm.tr('Result cache directory (keeps cached results on disk)'),
+                                       behavior=QgsProcessingParameterFile.Folder,
+                                       optional=True)]
+
+def setupResultCaches(net, cache_results, result_cache_dir):
+    #the result cache of the session (or of the cache directory) and the Dijkstra tree cache of the session
+    if cache_results or result_cache_dir:
+        net.setupResultCache(sharedResultCache(result_cache_dir or None))
+        net.setupTreeCache(sharedTreeCache())
+
+def treeCacheParameter(algorithm):
+    #reuse of the Dijkstra trees of identical runs for the QGIS session (OD matrix algorithms)
+    return QgsProcessingParameterBoolean(algorithm.CACHE_RESULTS,
+                                         algorithm.tr('Reuse Dijkstra trees of identical runs (same network, points and settings; cached for the QGIS session)'),
+                                         defaultValue=False)
+
+def hubLabelIndexParameter(algorithm):
+    #index file of Qneat3HubLabelIndex for OD cost lookups, built on first use
+    return QgsProcessingParameterFile(algorithm.HUB_LABEL_INDEX,
+                                      algorithm.tr('Hub label index file (built on first use, reused afterwards)'),
+                                      extension='qhl',
+                                      optional=True)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    __main__.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Headless command line interface of QNEAT3 (runs without the QGIS GUI and the processing plugin machinery):
+
+    python -m QNEAT3 batch jobs.json --workers 4
+    python -m QNEAT3 serve network.json --port 8080 --workers 4
+
+The directory containing the QNEAT3 plugin folder and the QGIS python modules have to be on the python path.
+"""
+
+import argparse
+import json
+import sys
+
+
+def runBatch(arguments):
+    #QGIS is only imported (and started) when a command needs it
+    from QNEAT3.Qneat3BatchRunner import Qneat3BatchRunner, Qneat3ConsoleFeedback, startQgis
+    from QNEAT3.Qneat3Exceptions import Qneat3JobException
+
+    application = startQgis()
+    try:
+        runner = Qneat3BatchRunner.fromJobFile(arguments.jobfile, Qneat3ConsoleFeedback(arguments.quiet), arguments.workers)
+        summaries = runner.run()
+    except (Qneat3JobException, OSError) as error:
+        print(error, file=sys.stderr)
+        return 2
+    finally:
+        if application is not None:
+            application.exitQgis()
+
+    if arguments.summary:
+        with open(arguments.summary, 'w') as summary_file:
+            json.dump(summaries, summary_file, indent=2)
+    for summary in summaries:
+        print("[QNEAT3BatchRunner] Task {} ({}): {} features written to {} in {:.3f} s".format(summary['task'], summary['type'], summary['features'], summary['output'], summary['wall_time']))
+    return 0 if len(summaries) == len(runner.job['tasks']) else 1
+
+
+def runServer(arguments):
+    from QNEAT3.Qneat3BatchRunner import Qneat3ConsoleFeedback, startQgis
+    from QNEAT3.Qneat3Cache import Qneat3ResultCache
+    from QNEAT3.Qneat3Exceptions import Qneat3JobException
+    from QNEAT3.Qneat3Server import Qneat3RoutingServer, Qneat3RoutingService
+
+    application = startQgis()
+    try:
+        service = Qneat3RoutingService.fromNetworkConfig(arguments.config, Qneat3ConsoleFeedback(arguments.quiet), arguments.workers)
+        if arguments.cache_size > 0:
+            service.setupResultCache(Qneat3ResultCache(arguments.cache_size, ttl=arguments.cache_ttl, cache_dir=arguments.cache_dir))
+        Qneat3RoutingServer(service, arguments.host, arguments.port, arguments.max_requests, arguments.quiet).serve()
+    except (Qneat3JobException, OSError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 2
+    finally:
+        if application is not None:
+            application.exitQgis()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m QNEAT3', description='Headless QNEAT3 network analysis')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    batch = commands.add_parser('batch', help='run the iso-area and OD matrix tasks of a JSON job file against one network')
+    batch.add_argument('jobfile', help='JSON job file (see Qneat3BatchRunner)')
+    batch.add_argument('--workers', type=int, default=None, help='worker processes for the Dijkstra searches within each task (tasks run one after another), 0 = one per CPU core (overrides the job file)')
+    batch.add_argument('--summary', default=None, help='write a JSON summary of all tasks to this file')
+    batch.add_argument('--quiet', action='store_true', help='only print errors and the task summary')
+    batch.set_defaults(function=runBatch)
+
+    serve = commands.add_parser('serve', help='answer shortest path, OD matrix and iso-area queries over HTTP with the graph kept in memory')
+    serve.add_argument('config', help='JSON file with the "network" settings of a batch job')
+    serve.add_argument('--host', default='127.0.0.1', help='address to listen on (default: %(default)s)')
+    serve.add_argument('--port', type=int, default=8080, help='port to listen on (default: %(default)s)')
+    serve.add_argument('--workers', type=int, default=1, help='worker processes for the Dijkstra searches, 0 = one per CPU core (default: %(default)s)')
+    serve.add_argument('--max-requests', type=int, default=None, help='queries processed at a time before further requests are rejected (default: 4 per worker)')
+    serve.add_argument('--cache-size', type=int, default=256, help='shortest paths and iso-areas kept in the result cache, 0 = no cache (default: %(default)s)')
+    serve.add_argument('--cache-ttl', type=float, default=None, help='seconds until cached results expire (default: never)')
+    serve.add_argument('--cache-dir', default=None, help='also keep cached results on disk in this directory')
+    serve.add_argument('--quiet', action='store_true', help='do not log requests')
+    serve.set_defaults(function=runServer)
+
+    arguments = parser.parse_args(argv)
+    return arguments.function(arguments)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
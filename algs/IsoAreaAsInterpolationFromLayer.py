@@ -34,7 +34,6 @@ from collections import OrderedDict
 from qgis.PyQt.QtGui import QIcon
 
 from qgis.core import (QgsFeatureSink,
-                       QgsVectorLayer,
                        QgsProcessing,
                        QgsProcessingParameterEnum,
                        QgsProcessingParameterField,
@@ -46,8 +45,9 @@ from qgis.core import (QgsFeatureSink,
 
 from qgis.analysis import QgsVectorLayerDirector
 
-from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPoint
-from QNEAT3.Qneat3Utilities import getListOfPoints, getFeaturesFromQgsIterable
+from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPointSet
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Utilities import readPointArrays, getPointsFromArrays, finishPerformanceReport, performanceReportParameter, rasterOutputProfileParameter, resultCacheParameters, setupResultCaches
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
@@ -71,7 +71,12 @@ class IsoAreaAsInterpolationFromLayer(QgisAlgorithm):
     SPEED_FIELD = 'SPEED_FIELD'
     DEFAULT_SPEED = 'DEFAULT_SPEED'
     TOLERANCE = 'TOLERANCE'
+    WORKERS = 'WORKERS'
+    RASTER_OUTPUT_PROFILE = 'RASTER_OUTPUT_PROFILE'
     OUTPUT = 'OUTPUT'
+    CACHE_RESULTS = 'CACHE_RESULTS'
+    RESULT_CACHE_DIRECTORY = 'RESULT_CACHE_DIRECTORY'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
 
     def icon(self):
         return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_servicearea_interpolation_multiple.png'))
@@ -97,7 +102,7 @@ class IsoAreaAsInterpolationFromLayer(QgisAlgorithm):
                 "<ul><li>Network Layer</li><li>Startpoint Layer</li><li>Unique Point ID Field (numerical)</li><li>Maximum cost level for Iso-Area</li><li>Cellsize in Meters (increase default when analyzing larger networks)</li><li>Cost Strategy</li></ul><br>"\
                 "<b>Parameters (optional):</b><br>"\
                 "There are also a number of <i>optional parameters</i> to implement <b>direction dependent</b> shortest paths and provide information on <b>speeds</b> on the networks edges."\
-                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li></ul><br>"\
+                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li><li>Number of worker processes (0 = one per CPU core, 1 = no worker processes)</li><li>Raster output profile (data type, compression, overviews, COG)</li></ul><br>"\
                 "<b>Output:</b><br>"\
                 "The output of the algorithm is one layer:"\
                 "<ul><li>TIN-Interpolation Distance Raster</li></ul>"
@@ -182,14 +187,23 @@ class IsoAreaAsInterpolationFromLayer(QgisAlgorithm):
                                                    self.tr('Topology tolerance'),
                                                    QgsProcessingParameterNumber.Double,
                                                    0.0, False, 0, 99999999.99))
+        params.append(QgsProcessingParameterNumber(self.WORKERS,
+                                                   self.tr('Number of worker processes (0 = one per CPU core, 1 = no worker processes)'),
+                                                   QgsProcessingParameterNumber.Integer,
+                                                   1, False, 0, 1024))
+        params.append(rasterOutputProfileParameter(self))
+
+        params.extend(resultCacheParameters(self))
 
         for p in params:
             p.setFlags(p.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
             self.addParameter(p)
         
         self.addParameter(QgsProcessingParameterRasterDestination(self.OUTPUT, self.tr('Output Interpolation')))
+        self.addParameter(performanceReportParameter(self))
 
     def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
         feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
         network = self.parameterAsSource(parameters, self.INPUT, context) #QgsProcessingFeatureSource
         startPoints = self.parameterAsSource(parameters, self.START_POINTS, context) #QgsProcessingFeatureSource
@@ -207,30 +221,33 @@ class IsoAreaAsInterpolationFromLayer(QgisAlgorithm):
         speedFieldName = self.parameterAsString(parameters, self.SPEED_FIELD, context) #str
         defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
         tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
+        workers = self.parameterAsInt(parameters, self.WORKERS, context) #int
+        raster_profile = self.parameterAsEnum(parameters, self.RASTER_OUTPUT_PROFILE, context) #int
         output_path = self.parameterAsOutputLayer(parameters, self.OUTPUT, context)
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
+        cache_results = self.parameterAsBool(parameters, self.CACHE_RESULTS, context) #bool
+        result_cache_dir = self.parameterAsFile(parameters, self.RESULT_CACHE_DIRECTORY, context) #str (empty if results are only cached in memory)
 
         analysisCrs = network.sourceCrs()
-        input_coordinates = getListOfPoints(startPoints)
+        with profiler.phase('feature read'):
+            start_x, start_y, start_ids = readPointArrays(startPoints, id_field)
+            input_coordinates = getPointsFromArrays(start_x, start_y)
         
         feedback.pushInfo("[QNEAT3Algorithm] Building Graph...")
         feedback.setProgress(10)   
-        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback)
+        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler)
+        setupResultCaches(net, cache_results, result_cache_dir)
         feedback.setProgress(40)
         
-        list_apoints = [Qneat3AnalysisPoint("from", feature, id_field, net, net.list_tiedPoints[i], entry_cost_calc_method, feedback) for i, feature in enumerate(getFeaturesFromQgsIterable(startPoints))]
+        with profiler.phase('feature read'):
+            list_apoints = Qneat3AnalysisPointSet.fromArrays("from", start_ids, start_x, start_y, net, net.list_tiedPoints, entry_cost_calc_method, feedback)
         
         feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Pointcloud...")
-        iso_pointcloud = net.calcIsoPoints(list_apoints, max_dist)
+        iso_pointcloud = net.calcIsoPoints(list_apoints, max_dist, workers)
         feedback.setProgress(70)
         
-        uri = "Point?crs={}&field=vertex_id:int(254)&field=cost:double(254,7)&field=origin_point_id:string(254)&index=yes".format(analysisCrs.authid())
-        
-        iso_pointcloud_layer = QgsVectorLayer(uri, "iso_pointcloud_layer", "memory")
-        iso_pointcloud_provider = iso_pointcloud_layer.dataProvider()
-        iso_pointcloud_provider.addFeatures(iso_pointcloud, QgsFeatureSink.FastInsert)
-        
-        feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Interpolation-Raster using QGIS TIN-Interpolator...")
-        net.calcIsoTinInterpolation(iso_pointcloud_layer, cell_size, output_path)
+        feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Interpolation-Raster using TIN interpolation...")
+        net.calcIsoTinInterpolation(iso_pointcloud, cell_size, output_path, keep_raster=False, raster_profile=raster_profile)
         feedback.setProgress(99)
         
         feedback.pushInfo("[QNEAT3Algorithm] Ending Algorithm")
@@ -238,5 +255,5 @@ class IsoAreaAsInterpolationFromLayer(QgisAlgorithm):
         
         results = {}
         results[self.OUTPUT] = output_path
-        return results
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
 
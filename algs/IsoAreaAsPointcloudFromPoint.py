@@ -51,7 +51,8 @@ from qgis.core import (QgsWkbTypes,
 from qgis.analysis import QgsVectorLayerDirector
 
 from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPoint
-from QNEAT3.Qneat3Utilities import getFeatureFromPointParameter
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Utilities import getFeatureFromPointParameter, finishPerformanceReport, performanceReportParameter, resultCacheParameters, setupResultCaches
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
@@ -74,6 +75,9 @@ class IsoAreaAsPointcloudFromPoint(QgisAlgorithm):
     DEFAULT_SPEED = 'DEFAULT_SPEED'
     TOLERANCE = 'TOLERANCE'
     OUTPUT = 'OUTPUT'
+    CACHE_RESULTS = 'CACHE_RESULTS'
+    RESULT_CACHE_DIRECTORY = 'RESULT_CACHE_DIRECTORY'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
 
     def icon(self):
         return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_servicearea_points.svg'))
@@ -175,6 +179,8 @@ class IsoAreaAsPointcloudFromPoint(QgisAlgorithm):
                                                    QgsProcessingParameterNumber.Double,
                                                    0.0, False, 0, 99999999.99))
 
+        params.extend(resultCacheParameters(self))
+
         for p in params:
             p.setFlags(p.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
             self.addParameter(p)
@@ -182,8 +188,10 @@ class IsoAreaAsPointcloudFromPoint(QgisAlgorithm):
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT,
                                                             self.tr('Output Pointcloud'),
                                                             QgsProcessing.TypeVectorPoint))
+        self.addParameter(performanceReportParameter(self))
 
     def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
         feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
         network = self.parameterAsSource(parameters, self.INPUT, context) #QgsProcessingFeatureSource
         startPoint = self.parameterAsPoint(parameters, self.START_POINT, context, network.sourceCrs()) #QgsPointXY
@@ -199,6 +207,9 @@ class IsoAreaAsPointcloudFromPoint(QgisAlgorithm):
         speedFieldName = self.parameterAsString(parameters, self.SPEED_FIELD, context) #str
         defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
         tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
+        cache_results = self.parameterAsBool(parameters, self.CACHE_RESULTS, context) #bool
+        result_cache_dir = self.parameterAsFile(parameters, self.RESULT_CACHE_DIRECTORY, context) #str (empty if results are only cached in memory)
 
         analysisCrs = network.sourceCrs()
         input_coordinates = [startPoint]
@@ -206,7 +217,8 @@ class IsoAreaAsPointcloudFromPoint(QgisAlgorithm):
         
         feedback.pushInfo("[QNEAT3Algorithm] Building Graph...")
         feedback.setProgress(10)  
-        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback)
+        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler)
+        setupResultCaches(net, cache_results, result_cache_dir)
         feedback.setProgress(40)
 
         analysis_point = Qneat3AnalysisPoint("point", input_point, "point_id", net, net.list_tiedPoints[0], entry_cost_calc_method, feedback)
@@ -222,12 +234,13 @@ class IsoAreaAsPointcloudFromPoint(QgisAlgorithm):
         iso_pointcloud = net.calcIsoPoints([analysis_point], max_dist)
         feedback.setProgress(90)
         
-        sink.addFeatures(iso_pointcloud, QgsFeatureSink.FastInsert)
+        with profiler.phase('sink writing'):
+            sink.addFeatures(iso_pointcloud, QgsFeatureSink.FastInsert)
         
         feedback.pushInfo("[QNEAT3Algorithm] Ending Algorithm")
         feedback.setProgress(100)        
         
         results = {}
         results[self.OUTPUT] = dest_id
-        return results
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
 
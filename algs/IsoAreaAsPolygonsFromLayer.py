@@ -35,7 +35,6 @@ from qgis.PyQt.QtCore import QVariant
 from qgis.PyQt.QtGui import QIcon
 
 from qgis.core import (QgsWkbTypes,
-                       QgsVectorLayer,
                        QgsFeatureSink,
                        QgsFields,
                        QgsField,
@@ -51,8 +50,9 @@ from qgis.core import (QgsWkbTypes,
 
 from qgis.analysis import QgsVectorLayerDirector
 
-from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPoint
-from QNEAT3.Qneat3Utilities import getFeaturesFromQgsIterable, getListOfPoints
+from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPointSet
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Utilities import readPointArrays, getPointsFromArrays, finishPerformanceReport, performanceReportParameter, rasterOutputProfileParameter, resultCacheParameters, setupResultCaches
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
@@ -77,8 +77,17 @@ class IsoAreaAsPolygonsFromLayer(QgisAlgorithm):
     SPEED_FIELD = 'SPEED_FIELD'
     DEFAULT_SPEED = 'DEFAULT_SPEED'
     TOLERANCE = 'TOLERANCE'
+    WORKERS = 'WORKERS'
+    RASTER_OUTPUT_PROFILE = 'RASTER_OUTPUT_PROFILE'
+    BAND_TYPE = 'BAND_TYPE'
+    ISO_METHOD = 'ISO_METHOD'
+    BUFFER_DISTANCE = 'BUFFER_DISTANCE'
+    ALPHA = 'ALPHA'
     OUTPUT_INTERPOLATION = 'OUTPUT_INTERPOLATION'
     OUTPUT_POLYGONS = 'OUTPUT_POLYGONS'
+    CACHE_RESULTS = 'CACHE_RESULTS'
+    RESULT_CACHE_DIRECTORY = 'RESULT_CACHE_DIRECTORY'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
 
     def icon(self):
         return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_servicearea_polygon_multiple.svg'))
@@ -104,10 +113,10 @@ class IsoAreaAsPolygonsFromLayer(QgisAlgorithm):
                 "<ul><li>Network Layer</li><li>Startpoint Layer</li><li>Unique Point ID Field (numerical)</li><li>Maximum cost level for Iso-Area</li><li>Cost Intervals for Iso-Area Bands</li><li>Cellsize in Meters (increase default when analyzing larger networks)</li><li>Cost Strategy</li></ul><br>"\
                 "<b>Parameters (optional):</b><br>"\
                 "There are also a number of <i>optional parameters</i> to implement <b>direction dependent</b> shortest paths and provide information on <b>speeds</b> on the networks edges."\
-                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li></ul><br>"\
+                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li><li>Number of worker processes (0 = one per CPU core, 1 = no worker processes)</li><li>Raster output profile (data type, compression, overviews, COG)</li><li>Polygon type (cumulative or ring polygons)</li><li>Iso-Area method (TIN interpolation, network edge buffering or alpha shapes)</li><li>Buffer distance of network edges (edge buffering method only)</li><li>Alpha (alpha shape method only)</li></ul><br>"\
                 "<b>Output:</b><br>"\
                 "The output of the algorithm are two layers:"\
-                "<ul><li>TIN-Interpolation Distance Raster</li><li>Iso-Area Polygons with cost levels as attributes</li></ul>"    
+                "<ul><li>TIN-Interpolation Distance Raster (optional, the raster is kept in memory if not requested)</li><li>Iso-Area Polygons with cost levels as attributes</li></ul>"    
     
     def msg(self, var):
         return "Type:"+str(type(var))+" repr: "+var.__str__()
@@ -125,6 +134,13 @@ class IsoAreaAsPolygonsFromLayer(QgisAlgorithm):
                            self.tr('Fastest Path (time optimization)')
                            ]
 
+        self.BAND_TYPES = [self.tr('Cumulative polygons (from 0 to cost level)'),
+                           self.tr('Ring polygons (from previous to current cost level)')]
+
+        self.ISO_METHODS = [self.tr('TIN interpolation and contouring (raster)'),
+                            self.tr('Network edge buffering (vector)'),
+                            self.tr('Alpha shapes of the iso point cloud (vector)')]
+
         self.ENTRY_COST_CALCULATION_METHODS = [self.tr('Planar (only use with projected CRS)')]
             
 
@@ -192,15 +208,41 @@ class IsoAreaAsPolygonsFromLayer(QgisAlgorithm):
                                                    self.tr('Topology tolerance'),
                                                    QgsProcessingParameterNumber.Double,
                                                    0.0, False, 0, 99999999.99))
+        params.append(QgsProcessingParameterNumber(self.WORKERS,
+                                                   self.tr('Number of worker processes (0 = one per CPU core, 1 = no worker processes)'),
+                                                   QgsProcessingParameterNumber.Integer,
+                                                   1, False, 0, 1024))
+        params.append(rasterOutputProfileParameter(self))
+        params.append(QgsProcessingParameterEnum(self.BAND_TYPE,
+                                                 self.tr('Polygon type'),
+                                                 self.BAND_TYPES,
+                                                 defaultValue=0))
+        params.append(QgsProcessingParameterEnum(self.ISO_METHOD,
+                                                 self.tr('Iso-Area method'),
+                                                 self.ISO_METHODS,
+                                                 defaultValue=0))
+        params.append(QgsProcessingParameterNumber(self.BUFFER_DISTANCE,
+                                                   self.tr('Buffer distance of network edges (edge buffering method only)'),
+                                                   QgsProcessingParameterNumber.Double,
+                                                   50.0, False, 0, 99999999.99))
+        params.append(QgsProcessingParameterNumber(self.ALPHA,
+                                                   self.tr('Alpha: maximum circumradius of point cloud triangles (alpha shape method only)'),
+                                                   QgsProcessingParameterNumber.Double,
+                                                   100.0, False, 0, 99999999.99))
+
+        params.extend(resultCacheParameters(self))
 
         for p in params:
             p.setFlags(p.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
             self.addParameter(p)
 
-        self.addParameter(QgsProcessingParameterRasterDestination(self.OUTPUT_INTERPOLATION, self.tr('Output Interpolation')))
+        self.addParameter(QgsProcessingParameterRasterDestination(self.OUTPUT_INTERPOLATION, self.tr('Output Interpolation'), optional=True, createByDefault=False))
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT_POLYGONS, self.tr('Output Polygon'), QgsProcessing.TypeVectorPolygon))
         
+        self.addParameter(performanceReportParameter(self))
+
     def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
         feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
         network = self.parameterAsSource(parameters, self.INPUT, context) #QgsProcessingFeatureSource
         startPoints = self.parameterAsSource(parameters, self.START_POINTS, context) #QgsProcessingFeatureSource
@@ -219,49 +261,69 @@ class IsoAreaAsPolygonsFromLayer(QgisAlgorithm):
         speedFieldName = self.parameterAsString(parameters, self.SPEED_FIELD, context) #str
         defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
         tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
-        output_path = self.parameterAsOutputLayer(parameters, self.OUTPUT_INTERPOLATION, context) #string
+        workers = self.parameterAsInt(parameters, self.WORKERS, context) #int
+        raster_profile = self.parameterAsEnum(parameters, self.RASTER_OUTPUT_PROFILE, context) #int
+        band_type = self.parameterAsEnum(parameters, self.BAND_TYPE, context) #int
+        iso_method = self.parameterAsEnum(parameters, self.ISO_METHOD, context) #int
+        buffer_distance = self.parameterAsDouble(parameters, self.BUFFER_DISTANCE, context) #float
+        alpha = self.parameterAsDouble(parameters, self.ALPHA, context) #float
+        output_path = self.parameterAsOutputLayer(parameters, self.OUTPUT_INTERPOLATION, context) #string (empty if the interpolation raster is not requested)
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
+        cache_results = self.parameterAsBool(parameters, self.CACHE_RESULTS, context) #bool
+        result_cache_dir = self.parameterAsFile(parameters, self.RESULT_CACHE_DIRECTORY, context) #str (empty if results are only cached in memory)
 
         analysisCrs = network.sourceCrs()
-        input_coordinates = getListOfPoints(startPoints)
+        with profiler.phase('feature read'):
+            start_x, start_y, start_ids = readPointArrays(startPoints, id_field)
+            input_coordinates = getPointsFromArrays(start_x, start_y)
         
         feedback.pushInfo("[QNEAT3Algorithm] Building Graph...")
         feedback.setProgress(10)
-        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback)
+        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler)
+        setupResultCaches(net, cache_results, result_cache_dir)
         feedback.setProgress(40)
         
-        list_apoints = [Qneat3AnalysisPoint("from", feature, id_field, net, net.list_tiedPoints[i], entry_cost_calc_method, feedback) for i, feature in enumerate(getFeaturesFromQgsIterable(startPoints))]
-        
-        feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Pointcloud...")
-        iso_pointcloud = net.calcIsoPoints(list_apoints, max_dist+(max_dist*0.1))
-        feedback.setProgress(50)
-        
-        uri = "Point?crs={}&field=vertex_id:int(254)&field=cost:double(254,7)&field=origin_point_id:string(254)&index=yes".format(analysisCrs.authid())
-        
-        iso_pointcloud_layer = QgsVectorLayer(uri, "iso_pointcloud_layer", "memory")
-        iso_pointcloud_provider = iso_pointcloud_layer.dataProvider()
-        iso_pointcloud_provider.addFeatures(iso_pointcloud, QgsFeatureSink.FastInsert)
+        with profiler.phase('feature read'):
+            list_apoints = Qneat3AnalysisPointSet.fromArrays("from", start_ids, start_x, start_y, net, net.list_tiedPoints, entry_cost_calc_method, feedback)
         
-        feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Interpolation-Raster using QGIS TIN-Interpolator...")
-        net.calcIsoTinInterpolation(iso_pointcloud_layer, cell_size, output_path)
-        feedback.setProgress(70)
-            
         fields = QgsFields()
         fields.append(QgsField('id', QVariant.Int, '', 254, 0))
         fields.append(QgsField('cost_level', QVariant.Double, '', 20, 7))
         
         (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT_POLYGONS, context, fields, QgsWkbTypes.Polygon, network.sourceCrs())   
         
-        feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Polygons using numpy and matplotlib...")
-        polygon_featurelist = net.calcIsoPolygons(max_dist, interval, output_path)
+        if iso_method == 1:
+            feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Polygons using network edge buffering...")
+            vertex_costs = net.calcIsoCosts(list_apoints, max_dist, workers)
+            feedback.setProgress(60)
+            polygon_featurelist = net.calcIsoEdgePolygons(list_apoints, vertex_costs, max_dist, interval, buffer_distance, band_type == 1)
+        elif iso_method == 2:
+            feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Polygons using alpha shapes...")
+            vertex_costs = net.calcIsoCosts(list_apoints, max_dist, workers)
+            feedback.setProgress(60)
+            polygon_featurelist = net.calcIsoAlphaPolygons(list_apoints, vertex_costs, max_dist, interval, alpha, band_type == 1)
+        else:
+            feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Pointcloud...")
+            iso_pointcloud = net.calcIsoPoints(list_apoints, max_dist+(max_dist*0.1), workers)
+            feedback.setProgress(50)
+            
+            feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Interpolation-Raster using TIN interpolation...")
+            interpolation_raster = net.calcIsoTinInterpolation(iso_pointcloud, cell_size, output_path, raster_profile=raster_profile, cost_bound=net.calcIsoLevels(max_dist, interval)[-1])
+            feedback.setProgress(70)
+            
+            feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Polygons using marching squares...")
+            polygon_featurelist = net.calcIsoPolygons(max_dist, interval, interpolation_raster, band_type == 1)
         feedback.setProgress(90)
         
-        sink.addFeatures(polygon_featurelist, QgsFeatureSink.FastInsert)
+        with profiler.phase('sink writing'):
+            sink.addFeatures(polygon_featurelist, QgsFeatureSink.FastInsert)
         feedback.pushInfo("[QNEAT3Algorithm] Ending Algorithm")
         feedback.setProgress(100)
         
         results = {}
-        results[self.OUTPUT_INTERPOLATION] = output_path
+        if output_path and iso_method == 0:
+            results[self.OUTPUT_INTERPOLATION] = output_path
         results[self.OUTPUT_POLYGONS] = dest_id
-        return results
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
 
 
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    IsoAreaAsPolygonsPerOriginFromLayer.py
+    ---------------------
+    
+    Partially based on QGIS3 network analysis algorithms. 
+    Copyright 2016 Alexander Bruy    
+    
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'Clemens Raffler'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, Clemens Raffler'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+from collections import OrderedDict
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.PyQt.QtGui import QIcon
+
+from qgis.core import (QgsWkbTypes,
+                       QgsFeature,
+                       QgsFeatureSink,
+                       QgsFields,
+                       QgsField,
+                       QgsProcessing,
+                       QgsProcessingParameterEnum,
+                       QgsProcessingParameterField,
+                       QgsProcessingParameterNumber,
+                       QgsProcessingParameterString,
+                       QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterFeatureSink,
+                       QgsProcessingParameterDefinition)
+
+from qgis.analysis import QgsVectorLayerDirector
+
+from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPointSet
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Progress import Qneat3Progress
+from QNEAT3.Qneat3Utilities import readPointArrays, getPointsFromArrays, getFieldDatatype, finishPerformanceReport, performanceReportParameter
+
+from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+
+pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
+
+
+class IsoAreaAsPolygonsPerOriginFromLayer(QgisAlgorithm):
+
+    INPUT = 'INPUT'
+    START_POINTS = 'START_POINTS'
+    ID_FIELD = 'ID_FIELD'
+    MAX_DIST = "MAX_DIST"
+    INTERVAL = "INTERVAL"
+    STRATEGY = 'STRATEGY'
+    ENTRY_COST_CALCULATION_METHOD = 'ENTRY_COST_CALCULATION_METHOD'
+    DIRECTION_FIELD = 'DIRECTION_FIELD'
+    VALUE_FORWARD = 'VALUE_FORWARD'
+    VALUE_BACKWARD = 'VALUE_BACKWARD'
+    VALUE_BOTH = 'VALUE_BOTH'
+    DEFAULT_DIRECTION = 'DEFAULT_DIRECTION'
+    SPEED_FIELD = 'SPEED_FIELD'
+    DEFAULT_SPEED = 'DEFAULT_SPEED'
+    TOLERANCE = 'TOLERANCE'
+    BAND_TYPE = 'BAND_TYPE'
+    BUFFER_DISTANCE = 'BUFFER_DISTANCE'
+    WORKERS = 'WORKERS'
+    OUTPUT_POLYGONS = 'OUTPUT_POLYGONS'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
+
+    def icon(self):
+        return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_servicearea_polygon_multiple.svg'))
+
+    def group(self):
+        return self.tr('Iso-Areas')
+
+    def groupId(self):
+        return 'isoareas'
+    
+    def name(self):
+        return 'isoareaaspolygonsperoriginfromlayer'
+
+    def displayName(self):
+        return self.tr('Iso-Area as Polygons per Origin (from Layer)')
+    
+    def shortHelpString(self):
+        return  "<b>General:</b><br>"\
+                "This algorithm implements iso-area analysis to return <b>separate iso-area polygons for every point</b> of a layer of points (eg. catchments of facilities) on a given <b>network dataset</b>.<br>"\
+                "The network graph is only built once, the bounded shortest path trees of the points are calculated in parallel worker processes and the iso-area polygons are built by buffering the reachable (and partially reachable) network edges.<br>"\
+                "It accounts for <b>points outside of the network</b> (eg. <i>non-network-elements</i>) and increments the iso-areas cost regarding to distance/default speed value. Distances are measured accounting for <b>ellipsoids</b>.<br>Please, <b>only use a projected coordinate system (eg. no WGS84)</b> for this kind of analysis.<br><br>"\
+                "<b>Parameters (required):</b><br>"\
+                "Following Parameters must be set to run the algorithm:"\
+                "<ul><li>Network Layer</li><li>Startpoint Layer</li><li>Unique Point ID Field</li><li>Maximum cost level for Iso-Area</li><li>Cost Intervals for Iso-Area Bands</li><li>Cost Strategy</li></ul><br>"\
+                "<b>Parameters (optional):</b><br>"\
+                "There are also a number of <i>optional parameters</i> to implement <b>direction dependent</b> shortest paths and provide information on <b>speeds</b> on the networks edges."\
+                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li><li>Polygon type (cumulative or ring polygons)</li><li>Buffer distance of network edges</li><li>Number of worker processes (0 = one per CPU core, 1 = no worker processes)</li></ul><br>"\
+                "<b>Output:</b><br>"\
+                "The output of the algorithm is one layer:"\
+                "<ul><li>Iso-Area Polygons with origin point id and cost levels as attributes</li></ul>"
+    
+    def msg(self, var):
+        return "Type:"+str(type(var))+" repr: "+var.__str__()
+
+    def __init__(self):
+        super().__init__()
+
+    def initAlgorithm(self, config=None):
+        self.DIRECTIONS = OrderedDict([
+            (self.tr('Forward direction'), QgsVectorLayerDirector.DirectionForward),
+            (self.tr('Backward direction'), QgsVectorLayerDirector.DirectionBackward),
+            (self.tr('Both directions'), QgsVectorLayerDirector.DirectionBoth)])
+
+        self.STRATEGIES = [self.tr('Shortest Path (distance optimization)'),
+                           self.tr('Fastest Path (time optimization)')
+                           ]
+
+        self.BAND_TYPES = [self.tr('Cumulative polygons (from 0 to cost level)'),
+                           self.tr('Ring polygons (from previous to current cost level)')]
+
+        self.ENTRY_COST_CALCULATION_METHODS = [self.tr('Planar (only use with projected CRS)')]
+            
+
+        self.addParameter(QgsProcessingParameterFeatureSource(self.INPUT,
+                                                              self.tr('Vector layer representing network'),
+                                                              [QgsProcessing.TypeVectorLine]))
+        self.addParameter(QgsProcessingParameterFeatureSource(self.START_POINTS,
+                                                              self.tr('Start Points'),
+                                                              [QgsProcessing.TypeVectorPoint]))
+        self.addParameter(QgsProcessingParameterField(self.ID_FIELD,
+                                                       self.tr('Unique Point ID Field'),
+                                                       None,
+                                                       self.START_POINTS,
+                                                       optional=False))
+        self.addParameter(QgsProcessingParameterNumber(self.MAX_DIST,
+                                                   self.tr('Size of Iso-Area (distance or time value)'),
+                                                   QgsProcessingParameterNumber.Double,
+                                                   2500.0, False, 0, 99999999.99))
+        self.addParameter(QgsProcessingParameterNumber(self.INTERVAL,
+                                                   self.tr('Contour Interval (distance or time value)'),
+                                                   QgsProcessingParameterNumber.Double,
+                                                   500.0, False, 0, 99999999.99))
+        self.addParameter(QgsProcessingParameterEnum(self.STRATEGY,
+                                                     self.tr('Path type to calculate'),
+                                                     self.STRATEGIES,
+                                                     defaultValue=0))
+
+        params = []
+        params.append(QgsProcessingParameterEnum(self.ENTRY_COST_CALCULATION_METHOD,
+                                                 self.tr('Entry Cost calculation method'),
+                                                 self.ENTRY_COST_CALCULATION_METHODS,
+                                                 defaultValue=0))
+        params.append(QgsProcessingParameterField(self.DIRECTION_FIELD,
+                                                  self.tr('Direction field'),
+                                                  None,
+                                                  self.INPUT,
+                                                  optional=True))
+        params.append(QgsProcessingParameterString(self.VALUE_FORWARD,
+                                                   self.tr('Value for forward direction'),
+                                                   optional=True))
+        params.append(QgsProcessingParameterString(self.VALUE_BACKWARD,
+                                                   self.tr('Value for backward direction'),
+                                                   optional=True))
+        params.append(QgsProcessingParameterString(self.VALUE_BOTH,
+                                                   self.tr('Value for both directions'),
+                                                   optional=True))
+        params.append(QgsProcessingParameterEnum(self.DEFAULT_DIRECTION,
+                                                 self.tr('Default direction'),
+                                                 list(self.DIRECTIONS.keys()),
+                                                 defaultValue=2))
+        params.append(QgsProcessingParameterField(self.SPEED_FIELD,
+                                                  self.tr('Speed field'),
+                                                  None,
+                                                  self.INPUT,
+                                                  optional=True))
+        params.append(QgsProcessingParameterNumber(self.DEFAULT_SPEED,
+                                                   self.tr('Default speed (km/h)'),
+                                                   QgsProcessingParameterNumber.Double,
+                                                   5.0, False, 0, 99999999.99))
+        params.append(QgsProcessingParameterNumber(self.TOLERANCE,
+                                                   self.tr('Topology tolerance'),
+                                                   QgsProcessingParameterNumber.Double,
+                                                   0.0, False, 0, 99999999.99))
+        params.append(QgsProcessingParameterEnum(self.BAND_TYPE,
+                                                 self.tr('Polygon type'),
+                                                 self.BAND_TYPES,
+                                                 defaultValue=0))
+        params.append(QgsProcessingParameterNumber(self.BUFFER_DISTANCE,
+                                                   self.tr('Buffer distance of network edges'),
+                                                   QgsProcessingParameterNumber.Double,
+                                                   50.0, False, 0, 99999999.99))
+        params.append(QgsProcessingParameterNumber(self.WORKERS,
+                                                   self.tr('Number of worker processes (0 = one per CPU core, 1 = no worker processes)'),
+                                                   QgsProcessingParameterNumber.Integer,
+                                                   0, False, 0, 1024))
+
+        for p in params:
+            p.setFlags(p.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+            self.addParameter(p)
+
+        self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT_POLYGONS, self.tr('Output Polygon'), QgsProcessing.TypeVectorPolygon))
+        
+        self.addParameter(performanceReportParameter(self))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
+        feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
+        network = self.parameterAsSource(parameters, self.INPUT, context) #QgsProcessingFeatureSource
+        startPoints = self.parameterAsSource(parameters, self.START_POINTS, context) #QgsProcessingFeatureSource
+        id_field = self.parameterAsString(parameters, self.ID_FIELD, context) #str
+        interval = self.parameterAsDouble(parameters, self.INTERVAL, context)#float
+        max_dist = self.parameterAsDouble(parameters, self.MAX_DIST, context)#float
+        strategy = self.parameterAsEnum(parameters, self.STRATEGY, context) #int
+
+        entry_cost_calc_method = self.parameterAsEnum(parameters, self.ENTRY_COST_CALCULATION_METHOD, context) #int
+        directionFieldName = self.parameterAsString(parameters, self.DIRECTION_FIELD, context) #str (empty if no field given)
+        forwardValue = self.parameterAsString(parameters, self.VALUE_FORWARD, context) #str
+        backwardValue = self.parameterAsString(parameters, self.VALUE_BACKWARD, context) #str
+        bothValue = self.parameterAsString(parameters, self.VALUE_BOTH, context) #str
+        defaultDirection = self.parameterAsEnum(parameters, self.DEFAULT_DIRECTION, context) #int
+        speedFieldName = self.parameterAsString(parameters, self.SPEED_FIELD, context) #str
+        defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
+        tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
+        band_type = self.parameterAsEnum(parameters, self.BAND_TYPE, context) #int
+        buffer_distance = self.parameterAsDouble(parameters, self.BUFFER_DISTANCE, context) #float
+        workers = self.parameterAsInt(parameters, self.WORKERS, context) #int
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
+
+        analysisCrs = network.sourceCrs()
+        with profiler.phase('feature read'):
+            start_x, start_y, start_ids = readPointArrays(startPoints, id_field)
+            input_coordinates = getPointsFromArrays(start_x, start_y)
+        
+        feedback.pushInfo("[QNEAT3Algorithm] Building Graph...")
+        feedback.setProgress(10)
+        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler)
+        feedback.setProgress(40)
+        
+        with profiler.phase('feature read'):
+            list_apoints = Qneat3AnalysisPointSet.fromArrays("from", start_ids, start_x, start_y, net, net.list_tiedPoints, entry_cost_calc_method, feedback)
+        
+        fields = QgsFields()
+        fields.append(QgsField('origin_point_id', getFieldDatatype(startPoints, id_field), '', 254, 0))
+        fields.append(QgsField('id', QVariant.Int, '', 254, 0))
+        fields.append(QgsField('cost_level', QVariant.Double, '', 20, 7))
+        
+        (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT_POLYGONS, context, fields, QgsWkbTypes.Polygon, network.sourceCrs())
+        
+        feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Polygons per origin using network edge buffering...")
+        progress = Qneat3Progress(feedback, len(list_apoints), "[QNEAT3Algorithm] Iso-Polygons of {} origins written...", start=40, chunk_size=1)
+        for analysis_point, polygon_featurelist in net.calcIsoEdgePolygonsPerOrigin(list_apoints, max_dist, interval, buffer_distance, band_type == 1, workers):
+            output_features = []
+            for polygon_feature in polygon_featurelist:
+                feat = QgsFeature(fields)
+                feat.setGeometry(polygon_feature.geometry())
+                feat['origin_point_id'] = analysis_point.point_id
+                feat['id'] = polygon_feature['id']
+                feat['cost_level'] = polygon_feature['cost_level']
+                output_features.append(feat)
+            with profiler.phase('sink writing'):
+                sink.addFeatures(output_features, QgsFeatureSink.FastInsert)
+            if progress.step():
+                break
+        
+        progress.finish()
+        feedback.pushInfo("[QNEAT3Algorithm] Ending Algorithm")
+        feedback.setProgress(100)
+        
+        results = {}
+        results[self.OUTPUT_POLYGONS] = dest_id
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
@@ -57,7 +57,9 @@ from qgis.core import (QgsFeatureSink,
 from qgis.analysis import QgsVectorLayerDirector
 
 from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPoint
-from QNEAT3.Qneat3Utilities import getFeatureFromPointParameter, getFeaturesFromQgsIterable
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Progress import Qneat3Progress
+from QNEAT3.Qneat3Utilities import getFeatureFromPointParameter, getFeaturesFromQgsIterable, finishPerformanceReport, performanceReportParameter
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
@@ -82,6 +84,7 @@ class IsoAreaAsQneatInterpolationFromPoint(QgisAlgorithm):
     DEFAULT_SPEED = 'DEFAULT_SPEED'
     TOLERANCE = 'TOLERANCE'
     OUTPUT = 'OUTPUT'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
 
     def icon(self):
         return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_servicearea_interpolation.png'))
@@ -199,8 +202,10 @@ class IsoAreaAsQneatInterpolationFromPoint(QgisAlgorithm):
             self.addParameter(p)
         
         self.addParameter(QgsProcessingParameterRasterDestination(self.OUTPUT, self.tr('Output Interpolation')))
+        self.addParameter(performanceReportParameter(self))
 
     def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
         feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
         network = self.parameterAsVectorLayer(parameters, self.INPUT, context) #QgsVectorLayer
         startPoint = self.parameterAsPoint(parameters, self.START_POINT, context, network.sourceCrs()) #QgsPointXY
@@ -219,6 +224,7 @@ class IsoAreaAsQneatInterpolationFromPoint(QgisAlgorithm):
         defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
         tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
         output_path = self.parameterAsOutputLayer(parameters, self.OUTPUT, context)
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
 
         analysisCrs = network.sourceCrs()
         input_coordinates = [startPoint]
@@ -226,7 +232,7 @@ class IsoAreaAsQneatInterpolationFromPoint(QgisAlgorithm):
         
         feedback.pushInfo("[QNEAT3Algorithm] Building Graph...")
         feedback.setProgress(10)  
-        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback)
+        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler)
         feedback.setProgress(40)
         
         analysis_point = Qneat3AnalysisPoint("point", input_point, "point_id", net, net.list_tiedPoints[0], entry_cost_calc_method, feedback)
@@ -241,10 +247,10 @@ class IsoAreaAsQneatInterpolationFromPoint(QgisAlgorithm):
         iso_pointcloud_provider = iso_pointcloud_layer.dataProvider()
         iso_pointcloud_provider.addFeatures(iso_pointcloud, QgsFeatureSink.FastInsert)
         
-        feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Interpolation-Raster using QGIS TIN-Interpolator...")
+        feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Interpolation-Raster using TIN interpolation...")
         if interpolation_method == 0:
-            feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Interpolation-Raster using QGIS TIN-Interpolator...")
-            net.calcIsoTinInterpolation(iso_pointcloud_layer, cell_size, output_path)
+            feedback.pushInfo("[QNEAT3Algorithm] Calculating Iso-Interpolation-Raster using TIN interpolation...")
+            net.calcIsoTinInterpolation(iso_pointcloud, cell_size, output_path, keep_raster=False)
             feedback.setProgress(99)
         else:
 
@@ -281,11 +287,13 @@ class IsoAreaAsQneatInterpolationFromPoint(QgisAlgorithm):
             
             feedback.pushInfo('[QNEAT3Network][calcQneatInterpolation] Beginning with interpolation')
             total_work = rows * cols
-            counter = 0
+            progress = Qneat3Progress(feedback, total_work, "[QNEAT3Network][calcQneatInterpolation] Interpolated {} cells...")
     
             feedback.pushInfo('[QNEAT3Network][calcQneatInterpolation] Total workload: {} cells'.format(total_work))
             feedback.setProgress(0)
             for i in range(rows):
+                if progress.canceled:
+                    break
                 for j in range(cols):
                     current_pixel_midpoint = QgsPointXY(x_grid[i,j],y_grid[i,j])
     
@@ -366,11 +374,10 @@ class IsoAreaAsQneatInterpolationFromPoint(QgisAlgorithm):
                     
                     raster_data[i,j] = pixel_cost
                     """
-                    counter = counter+1
-                    if counter%1000 == 0:
-                        feedback.pushInfo("[QNEAT3Network][calcQneatInterpolation] Interpolated {} cells...".format(counter))
-                    feedback.setProgress((counter/total_work)*100)
+                    if progress.step():
+                        break
     
+            progress.finish()
     
             band.WriteArray(raster_routingcost_data)
             outRasterSRS = osr.SpatialReference()
@@ -384,4 +391,4 @@ class IsoAreaAsQneatInterpolationFromPoint(QgisAlgorithm):
         
         results = {}
         results[self.OUTPUT] = output_path
-        return results
\ No newline at end of file
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
\ No newline at end of file
@@ -46,6 +46,7 @@ from qgis.core import (
                        QgsProcessingParameterEnum,
                        QgsProcessingParameterFeatureSink,
                        QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterBoolean,
                        QgsProcessingParameterField,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterString,
@@ -54,8 +55,11 @@ from qgis.core import (
 
 from qgis.analysis import (QgsVectorLayerDirector)
 
-from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPoint
-from QNEAT3.Qneat3Utilities import getFeaturesFromQgsIterable, getFieldDatatype, getListOfPoints
+from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPointSet
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Cache import sharedTreeCache
+from QNEAT3.Qneat3Progress import Qneat3Progress
+from QNEAT3.Qneat3Utilities import readPointArrays, getPointsFromArrays, getFieldDatatype, finishPerformanceReport, performanceReportParameter, treeCacheParameter
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
@@ -81,6 +85,9 @@ class OdMatrixFromLayersAsLines(QgisAlgorithm):
     TOLERANCE = 'TOLERANCE'
     OUTPUT = 'OUTPUT'
     MATRIX_GEOMETRY_TYPE = 'MATRIX_GEOMETRY_TYPE'
+    CACHE_RESULTS = 'CACHE_RESULTS'
+    REPORT_PATH_COSTS = 'REPORT_PATH_COSTS'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
 
     def icon(self):
         return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_matrix.svg'))
@@ -106,7 +113,7 @@ class OdMatrixFromLayersAsLines(QgisAlgorithm):
                 "<ul><li>Network Layer</li><li>From-Point Layer</li><li>Unique From-Point ID Field (numerical)</li><li>To-Point Layer</li><li>Unique To-Point ID Field (numerical)</li><li>Cost Strategy</li></ul><br>"\
                 "<b>Parameters (optional):</b><br>"\
                 "There are also a number of <i>optional parameters</i> to implement <b>direction dependent</b> shortest paths and provide information on <b>speeds</b> on the networks edges."\
-                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li></ul><br>"\
+                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li><li>Report distance and travel time of the optimal paths (all cost columns are built in one pass)</li></ul><br>"\
                 "<b>Output:</b><br>"\
                 "The output of the algorithm is one layer:"\
                 "<ul><li>OD-Matrix as lines with network based distances as attributes</li></ul>"    
@@ -205,13 +212,20 @@ class OdMatrixFromLayersAsLines(QgisAlgorithm):
                                                    QgsProcessingParameterNumber.Double,
                                                    0.0, False, 0, 99999999.99))
 
+        params.append(treeCacheParameter(self))
+        params.append(QgsProcessingParameterBoolean(self.REPORT_PATH_COSTS,
+                                                    self.tr('Also report distance and travel time of the optimal paths'),
+                                                    defaultValue=False))
+
         for p in params:
             p.setFlags(p.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
             self.addParameter(p)
 
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT, self.tr('Output OD Matrix'), QgsProcessing.TypeVectorLine), True)
+        self.addParameter(performanceReportParameter(self))
 
     def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
         feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
         network = self.parameterAsSource(parameters, self.INPUT, context) #QgsProcessingFeatureSource
         from_points = self.parameterAsSource(parameters, self.FROM_POINT_LAYER, context) #QgsProcessingFeatureSource
@@ -230,23 +244,34 @@ class OdMatrixFromLayersAsLines(QgisAlgorithm):
         speedFieldName = self.parameterAsString(parameters, self.SPEED_FIELD, context) #str
         defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
         tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
+        cache_results = self.parameterAsBool(parameters, self.CACHE_RESULTS, context) #bool
+        report_path_costs = self.parameterAsBool(parameters, self.REPORT_PATH_COSTS, context) #bool
         
         analysisCrs = network.sourceCrs()
         
         #Points of both layers have to be merged into one layer --> then tied to the Qneat3Network
         #get point list of from layer
-        from_coord_list = getListOfPoints(from_points)
+        with profiler.phase('feature read'):
+            from_x, from_y, from_ids = readPointArrays(from_points, from_id_field)
+            from_coord_list = getPointsFromArrays(from_x, from_y)
         from_coord_list_length = len(from_coord_list)
-        to_coord_list = getListOfPoints(to_points)
+        with profiler.phase('feature read'):
+            to_x, to_y, to_ids = readPointArrays(to_points, to_id_field)
+            to_coord_list = getPointsFromArrays(to_x, to_y)
 
         merged_coords = from_coord_list + to_coord_list
         
         feedback.pushInfo("[QNEAT3Algorithm] Building Graph...")
-        net = Qneat3Network(network, merged_coords, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback)
+        net = Qneat3Network(network, merged_coords, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler, report_path_costs)
+        if cache_results:
+            net.setupTreeCache(sharedTreeCache())
         
         #read the merged point-list seperately for the two layers --> index at the first element of the second layer begins at len(firstLayer) and gets added the index of the current point of layer b.
-        list_from_apoints = [Qneat3AnalysisPoint("from", feature, from_id_field, net, net.list_tiedPoints[i], entry_cost_calc_method, feedback) for i, feature in enumerate(getFeaturesFromQgsIterable(from_points))]
-        list_to_apoints = [Qneat3AnalysisPoint("to", feature, to_id_field, net, net.list_tiedPoints[from_coord_list_length+i], entry_cost_calc_method, feedback) for i, feature in enumerate(getFeaturesFromQgsIterable(to_points))]
+        with profiler.phase('feature read'):
+            list_from_apoints = Qneat3AnalysisPointSet.fromArrays("from", from_ids, from_x, from_y, net, net.list_tiedPoints[:from_coord_list_length], entry_cost_calc_method, feedback)
+        with profiler.phase('feature read'):
+            list_to_apoints = Qneat3AnalysisPointSet.fromArrays("to", to_ids, to_x, to_y, net, net.list_tiedPoints[from_coord_list_length:], entry_cost_calc_method, feedback)
         
         feat = QgsFeature()
         fields = QgsFields()
@@ -258,6 +283,11 @@ class OdMatrixFromLayersAsLines(QgisAlgorithm):
         fields.append(QgsField('network_cost', QVariant.Double, '', 20, 7))
         fields.append(QgsField('exit_cost', QVariant.Double, '', 20,7))
         fields.append(QgsField('total_cost', QVariant.Double, '', 20,7))
+        if report_path_costs:
+            #network distance (m) and travel time (s) along the optimal path, both cost columns are built with the graph
+            path_criteria = [net.criterionIndex('distance'), net.criterionIndex('time')]
+            fields.append(QgsField('network_distance', QVariant.Double, '', 20, 7))
+            fields.append(QgsField('network_time', QVariant.Double, '', 20, 7))
         feat.setFields(fields)
         
         (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context, fields, QgsWkbTypes.LineString, network.sourceCrs())
@@ -268,60 +298,68 @@ class OdMatrixFromLayersAsLines(QgisAlgorithm):
         
         
         current_workstep_number = 0
+        progress = Qneat3Progress(feedback, total_workload, "[QNEAT3Algorithm] {} OD-pairs processed...")
         
-        for start_point in list_from_apoints:
-            #optimize in case of undirected (not necessary to call calcDijkstra as it has already been calculated - can be replaced by reading from list)
-            dijkstra_query = net.calcDijkstra(start_point.network_vertex_id, 0)
-            for query_point in list_to_apoints:
-                if (current_workstep_number%1000)==0:
-                    feedback.pushInfo("[QNEAT3Algorithm] {} OD-pairs processed...".format(current_workstep_number))
-                if dijkstra_query[0][query_point.network_vertex_id] == -1:
-                    feat['origin_id'] = start_point.point_id
-                    feat['destination_id'] = query_point.point_id
-                    feat['entry_cost'] = None
-                    feat['network_cost'] = None
-                    feat['exit_cost'] = None
-                    feat['total_cost'] = None
-                    #Create a null geometry since no real route was found
-                    feat.setGeometry(QgsGeometry())
-                    sink.addFeature(feat, QgsFeatureSink.FastInsert)
-                else:
-                    entry_cost = start_point.entry_cost
-                    network_cost = dijkstra_query[1][query_point.network_vertex_id]
-                    exit_cost = query_point.entry_cost
-                    total_cost = network_cost + entry_cost + exit_cost
-                    
-                    if matrix_geometry_type != 0:
-                        this_tree=dijkstra_query[0]
-                        idx_start = start_point.network_vertex_id
-                        idx_end = query_point.network_vertex_id
-                        # create a geometry following the complete path
-                        route = [net.network.vertex(idx_end).point(),query_point.point_geom]
-                        # Iterate the graph and add hops to route
-                        while idx_end != idx_start:
-                            idx_end = net.network.edge(this_tree[idx_end]).fromVertex()
-                            route.insert(0, net.network.vertex(idx_end).point())
-                        route.insert(0,start_point.point_geom)
+        with profiler.phase('sink writing'):
+            destination_rows = list(list_to_apoints.rows())
+            for start_index, (start_point_id, start_vertex_id, start_entry_cost) in enumerate(list_from_apoints.rows()):
+                if progress.isCanceled():
+                    break
+                #optimize in case of undirected (not necessary to call calcDijkstra as it has already been calculated - can be replaced by reading from list)
+                dijkstra_query = net.calcDijkstra(start_vertex_id, 0)
+                if report_path_costs:
+                    path_costs = net.calcPathCosts(start_vertex_id, dijkstra_query[0], [query_vertex_id for query_point_id, query_vertex_id, query_entry_cost in destination_rows], path_criteria)
+                for query_index, (query_point_id, query_vertex_id, query_entry_cost) in enumerate(destination_rows):
+                    if report_path_costs:
+                        feat['network_distance'], feat['network_time'] = path_costs[query_index] if path_costs[query_index] is not None else (None, None)
+                    if dijkstra_query[0][query_vertex_id] == -1:
+                        feat['origin_id'] = start_point_id
+                        feat['destination_id'] = query_point_id
+                        feat['entry_cost'] = None
+                        feat['network_cost'] = None
+                        feat['exit_cost'] = None
+                        feat['total_cost'] = None
+                        #Create a null geometry since no real route was found
+                        feat.setGeometry(QgsGeometry())
+                        sink.addFeature(feat, QgsFeatureSink.FastInsert)
                     else:
-                        # geometry "as the crow flies"
-                        route = [start_point.point_geom, query_point.point_geom]
-
-                    feat['origin_id'] = start_point.point_id
-                    feat['destination_id'] = query_point.point_id
-                    feat['entry_cost'] = entry_cost
-                    feat['network_cost'] = network_cost
-                    feat['exit_cost'] = exit_cost
-                    feat['total_cost'] = total_cost
-                    feat.setGeometry(QgsGeometry.fromPolylineXY(route))
-                    sink.addFeature(feat, QgsFeatureSink.FastInsert)  
-                current_workstep_number=current_workstep_number+1
-                feedback.setProgress((current_workstep_number/total_workload)*100)
+                        entry_cost = start_entry_cost
+                        network_cost = dijkstra_query[1][query_vertex_id]
+                        exit_cost = query_entry_cost
+                        total_cost = network_cost + entry_cost + exit_cost
+                    
+                        if matrix_geometry_type != 0:
+                            this_tree=dijkstra_query[0]
+                            idx_start = start_vertex_id
+                            idx_end = query_vertex_id
+                            # create a geometry following the complete path
+                            route = [net.network.vertex(idx_end).point(),list_to_apoints.pointXY(query_index)]
+                            # Iterate the graph and add hops to route
+                            while idx_end != idx_start:
+                                idx_end = net.network.edge(int(this_tree[idx_end])).fromVertex()
+                                route.insert(0, net.network.vertex(idx_end).point())
+                            route.insert(0,list_from_apoints.pointXY(start_index))
+                        else:
+                            # geometry "as the crow flies"
+                            route = [list_from_apoints.pointXY(start_index), list_to_apoints.pointXY(query_index)]
+
+                        feat['origin_id'] = start_point_id
+                        feat['destination_id'] = query_point_id
+                        feat['entry_cost'] = entry_cost
+                        feat['network_cost'] = network_cost
+                        feat['exit_cost'] = exit_cost
+                        feat['total_cost'] = total_cost
+                        feat.setGeometry(QgsGeometry.fromPolylineXY(route))
+                        sink.addFeature(feat, QgsFeatureSink.FastInsert)  
+                    current_workstep_number=current_workstep_number+1
+                    progress.step()
                     
+        progress.finish()
         feedback.pushInfo("[QNEAT3Algorithm] Total number of OD-pairs processed: {}".format(current_workstep_number))
     
         feedback.pushInfo("[QNEAT3Algorithm] Ending Algorithm")
 
         results = {}
         results[self.OUTPUT] = dest_id
-        return results
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
 
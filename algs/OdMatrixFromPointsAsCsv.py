@@ -30,6 +30,7 @@ __revision__ = '$Format:%H$'
 
 import os
 import csv
+from math import isinf
 from collections import OrderedDict
 
 from qgis.PyQt.QtGui import QIcon
@@ -37,6 +38,7 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.core import (QgsProcessing,
                        QgsProcessingParameterEnum,
                        QgsProcessingParameterFileDestination,
+                       QgsProcessingParameterBoolean,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
                        QgsProcessingParameterNumber,
@@ -45,8 +47,11 @@ from qgis.core import (QgsProcessing,
 
 from qgis.analysis import (QgsVectorLayerDirector)
 
-from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPoint
-from QNEAT3.Qneat3Utilities import getFeaturesFromQgsIterable
+from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPointSet
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Cache import sharedTreeCache
+from QNEAT3.Qneat3Progress import Qneat3Progress
+from QNEAT3.Qneat3Utilities import readPointArrays, getPointsFromArrays, finishPerformanceReport, performanceReportParameter, treeCacheParameter, hubLabelIndexParameter
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
@@ -68,7 +73,11 @@ class OdMatrixFromPointsAsCsv(QgisAlgorithm):
     SPEED_FIELD = 'SPEED_FIELD'
     DEFAULT_SPEED = 'DEFAULT_SPEED'
     TOLERANCE = 'TOLERANCE'
+    HUB_LABEL_INDEX = 'HUB_LABEL_INDEX'
     OUTPUT = 'OUTPUT'
+    CACHE_RESULTS = 'CACHE_RESULTS'
+    REPORT_PATH_COSTS = 'REPORT_PATH_COSTS'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
 
     def icon(self):
         return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_matrix.svg'))
@@ -94,7 +103,7 @@ class OdMatrixFromPointsAsCsv(QgisAlgorithm):
                 "<ul><li>Network Layer</li><li>Point Layer</li><li>Unique Point ID Field (numerical)</li><li>Cost Strategy</li></ul><br>"\
                 "<b>Parameters (optional):</b><br>"\
                 "There are also a number of <i>optional parameters</i> to implement <b>direction dependent</b> shortest paths and provide information on <b>speeds</b> on the networks edges."\
-                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li></ul><br>"\
+                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li><li>Hub label index file (precomputed index for fast cost lookups, built on first use)</li><li>Report distance and travel time of the optimal paths (all cost columns are built in one pass)</li></ul><br>"\
                 "<b>Output:</b><br>"\
                 "The output of the algorithm is one file:"\
                 "<ul><li>OD-Matrix as csv-file with network based distances as attributes</li></ul>"  
@@ -171,14 +180,22 @@ class OdMatrixFromPointsAsCsv(QgisAlgorithm):
                                                    self.tr('Topology tolerance'),
                                                    QgsProcessingParameterNumber.Double,
                                                    0.0, False, 0, 99999999.99))
+        params.append(hubLabelIndexParameter(self))
+
+        params.append(treeCacheParameter(self))
+        params.append(QgsProcessingParameterBoolean(self.REPORT_PATH_COSTS,
+                                                    self.tr('Also report distance and travel time of the optimal paths'),
+                                                    defaultValue=False))
 
         for p in params:
             p.setFlags(p.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
             self.addParameter(p)
 
         self.addParameter(QgsProcessingParameterFileDestination(self.OUTPUT, self.tr('Output OD Matrix'), self.tr('CSV files (*.csv)')),True)
+        self.addParameter(performanceReportParameter(self))
 
     def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
         feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
         network = self.parameterAsSource(parameters, self.INPUT, context) #QgsProcessingFeatureSource
         points = self.parameterAsSource(parameters, self.POINTS, context) #QgsProcessingFeatureSource
@@ -194,15 +211,31 @@ class OdMatrixFromPointsAsCsv(QgisAlgorithm):
         speedFieldName = self.parameterAsString(parameters, self.SPEED_FIELD, context) #str
         defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
         tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
+        hub_label_index_path = self.parameterAsFile(parameters, self.HUB_LABEL_INDEX, context) #str (empty if no index file given)
         output_path = self.parameterAsFileOutput(parameters, self.OUTPUT, context) #str (filepath)
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
+        cache_results = self.parameterAsBool(parameters, self.CACHE_RESULTS, context) #bool
+        report_path_costs = self.parameterAsBool(parameters, self.REPORT_PATH_COSTS, context) #bool
         feedback.pushInfo(pluginPath)
         
         analysisCrs = network.sourceCrs()
         
+        with profiler.phase('feature read'):
+            point_x, point_y, point_ids = readPointArrays(points, id_field)
+            input_coordinates = getPointsFromArrays(point_x, point_y)
+        
         feedback.pushInfo("[QNEAT3Algorithm] Building Graph...")
-        net = Qneat3Network(network, points, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback)
+        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler, report_path_costs)
+        if cache_results:
+            net.setupTreeCache(sharedTreeCache())
+        
+        with profiler.phase('feature read'):
+            list_analysis_points = Qneat3AnalysisPointSet.fromArrays("point", point_ids, point_x, point_y, net, net.list_tiedPoints, entry_cost_calc_method, feedback)
         
-        list_analysis_points = [Qneat3AnalysisPoint("point", feature, id_field, net, net.list_tiedPoints[i], entry_cost_calc_method, feedback) for i, feature in enumerate(getFeaturesFromQgsIterable(net.input_points))]
+        if hub_label_index_path and report_path_costs:
+            feedback.pushInfo("[QNEAT3Algorithm] The hub label index is not used, the path costs are read from Dijkstra trees")
+        elif hub_label_index_path:
+            net.setupHubLabelIndex(hub_label_index_path)
         
         total_workload = float(pow(len(list_analysis_points),2))
         feedback.pushInfo("[QNEAT3Algorithm] Expecting total workload of {} iterations".format(int(total_workload)))
@@ -212,33 +245,44 @@ class OdMatrixFromPointsAsCsv(QgisAlgorithm):
                                         quotechar='|', 
                                         quoting=csv.QUOTE_MINIMAL)
             #write header
-            csv_writer.writerow(["origin_id","destination_id","entry_cost", "network_cost", "exit_cost", "total_cost"])
+            csv_writer.writerow(["origin_id","destination_id","entry_cost", "network_cost", "exit_cost", "total_cost"] + (["network_distance", "network_time"] if report_path_costs else []))
+            if report_path_costs:
+                #network distance (m) and travel time (s) along the optimal path, both cost columns are built with the graph
+                path_criteria = [net.criterionIndex('distance'), net.criterionIndex('time')]
             
             current_workstep_number = 0
+            progress = Qneat3Progress(feedback, total_workload, "[QNEAT3Algorithm] {} OD-pairs processed...")
+            destination_rows = list(list_analysis_points.rows())
+            destination_vertex_ids = list_analysis_points.vertex_ids.tolist()
             
-            for start_point in list_analysis_points:
-                #optimize in case of undirected (not necessary to call calcDijkstra as it has already been calculated - can be replaced by reading from list)
-                dijkstra_query = net.calcDijkstra(start_point.network_vertex_id, 0)
-                for query_point in list_analysis_points:
-                    if (current_workstep_number%1000)==0:
-                        feedback.pushInfo("[QNEAT3Algorithm] {} OD-pairs processed...".format(current_workstep_number))
-                    if query_point.point_id == start_point.point_id:
-                        csv_writer.writerow([start_point.point_id, query_point.point_id, float(0), float(0), float(0), float(0)])
-                    elif dijkstra_query[0][query_point.network_vertex_id] == -1:
-                        csv_writer.writerow([start_point.point_id, query_point.point_id, None, None, None, None])
+            with profiler.phase('sink writing'):
+                for start_point_id, start_vertex_id, start_entry_cost in list_analysis_points.rows():
+                    if progress.isCanceled():
+                        break
+                    #optimize in case of undirected (not necessary to call calcDijkstra as it has already been calculated - can be replaced by reading from list)
+                    if report_path_costs:
+                        network_costs, path_costs = net.calcNetworkAndPathCosts(start_vertex_id, destination_vertex_ids, path_criteria)
                     else:
-                        entry_cost = start_point.entry_cost
-                        network_cost = dijkstra_query[1][query_point.network_vertex_id]
-                        exit_cost = query_point.entry_cost
-                        total_cost = entry_cost + network_cost + exit_cost
-                        csv_writer.writerow([start_point.point_id, query_point.point_id, entry_cost, network_cost, exit_cost, total_cost])
-                    current_workstep_number=current_workstep_number+1
-                    feedback.setProgress((current_workstep_number/total_workload)*100)
+                        network_costs, path_costs = net.calcNetworkCosts(start_vertex_id, destination_vertex_ids), [None]*len(destination_vertex_ids)
+                    for (query_point_id, query_vertex_id, query_entry_cost), network_cost, path_cost in zip(destination_rows, network_costs, path_costs):
+                        path_columns = (list(path_cost) if path_cost is not None else [None, None]) if report_path_costs else []
+                        if query_point_id == start_point_id:
+                            csv_writer.writerow([start_point_id, query_point_id, float(0), float(0), float(0), float(0)] + path_columns)
+                        elif isinf(network_cost):
+                            csv_writer.writerow([start_point_id, query_point_id, None, None, None, None] + path_columns)
+                        else:
+                            entry_cost = start_entry_cost
+                            exit_cost = query_entry_cost
+                            total_cost = entry_cost + network_cost + exit_cost
+                            csv_writer.writerow([start_point_id, query_point_id, entry_cost, network_cost, exit_cost, total_cost] + path_columns)
+                        current_workstep_number=current_workstep_number+1
+                        progress.step()
                     
+            progress.finish()
             feedback.pushInfo("[QNEAT3Algorithm] Total number of OD-pairs processed: {}".format(current_workstep_number))
         
             feedback.pushInfo("[QNEAT3Algorithm] Ending Algorithm")
 
         results = {self.OUTPUT: output_path}
-        return results
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
 
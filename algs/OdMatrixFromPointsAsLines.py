@@ -44,6 +44,7 @@ from qgis.core import (QgsWkbTypes,
                        QgsProcessingParameterEnum,
                        QgsProcessingParameterFeatureSink,
                        QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterBoolean,
                        QgsProcessingParameterField,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterString,
@@ -51,8 +52,11 @@ from qgis.core import (QgsWkbTypes,
 
 from qgis.analysis import (QgsVectorLayerDirector)
 
-from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPoint
-from QNEAT3.Qneat3Utilities import getFeaturesFromQgsIterable, getFieldDatatype
+from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPointSet
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Cache import sharedTreeCache
+from QNEAT3.Qneat3Progress import Qneat3Progress
+from QNEAT3.Qneat3Utilities import readPointArrays, getPointsFromArrays, getFieldDatatype, finishPerformanceReport, performanceReportParameter, treeCacheParameter
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
@@ -76,6 +80,9 @@ class OdMatrixFromPointsAsLines(QgisAlgorithm):
     TOLERANCE = 'TOLERANCE'
     OUTPUT = 'OUTPUT'
     MATRIX_GEOMETRY_TYPE = 'MATRIX_GEOMETRY_TYPE'
+    CACHE_RESULTS = 'CACHE_RESULTS'
+    REPORT_PATH_COSTS = 'REPORT_PATH_COSTS'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
 
     def icon(self):
         return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_matrix.svg'))
@@ -101,7 +108,7 @@ class OdMatrixFromPointsAsLines(QgisAlgorithm):
                 "<ul><li>Network Layer</li><li>Point Layer</li><li>Unique Point ID Field (numerical)</li><li>Cost Strategy</li></ul><br>"\
                 "<b>Parameters (optional):</b><br>"\
                 "There are also a number of <i>optional parameters</i> to implement <b>direction dependent</b> shortest paths and provide information on <b>speeds</b> on the networks edges."\
-                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li></ul><br>"\
+                "<ul><li>Direction Field</li><li>Value for forward direction</li><li>Value for backward direction</li><li>Value for both directions</li><li>Default direction</li><li>Speed Field</li><li>Default Speed (affects entry/exit costs)</li><li>Topology tolerance</li><li>Report distance and travel time of the optimal paths (all cost columns are built in one pass)</li></ul><br>"\
                 "<b>Output:</b><br>"\
                 "The output of the algorithm is one layer:"\
                 "<ul><li>OD-Matrix as lines with network based distances as attributes</li></ul>"  
@@ -187,14 +194,21 @@ class OdMatrixFromPointsAsLines(QgisAlgorithm):
                                                    QgsProcessingParameterNumber.Double,
                                                    0.0, False, 0, 99999999.99))
 
+        params.append(treeCacheParameter(self))
+        params.append(QgsProcessingParameterBoolean(self.REPORT_PATH_COSTS,
+                                                    self.tr('Also report distance and travel time of the optimal paths'),
+                                                    defaultValue=False))
+
         for p in params:
             p.setFlags(p.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
             self.addParameter(p)
 
 
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT, self.tr('Output OD Matrix'), QgsProcessing.TypeVectorLine), True)
+        self.addParameter(performanceReportParameter(self))
 
     def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
         feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
         network = self.parameterAsSource(parameters, self.INPUT, context) #QgsProcessingFeatureSource
         points = self.parameterAsSource(parameters, self.POINTS, context) #QgsProcessingFeatureSource
@@ -211,13 +225,23 @@ class OdMatrixFromPointsAsLines(QgisAlgorithm):
         speedFieldName = self.parameterAsString(parameters, self.SPEED_FIELD, context) #str
         defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
         tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
+        cache_results = self.parameterAsBool(parameters, self.CACHE_RESULTS, context) #bool
+        report_path_costs = self.parameterAsBool(parameters, self.REPORT_PATH_COSTS, context) #bool
         
         analysisCrs = network.sourceCrs()
         
+        with profiler.phase('feature read'):
+            point_x, point_y, point_ids = readPointArrays(points, id_field)
+            input_coordinates = getPointsFromArrays(point_x, point_y)
+        
         feedback.pushInfo("[QNEAT3Algorithm] Building Graph...")
-        net = Qneat3Network(network, points, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback)
+        net = Qneat3Network(network, input_coordinates, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler, report_path_costs)
+        if cache_results:
+            net.setupTreeCache(sharedTreeCache())
         
-        list_analysis_points = [Qneat3AnalysisPoint("point", feature, id_field, net, net.list_tiedPoints[i], entry_cost_calc_method, feedback) for i, feature in enumerate(getFeaturesFromQgsIterable(net.input_points))]
+        with profiler.phase('feature read'):
+            list_analysis_points = Qneat3AnalysisPointSet.fromArrays("point", point_ids, point_x, point_y, net, net.list_tiedPoints, entry_cost_calc_method, feedback)
         
         feat = QgsFeature()
         fields = QgsFields()
@@ -228,6 +252,11 @@ class OdMatrixFromPointsAsLines(QgisAlgorithm):
         fields.append(QgsField('network_cost', QVariant.Double, '', 20, 7))
         fields.append(QgsField('exit_cost', QVariant.Double, '', 20,7))
         fields.append(QgsField('total_cost', QVariant.Double, '', 20,7))
+        if report_path_costs:
+            #network distance (m) and travel time (s) along the optimal path, both cost columns are built with the graph
+            path_criteria = [net.criterionIndex('distance'), net.criterionIndex('time')]
+            fields.append(QgsField('network_distance', QVariant.Double, '', 20, 7))
+            fields.append(QgsField('network_time', QVariant.Double, '', 20, 7))
         feat.setFields(fields)
         
         (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context,
@@ -239,64 +268,72 @@ class OdMatrixFromPointsAsLines(QgisAlgorithm):
         
         
         current_workstep_number = 0
+        progress = Qneat3Progress(feedback, total_workload, "[QNEAT3Algorithm] {} OD-pairs processed...")
         
-        for start_point in list_analysis_points:
-            #optimize in case of undirected (not necessary to call calcDijkstra as it has already been calculated - can be replaced by reading from list)
-            dijkstra_query = net.calcDijkstra(start_point.network_vertex_id, 0)
-            for query_point in list_analysis_points:
-                if (current_workstep_number%1000)==0:
-                    feedback.pushInfo("[QNEAT3Algorithm] {} OD-pairs processed...".format(current_workstep_number))
-                if query_point.point_id == start_point.point_id:
-                    feat['origin_id'] = start_point.point_id
-                    feat['destination_id'] = query_point.point_id
-                    feat['entry_cost'] = 0.0
-                    feat['network_cost'] = 0.0
-                    feat['exit_cost'] = 0.0
-                    feat['total_cost'] = 0.0
-                    feat.setGeometry(QgsGeometry())
-                    sink.addFeature(feat, QgsFeatureSink.FastInsert)
-                elif dijkstra_query[0][query_point.network_vertex_id] == -1:
-                    feat['origin_id'] = start_point.point_id
-                    feat['destination_id'] = query_point.point_id
-                    feat['entry_cost'] = None
-                    feat['network_cost'] = None
-                    feat['exit_cost'] = None
-                    feat['total_cost'] = None
-                    feat.setGeometry(QgsGeometry())
-                    sink.addFeature(feat, QgsFeatureSink.FastInsert)
-                else:
-                    network_cost = dijkstra_query[1][query_point.network_vertex_id] 
-
-                    if matrix_geometry_type != 0:
-                        this_tree=dijkstra_query[0]
-                        idx_start = start_point.network_vertex_id
-                        idx_end = query_point.network_vertex_id
-                        # create a geometry following the complete path
-                        route = [net.network.vertex(idx_end).point(),query_point.point_geom]
-                        # Iterate the graph and add hops to route
-                        while idx_end != idx_start:
-                            idx_end = net.network.edge(this_tree[idx_end]).fromVertex()
-                            route.insert(0, net.network.vertex(idx_end).point())
-                        route.insert(0,start_point.point_geom)
+        with profiler.phase('sink writing'):
+            destination_rows = list(list_analysis_points.rows())
+            for start_index, (start_point_id, start_vertex_id, start_entry_cost) in enumerate(list_analysis_points.rows()):
+                if progress.isCanceled():
+                    break
+                #optimize in case of undirected (not necessary to call calcDijkstra as it has already been calculated - can be replaced by reading from list)
+                dijkstra_query = net.calcDijkstra(start_vertex_id, 0)
+                if report_path_costs:
+                    path_costs = net.calcPathCosts(start_vertex_id, dijkstra_query[0], [query_vertex_id for query_point_id, query_vertex_id, query_entry_cost in destination_rows], path_criteria)
+                for query_index, (query_point_id, query_vertex_id, query_entry_cost) in enumerate(destination_rows):
+                    if report_path_costs:
+                        feat['network_distance'], feat['network_time'] = path_costs[query_index] if path_costs[query_index] is not None else (None, None)
+                    if query_point_id == start_point_id:
+                        feat['origin_id'] = start_point_id
+                        feat['destination_id'] = query_point_id
+                        feat['entry_cost'] = 0.0
+                        feat['network_cost'] = 0.0
+                        feat['exit_cost'] = 0.0
+                        feat['total_cost'] = 0.0
+                        feat.setGeometry(QgsGeometry())
+                        sink.addFeature(feat, QgsFeatureSink.FastInsert)
+                    elif dijkstra_query[0][query_vertex_id] == -1:
+                        feat['origin_id'] = start_point_id
+                        feat['destination_id'] = query_point_id
+                        feat['entry_cost'] = None
+                        feat['network_cost'] = None
+                        feat['exit_cost'] = None
+                        feat['total_cost'] = None
+                        feat.setGeometry(QgsGeometry())
+                        sink.addFeature(feat, QgsFeatureSink.FastInsert)
                     else:
-                        # geometry "as the crow flies"
-                        route = [start_point.point_geom, query_point.point_geom]
+                        network_cost = dijkstra_query[1][query_vertex_id] 
+
+                        if matrix_geometry_type != 0:
+                            this_tree=dijkstra_query[0]
+                            idx_start = start_vertex_id
+                            idx_end = query_vertex_id
+                            # create a geometry following the complete path
+                            route = [net.network.vertex(idx_end).point(),list_analysis_points.pointXY(query_index)]
+                            # Iterate the graph and add hops to route
+                            while idx_end != idx_start:
+                                idx_end = net.network.edge(int(this_tree[idx_end])).fromVertex()
+                                route.insert(0, net.network.vertex(idx_end).point())
+                            route.insert(0,list_analysis_points.pointXY(start_index))
+                        else:
+                            # geometry "as the crow flies"
+                            route = [list_analysis_points.pointXY(start_index), list_analysis_points.pointXY(query_index)]
                     
-                    feat.setGeometry(QgsGeometry.fromPolylineXY(route))
-                    feat['origin_id'] = start_point.point_id
-                    feat['destination_id'] = query_point.point_id
-                    feat['entry_cost'] = start_point.entry_cost
-                    feat['network_cost'] = network_cost
-                    feat['exit_cost'] = query_point.entry_cost
-                    feat['total_cost'] = network_cost + start_point.entry_cost + query_point.entry_cost
-                    sink.addFeature(feat, QgsFeatureSink.FastInsert)  
-                current_workstep_number=current_workstep_number+1
-                feedback.setProgress((current_workstep_number/total_workload)*100)
+                        feat.setGeometry(QgsGeometry.fromPolylineXY(route))
+                        feat['origin_id'] = start_point_id
+                        feat['destination_id'] = query_point_id
+                        feat['entry_cost'] = start_entry_cost
+                        feat['network_cost'] = network_cost
+                        feat['exit_cost'] = query_entry_cost
+                        feat['total_cost'] = network_cost + start_entry_cost + query_entry_cost
+                        sink.addFeature(feat, QgsFeatureSink.FastInsert)  
+                    current_workstep_number=current_workstep_number+1
+                    progress.step()
                     
+        progress.finish()
         feedback.pushInfo("[QNEAT3Algorithm] Total number of OD-pairs processed: {}".format(current_workstep_number))
     
         feedback.pushInfo("[QNEAT3Algorithm] Ending Algorithm")
         results = {}
         results[self.OUTPUT] = dest_id
-        return results
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
 
@@ -54,7 +54,8 @@ from qgis.core import (QgsWkbTypes,
 from qgis.analysis import QgsVectorLayerDirector
 
 from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPoint
-from QNEAT3.Qneat3Utilities import getFeatureFromPointParameter
+from QNEAT3.Qneat3Profiling import Qneat3Profiler
+from QNEAT3.Qneat3Utilities import getFeatureFromPointParameter, finishPerformanceReport, performanceReportParameter, resultCacheParameters, setupResultCaches
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
@@ -77,6 +78,9 @@ class ShortestPathBetweenPoints(QgisAlgorithm):
     DEFAULT_SPEED = 'DEFAULT_SPEED'
     TOLERANCE = 'TOLERANCE'
     OUTPUT = 'OUTPUT'
+    CACHE_RESULTS = 'CACHE_RESULTS'
+    RESULT_CACHE_DIRECTORY = 'RESULT_CACHE_DIRECTORY'
+    PERFORMANCE_REPORT = 'PERFORMANCE_REPORT'
 
     def icon(self):
         return QIcon(os.path.join(pluginPath, 'QNEAT3', 'icons', 'icon_dijkstra_onetoone.svg'))
@@ -177,6 +181,8 @@ class ShortestPathBetweenPoints(QgisAlgorithm):
                                                    QgsProcessingParameterNumber.Double,
                                                    0.0, False, 0, 99999999.99))
 
+        params.extend(resultCacheParameters(self))
+
         for p in params:
             p.setFlags(p.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
             self.addParameter(p)
@@ -184,8 +190,10 @@ class ShortestPathBetweenPoints(QgisAlgorithm):
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT,
                                                             self.tr('Shortest Path Layer'),
                                                             QgsProcessing.TypeVectorLine))
+        self.addParameter(performanceReportParameter(self))
 
     def processAlgorithm(self, parameters, context, feedback):
+        profiler = Qneat3Profiler(self.name())
         feedback.pushInfo(self.tr("[QNEAT3Algorithm] This is a QNEAT3 Algorithm: '{}'".format(self.displayName())))
         feedback.pushInfo(self.tr('[QNEAT3Algorithm] Initializing Variables'))
         network = self.parameterAsSource(parameters, self.INPUT, context) #QgsProcessingFeatureSource
@@ -202,6 +210,9 @@ class ShortestPathBetweenPoints(QgisAlgorithm):
         speedFieldName = self.parameterAsString(parameters, self.SPEED_FIELD, context) #str
         defaultSpeed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context) #float
         tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context) #float
+        report_path = self.parameterAsFileOutput(parameters, self.PERFORMANCE_REPORT, context) #str (empty if no report is requested)
+        cache_results = self.parameterAsBool(parameters, self.CACHE_RESULTS, context) #bool
+        result_cache_dir = self.parameterAsFile(parameters, self.RESULT_CACHE_DIRECTORY, context) #str (empty if results are only cached in memory)
 
         analysisCrs = network.sourceCrs()
         
@@ -210,10 +221,12 @@ class ShortestPathBetweenPoints(QgisAlgorithm):
         
         feedback.pushInfo(self.tr('[QNEAT3Algorithm] Building Graph'))
         feedback.setProgress(10)
-        net = Qneat3Network(network, input_qgspointxy_list, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback)
+        net = Qneat3Network(network, input_qgspointxy_list, strategy, directionFieldName, forwardValue, backwardValue, bothValue, defaultDirection, analysisCrs, speedFieldName, defaultSpeed, tolerance, feedback, profiler)
+        setupResultCaches(net, cache_results, result_cache_dir)
         feedback.setProgress(40)
         
-        list_analysis_points = [Qneat3AnalysisPoint("point", feature, "point_id", net, net.list_tiedPoints[i], entry_cost_calc_method, feedback) for i, feature in enumerate(input_points)]
+        with profiler.phase('feature read'):
+            list_analysis_points = [Qneat3AnalysisPoint("point", feature, "point_id", net, net.list_tiedPoints[i], entry_cost_calc_method, feedback) for i, feature in enumerate(input_points)]
          
         start_vertex_idx = list_analysis_points[0].network_vertex_id
         end_vertex_idx = list_analysis_points[1].network_vertex_id
@@ -221,32 +234,18 @@ class ShortestPathBetweenPoints(QgisAlgorithm):
         feedback.pushInfo("[QNEAT3Algorithm] Calculating shortest path...")
         feedback.setProgress(50)
         
-        dijkstra_query = net.calcDijkstra(start_vertex_idx,0)
+        cost_on_graph, path_vertex_ids = net.calcShortestPath(start_vertex_idx, end_vertex_idx, 0)
         
-        if dijkstra_query[0][end_vertex_idx] == -1:
+        if not path_vertex_ids:
             raise QgsProcessingException(self.tr('Could not find a path from start point to end point - Check your graph or alter the input points.'))
         
-        path_elements = [list_analysis_points[1].point_geom] #start route with the endpoint outside the network
-        path_elements.append(net.network.vertex(end_vertex_idx).point()) #then append the corresponding vertex of the graph 
-        
-        count = 1
-        current_vertex_idx = end_vertex_idx
-        while current_vertex_idx != start_vertex_idx:
-            current_vertex_idx = net.network.edge(dijkstra_query[0][current_vertex_idx]).fromVertex()
-            path_elements.append(net.network.vertex(current_vertex_idx).point())
-            
-            
-            count = count + 1
-            if count%10 == 0:
-                feedback.pushInfo("[QNEAT3Algorithm] Taversed {} Nodes...".format(count))
-        
-        path_elements.append(list_analysis_points[0].point_geom) #end path with startpoint outside the network   
-        feedback.pushInfo("[QNEAT3Algorithm] Total number of Nodes traversed: {}".format(count+1))
-        path_elements.reverse() #reverse path elements because it was built from end to start
+        path_elements = [list_analysis_points[0].point_geom] #start route with the startpoint outside the network
+        path_elements.extend(net.network.vertex(vertex_idx).point() for vertex_idx in path_vertex_ids)
+        path_elements.append(list_analysis_points[1].point_geom) #end path with endpoint outside the network
+        feedback.pushInfo("[QNEAT3Algorithm] Total number of Nodes traversed: {}".format(len(path_vertex_ids)))
 
         start_entry_cost = list_analysis_points[0].entry_cost
         end_exit_cost = list_analysis_points[1].entry_cost
-        cost_on_graph = dijkstra_query[1][end_vertex_idx]
         total_cost = start_entry_cost + cost_on_graph + end_exit_cost
         
         feedback.pushInfo("[QNEAT3Algorithm] Writing path-feature...")
@@ -277,10 +276,11 @@ class ShortestPathBetweenPoints(QgisAlgorithm):
         geom = QgsGeometry.fromPolylineXY(path_elements)
         feat.setGeometry(geom)
         
-        sink.addFeature(feat, QgsFeatureSink.FastInsert)
+        with profiler.phase('sink writing'):
+            sink.addFeature(feat, QgsFeatureSink.FastInsert)
         feedback.pushInfo("[QNEAT3Algorithm] Ending Algorithm")        
         feedback.setProgress(100)
         results = {}
         results[self.OUTPUT] = dest_id
-        return results
+        return finishPerformanceReport(self, profiler, feedback, report_path, results)
 
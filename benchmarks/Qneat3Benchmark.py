@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3Benchmark.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import json
+import os
+import platform
+import time
+
+from collections import OrderedDict
+from configparser import ConfigParser
+from statistics import median
+from time import perf_counter, process_time
+
+import numpy
+from numpy import asarray, isfinite, int32
+
+from QNEAT3.Qneat3Contouring import contourAreas
+from QNEAT3.Qneat3Parallel import calcMinimumCosts
+from QNEAT3.Qneat3Profiling import peakMemory, toMegabytes
+from QNEAT3.Qneat3Triangulation import delaunayTriangles, interpolateTriangles
+from QNEAT3.benchmarks.Qneat3SyntheticNetwork import Qneat3SyntheticNetwork
+
+REPORT_FORMAT = 'qneat3-benchmark'
+REPORT_VERSION = 1
+
+#layers timed for every network, in order of execution, and the layer whose result they work on
+LAYERS = ['graph build', 'dijkstra', 'iso points', 'interpolation', 'contouring', 'od matrix']
+LAYER_INPUTS = {'dijkstra': 'graph build', 'iso points': 'graph build', 'interpolation': 'iso points', 'contouring': 'interpolation', 'od matrix': 'graph build'}
+
+
+class Qneat3ArrayBackend():
+    """
+    Qneat3ArrayBackend:
+    Stand-in for QGIS: runs every layer on the numpy based Qneat3ArrayGraph and the QGIS-free compute modules,
+    so the suite also runs on machines without a QGIS installation. Analysis points are snapped to the vertex
+    they were sampled from.
+    """
+
+    name = 'array'
+
+    def buildGraph(self, network, strategy, point_count, seed):
+        self.graph = network.toArrayGraph(strategy)
+        self.point_vertex_ids = network.samplePoints(point_count, seed)[0].tolist()
+
+    def dijkstra(self, vertex_id):
+        return self.graph.dijkstra(vertex_id)
+
+    def isoPoints(self, max_cost):
+        costs = calcMinimumCosts(self.graph, [(task_id, vertex_id, 0.0) for task_id, vertex_id in enumerate(self.point_vertex_ids)], max_cost)[0]
+        reached = isfinite(costs).nonzero()[0]
+        return self.graph.vertex_x[reached], self.graph.vertex_y[reached], costs[reached]
+
+    def interpolation(self, iso_points, cell_size):
+        x, y, costs = iso_points
+        triangles = delaunayTriangles(x, y)
+        ncol = max(1, int((x.max() - x.min()) / cell_size))
+        nrows = max(1, int((y.max() - y.min()) / cell_size))
+        geotransform = (x.min(), (x.max() - x.min()) / ncol, 0, y.max(), 0, -(y.max() - y.min()) / nrows)
+        return interpolateTriangles(x, y, costs, triangles, geotransform, nrows, ncol, -9999), geotransform
+
+    def contouring(self, raster, levels):
+        raster_values, geotransform = raster
+        return contourAreas(raster_values, geotransform, levels)
+
+    def odMatrix(self):
+        targets = asarray(self.point_vertex_ids, dtype=int32)
+        return [self.graph.dijkstra(vertex_id)[1][targets] for vertex_id in self.point_vertex_ids]
+
+
+class Qneat3QgisBackend():
+    """
+    Qneat3QgisBackend:
+    Runs every layer through Qneat3Network on a QgsGraph built from memory layers, like the processing algorithms do.
+    Requires a local QGIS installation; a headless QgsApplication is started on first use.
+    """
+
+    name = 'qgis'
+    application = None
+
+    def __init__(self):
+        from qgis.core import QgsApplication, QgsProcessingFeedback
+
+        if QgsApplication.instance() is None:
+            Qneat3QgisBackend.application = QgsApplication([], False)
+            Qneat3QgisBackend.application.initQgis()
+        self.feedback = QgsProcessingFeedback()
+
+    def buildGraph(self, network, strategy, point_count, seed):
+        from qgis.core import QgsCoordinateReferenceSystem
+        from QNEAT3.Qneat3Framework import Qneat3Network, Qneat3AnalysisPointSet
+        from QNEAT3.Qneat3Utilities import getPointsFromArrays, readPointArrays
+
+        #the layers are rebuilt for every repetition, like the feature sources of an algorithm run
+        network_layer = network.toQgsVectorLayer()
+        point_layer = network.toQgsPointLayer(point_count, seed)
+        point_x, point_y, point_ids = readPointArrays(point_layer, 'point_id')
+        points = getPointsFromArrays(point_x, point_y)
+        self.net = Qneat3Network(network_layer, points, strategy, 'direction', network.DIRECTION_FORWARD, network.DIRECTION_BACKWARD, network.DIRECTION_BOTH, 2,
+                                 QgsCoordinateReferenceSystem(network.CRS), 'speed', 5.0, 0.0, self.feedback)
+        self.analysis_points = Qneat3AnalysisPointSet.fromArrays("point", point_ids, point_x, point_y, self.net, self.net.list_tiedPoints, 1, self.feedback)
+        self.point_vertex_ids = self.analysis_points.vertex_ids.tolist()
+
+    def dijkstra(self, vertex_id):
+        return self.net.calcDijkstra(vertex_id, 0)
+
+    def isoPoints(self, max_cost):
+        return self.net.calcIsoPoints(self.analysis_points, max_cost)
+
+    def interpolation(self, iso_points, cell_size):
+        return self.net.calcIsoTinInterpolation(iso_points, cell_size)
+
+    def contouring(self, raster, levels):
+        return self.net.calcIsoPolygons(levels[-1], levels[0], raster)
+
+    def odMatrix(self):
+        return [self.net.calcNetworkCosts(vertex_id, self.point_vertex_ids) for vertex_id in self.point_vertex_ids]
+
+
+BACKENDS = OrderedDict([('array', Qneat3ArrayBackend), ('qgis', Qneat3QgisBackend)])
+
+
+def measure(function, repeats):
+    """Calls function repeats times and returns (last result, timing dictionary with minimum and median times)"""
+    wall_times = []
+    cpu_times = []
+    result = None
+    for i in range(repeats):
+        start_wall = perf_counter()
+        start_cpu = process_time()
+        result = function()
+        wall_times.append(perf_counter() - start_wall)
+        cpu_times.append(process_time() - start_cpu)
+    timing = OrderedDict([('repeats', repeats),
+                          ('wall_time_min', min(wall_times)),
+                          ('wall_time_median', median(wall_times)),
+                          ('cpu_time_median', median(cpu_times)),
+                          ('peak_memory_mb', toMegabytes(peakMemory()))])
+    return result, timing
+
+
+def pluginVersion():
+    metadata = ConfigParser(interpolation=None)
+    metadata.read(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'metadata.txt'))
+    return metadata.get('general', 'version', fallback=None)
+
+
+def runBenchmarks(backend_name='array', kinds=None, sizes=(10000, 100000, 1000000), seed=0, repeats=3, strategy=0, sources=5, points=50,
+                  max_cost=2000.0, interval=500.0, cell_size=25.0, log=print):
+    """
+    Runs all LAYERS on every combination of network kind and size and returns the report as dictionary. sources is the number of
+    single Dijkstra runs timed together, points the number of analysis points of the iso-area and OD matrix layers.
+    """
+    backend = BACKENDS[backend_name]()
+    kinds = kinds or Qneat3SyntheticNetwork.KINDS
+    levels = numpy.arange(interval, max_cost + interval / 2.0, interval).tolist()
+
+    report = OrderedDict()
+    report['format'] = REPORT_FORMAT
+    report['format_version'] = REPORT_VERSION
+    report['plugin_version'] = pluginVersion()
+    report['backend'] = backend_name
+    report['start_time'] = time.strftime("%Y-%m-%d %H:%M:%S")
+    report['python_version'] = platform.python_version()
+    report['numpy_version'] = numpy.__version__
+    report['platform'] = platform.platform()
+    report['settings'] = OrderedDict([('kinds', list(kinds)), ('sizes', list(sizes)), ('seed', seed), ('repeats', repeats), ('strategy', strategy), ('sources', sources),
+                                      ('points', points), ('max_cost', max_cost), ('interval', interval), ('cell_size', cell_size)])
+    report['results'] = []
+
+    for kind in kinds:
+        for size in sizes:
+            network = Qneat3SyntheticNetwork.generate(kind, size, seed)
+            edge_count = len(network.edges(strategy)[0])
+            log("[QNEAT3Benchmark] {} network: {} vertices, {} roads, {} edges".format(kind, network.vertex_count, network.road_count, edge_count))
+
+            source_vertex_ids = network.samplePoints(sources, seed + 1)[0].tolist()
+            functions = OrderedDict([('graph build', lambda: backend.buildGraph(network, strategy, points, seed)),
+                                  ('dijkstra', lambda: [backend.dijkstra(vertex_id) for vertex_id in source_vertex_ids]),
+                                  ('iso points', lambda: backend.isoPoints(max_cost * 1.1)),
+                                  ('interpolation', lambda: backend.interpolation(results['iso points'], cell_size)),
+                                  ('contouring', lambda: backend.contouring(results['interpolation'], levels)),
+                                  ('od matrix', lambda: backend.odMatrix())])
+            results = {}
+            for layer, function in functions.items():
+                entry = OrderedDict([('network', kind), ('target_roads', size), ('seed', seed), ('vertices', network.vertex_count), ('roads', network.road_count),
+                                     ('edges', edge_count), ('layer', layer)])
+                if layer in LAYER_INPUTS and LAYER_INPUTS[layer] not in results:
+                    entry['skipped'] = 'requires {}'.format(LAYER_INPUTS[layer])
+                    report['results'].append(entry)
+                    continue
+                try:
+                    results[layer], timing = measure(function, repeats)
+                    entry.update(timing)
+                    log("[QNEAT3Benchmark] {} {} {}: {:.3f} s (median of {})".format(kind, size, layer, timing['wall_time_median'], repeats))
+                except ImportError as error:
+                    #eg. no triangulation available without scipy and QGIS
+                    entry['skipped'] = str(error)
+                    log("[QNEAT3Benchmark] {} {} {}: skipped ({})".format(kind, size, layer, error))
+                report['results'].append(entry)
+    return report
+
+
+def writeReport(report, path):
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+
+
+def readReport(path):
+    with open(path) as report_file:
+        report = json.load(report_file)
+    if report.get('format') != REPORT_FORMAT:
+        raise ValueError('{} is not a QNEAT3 benchmark report'.format(path))
+    return report
+
+
+def compareReports(baseline, current, threshold=0.1):
+    """
+    Compares the median wall times of two reports, matched by backend, network, size and layer. Returns a list of
+    (network, size, layer, baseline time, current time, ratio, status) rows; status is 'regression' or 'improvement'
+    if the time changed by more than threshold (relative), 'unchanged', 'missing' (only in baseline) or 'new'.
+    """
+    def entries(report):
+        return OrderedDict(((report['backend'], entry['network'], entry['target_roads'], entry['layer']), entry) for entry in report['results'] if 'skipped' not in entry)
+
+    baseline_entries = entries(baseline)
+    current_entries = entries(current)
+    rows = []
+    for key in list(baseline_entries) + [key for key in current_entries if key not in baseline_entries]:
+        backend, network, size, layer = key
+        baseline_time = baseline_entries[key]['wall_time_median'] if key in baseline_entries else None
+        current_time = current_entries[key]['wall_time_median'] if key in current_entries else None
+        if current_time is None:
+            rows.append((network, size, layer, baseline_time, None, None, 'missing'))
+            continue
+        if baseline_time is None:
+            rows.append((network, size, layer, None, current_time, None, 'new'))
+            continue
+        ratio = current_time / baseline_time if baseline_time > 0 else float('inf')
+        status = 'regression' if ratio > 1.0 + threshold else 'improvement' if ratio < 1.0 - threshold else 'unchanged'
+        rows.append((network, size, layer, baseline_time, current_time, ratio, status))
+    return rows
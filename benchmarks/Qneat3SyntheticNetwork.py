@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    Qneat3SyntheticNetwork.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from math import ceil, pi, sqrt
+
+from numpy import arange, argsort, asarray, bincount, concatenate, cos, cumsum, float64, floor, hypot, int32, int64, repeat, roll, sin, zeros
+from numpy.random import default_rng
+
+from QNEAT3.Qneat3ArrayGraph import Qneat3ArrayGraph
+
+
+class Qneat3SyntheticNetwork():
+    """
+    Qneat3SyntheticNetwork:
+    Reproducible synthetic road network held as numpy arrays: one straight road per edge with a direction
+    attribute (as used by QgsVectorLayerDirector) and a speed attribute in km/h. Networks are generated
+    from a seed, so the same kind, size and seed always yield the same network.
+    """
+
+    DIRECTION_FORWARD = 'F'
+    DIRECTION_BACKWARD = 'B'
+    DIRECTION_BOTH = 'BOTH'
+    DIRECTIONS = [DIRECTION_BOTH, DIRECTION_FORWARD, DIRECTION_BACKWARD]
+    DIRECTION_SHARES = [0.8, 0.1, 0.1]
+    SPEEDS = [30.0, 50.0, 70.0, 100.0]
+    SPEED_SHARES = [0.4, 0.35, 0.15, 0.1]
+    CRS = 'EPSG:32633' #projected (UTM 33N), the iso-area algorithms require metric coordinates
+    ORIGIN = (500000.0, 5300000.0)
+    SPACING = 100.0 #mean distance between neighbouring vertices in meters
+
+    KINDS = ['grid', 'random', 'radial']
+
+    def __init__(self, kind, vertex_x, vertex_y, road_from, road_to, direction_ids, speeds):
+        self.kind = kind
+        self.vertex_x = vertex_x
+        self.vertex_y = vertex_y
+        self.road_from = road_from
+        self.road_to = road_to
+        self.direction_ids = direction_ids #index of DIRECTIONS per road
+        self.speeds = speeds
+
+        self.vertex_count = len(vertex_x)
+        self.road_count = len(road_from)
+
+    @classmethod
+    def generate(cls, kind, road_count, seed=0):
+        """Generates a network of the given kind (one of KINDS) with approximately road_count roads"""
+        if kind == 'grid':
+            return cls.gridNetwork(road_count, seed)
+        if kind == 'random':
+            return cls.randomGeometricNetwork(road_count, seed)
+        if kind == 'radial':
+            return cls.radialNetwork(road_count, seed)
+        raise ValueError('Unknown network kind: {} (expected one of {})'.format(kind, ', '.join(cls.KINDS)))
+
+    @classmethod
+    def gridNetwork(cls, road_count, seed=0):
+        """Square grid of n x n vertices with 2n(n-1) roads, slightly jittered to avoid degenerated triangulations"""
+        rng = default_rng(seed)
+        n = max(2, int(ceil(sqrt(road_count / 2.0))) + 1)
+        vertex_ids = arange(n * n, dtype=int32).reshape(n, n)
+        rows, cols = vertex_ids // n, vertex_ids % n
+
+        vertex_x = cls.ORIGIN[0] + (cols.ravel() + rng.uniform(-0.2, 0.2, n * n)) * cls.SPACING
+        vertex_y = cls.ORIGIN[1] + (rows.ravel() + rng.uniform(-0.2, 0.2, n * n)) * cls.SPACING
+        road_from = concatenate((vertex_ids[:, :-1].ravel(), vertex_ids[:-1, :].ravel()))
+        road_to = concatenate((vertex_ids[:, 1:].ravel(), vertex_ids[1:, :].ravel()))
+        return cls.withAttributes('grid', vertex_x, vertex_y, road_from, road_to, rng)
+
+    @classmethod
+    def randomGeometricNetwork(cls, road_count, seed=0):
+        """
+        Random geometric graph: uniformly distributed vertices, connected to all vertices within a radius chosen
+        for a mean degree of six. Vertex pairs are searched in a grid of radius-sized cells.
+        """
+        rng = default_rng(seed)
+        vertex_count = max(3, road_count // 3)
+        side = sqrt(vertex_count) * cls.SPACING
+        radius = sqrt(6.0 * side * side / (vertex_count * pi))
+
+        x = rng.uniform(0.0, side, vertex_count)
+        y = rng.uniform(0.0, side, vertex_count)
+        cell_count = max(1, int(side / radius)) #cells are at least radius wide
+        cell_col = floor(x / side * cell_count).clip(0, cell_count - 1).astype(int64)
+        cell_row = floor(y / side * cell_count).clip(0, cell_count - 1).astype(int64)
+
+        #sort the vertices by cell, so the vertices of every cell are a contiguous range of vertex ids
+        order = argsort(cell_row * cell_count + cell_col, kind='stable')
+        x, y, cell_col, cell_row = x[order], y[order], cell_col[order], cell_row[order]
+        road_from, road_to = cls.pairsWithinRadius(x, y, cell_col, cell_row, cell_count, radius)
+        return cls.withAttributes('random', cls.ORIGIN[0] + x, cls.ORIGIN[1] + y, road_from, road_to, rng)
+
+    @staticmethod
+    def pairsWithinRadius(x, y, cell_col, cell_row, cell_count, radius):
+        """Returns (from, to) vertex id arrays of all vertex pairs closer than radius. The vertices must be sorted by cell."""
+        cell_sizes = bincount(cell_row * cell_count + cell_col, minlength=cell_count * cell_count)
+        cell_starts = concatenate(([0], cumsum(cell_sizes)))
+        vertex_ids = arange(len(x), dtype=int64)
+
+        road_from = []
+        road_to = []
+        #every pair of neighbouring cells is visited once: the cell itself and four of its eight neighbours
+        for col_offset, row_offset in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+            neighbour_col = cell_col + col_offset
+            neighbour_row = cell_row + row_offset
+            valid = (neighbour_col >= 0) & (neighbour_col < cell_count) & (neighbour_row < cell_count)
+            neighbour_cells = neighbour_row[valid] * cell_count + neighbour_col[valid]
+            counts = cell_sizes[neighbour_cells]
+
+            candidate_from = repeat(vertex_ids[valid], counts)
+            candidate_to = repeat(cell_starts[neighbour_cells], counts) + arange(counts.sum(), dtype=int64) - repeat(cumsum(counts) - counts, counts)
+            within = hypot(x[candidate_from] - x[candidate_to], y[candidate_from] - y[candidate_to]) <= radius
+            if col_offset == 0 and row_offset == 0:
+                within = within & (candidate_to > candidate_from)
+            road_from.append(candidate_from[within])
+            road_to.append(candidate_to[within])
+        return concatenate(road_from).astype(int32), concatenate(road_to).astype(int32)
+
+    @classmethod
+    def radialNetwork(cls, road_count, seed=0):
+        """Concentric ring roads crossed by radial spokes: R rings with 4R spokes each, 8R^2 roads around one centre vertex"""
+        rng = default_rng(seed)
+        ring_count = max(1, int(round(sqrt(road_count / 8.0))))
+        spoke_count = 4 * ring_count
+
+        ring = repeat(arange(1, ring_count + 1), spoke_count)
+        angle = (arange(ring_count * spoke_count) % spoke_count) * (2.0 * pi / spoke_count)
+        vertex_x = cls.ORIGIN[0] + concatenate(([0.0], ring * cls.SPACING * cos(angle)))
+        vertex_y = cls.ORIGIN[1] + concatenate(([0.0], ring * cls.SPACING * sin(angle)))
+
+        #vertex 0 is the centre, vertex 1 + (r-1)*spoke_count + s lies on ring r and spoke s
+        ring_vertices = arange(1, ring_count * spoke_count + 1, dtype=int32).reshape(ring_count, spoke_count)
+        road_from = concatenate((ring_vertices.ravel(),
+                                 zeros(spoke_count, dtype=int32),
+                                 ring_vertices[:-1, :].ravel()))
+        road_to = concatenate((roll(ring_vertices, -1, axis=1).ravel(),
+                               ring_vertices[0, :],
+                               ring_vertices[1:, :].ravel()))
+        return cls.withAttributes('radial', vertex_x, vertex_y, road_from, road_to, rng)
+
+    @classmethod
+    def withAttributes(cls, kind, vertex_x, vertex_y, road_from, road_to, rng):
+        """Assigns random directions and speeds to the roads"""
+        direction_ids = rng.choice(len(cls.DIRECTIONS), size=len(road_from), p=cls.DIRECTION_SHARES).astype(int32)
+        speeds = rng.choice(cls.SPEEDS, size=len(road_from), p=cls.SPEED_SHARES)
+        return cls(kind, asarray(vertex_x, dtype=float64), asarray(vertex_y, dtype=float64), asarray(road_from, dtype=int32), asarray(road_to, dtype=int32), direction_ids, speeds)
+
+    def roadLengths(self):
+        return hypot(self.vertex_x[self.road_to] - self.vertex_x[self.road_from], self.vertex_y[self.road_to] - self.vertex_y[self.road_from])
+
+    def edges(self, strategy=0):
+        """
+        Returns the directed edges (from, to, cost) the QGIS graph builder creates from the roads: two edges for roads open in both
+        directions, one otherwise. The cost is the length (strategy 0) or the travel time in seconds at the road speed (strategy 1).
+        """
+        costs = self.roadLengths()
+        if strategy == 1:
+            costs = costs / (self.speeds * (1000.0 / 3600.0))
+        forward = self.direction_ids != self.DIRECTIONS.index(self.DIRECTION_BACKWARD)
+        backward = self.direction_ids != self.DIRECTIONS.index(self.DIRECTION_FORWARD)
+        edge_from = concatenate((self.road_from[forward], self.road_to[backward]))
+        edge_to = concatenate((self.road_to[forward], self.road_from[backward]))
+        return edge_from, edge_to, concatenate((costs[forward], costs[backward]))
+
+    def toArrayGraph(self, strategy=0):
+        """Returns the network as Qneat3ArrayGraph, the stand-in for a QgsGraph built by Qneat3Network"""
+        return Qneat3ArrayGraph(self.vertex_x, self.vertex_y, *self.edges(strategy))
+
+    def samplePoints(self, count, seed=0):
+        """Returns (vertex ids, x, y) of count analysis points placed off the network within half a spacing of random vertices"""
+        rng = default_rng(seed)
+        vertex_ids = rng.choice(self.vertex_count, size=min(count, self.vertex_count), replace=False).astype(int32)
+        x = self.vertex_x[vertex_ids] + rng.uniform(-0.5, 0.5, len(vertex_ids)) * self.SPACING
+        y = self.vertex_y[vertex_ids] + rng.uniform(-0.5, 0.5, len(vertex_ids)) * self.SPACING
+        return vertex_ids, x, y
+
+    def toQgsVectorLayer(self, batch_size=100000):
+        """Returns the roads as memory QgsVectorLayer with direction and speed fields (requires QGIS)"""
+        from qgis.core import QgsFeature, QgsGeometry, QgsPointXY, QgsVectorLayer
+
+        layer = QgsVectorLayer('LineString?crs={}&field=direction:string(4)&field=speed:double'.format(self.CRS), '{}_network'.format(self.kind), 'memory')
+        provider = layer.dataProvider()
+        fields = layer.fields()
+        vertex_x = self.vertex_x.tolist()
+        vertex_y = self.vertex_y.tolist()
+        road_from = self.road_from.tolist()
+        road_to = self.road_to.tolist()
+        direction_ids = self.direction_ids.tolist()
+        speeds = self.speeds.tolist()
+
+        for batch_start in range(0, self.road_count, batch_size):
+            features = []
+            for i in range(batch_start, min(batch_start + batch_size, self.road_count)):
+                feat = QgsFeature(fields)
+                feat.setGeometry(QgsGeometry.fromPolylineXY([QgsPointXY(vertex_x[road_from[i]], vertex_y[road_from[i]]), QgsPointXY(vertex_x[road_to[i]], vertex_y[road_to[i]])]))
+                feat['direction'] = self.DIRECTIONS[direction_ids[i]]
+                feat['speed'] = speeds[i]
+                features.append(feat)
+            provider.addFeatures(features)
+        return layer
+
+    def toQgsPointLayer(self, count, seed=0):
+        """Returns count sampled analysis points as memory QgsVectorLayer with a point_id field (requires QGIS)"""
+        from qgis.core import QgsFeature, QgsGeometry, QgsPointXY, QgsVectorLayer
+
+        layer = QgsVectorLayer('Point?crs={}&field=point_id:integer'.format(self.CRS), '{}_points'.format(self.kind), 'memory')
+        features = []
+        for point_id, (x, y) in enumerate(zip(*[coordinates.tolist() for coordinates in self.samplePoints(count, seed)[1:]])):
+            feat = QgsFeature(layer.fields())
+            feat.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+            feat['point_id'] = point_id
+            features.append(feat)
+        layer.dataProvider().addFeatures(features)
+        return layer
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    __init__.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Benchmark suite of QNEAT3: synthetic grid, random geometric and radial road networks and a runner timing
+graph build, Dijkstra, iso points, interpolation, contouring and OD matrices across network sizes.
+Run it from the directory containing the QNEAT3 plugin folder:
+
+    python -m QNEAT3.benchmarks run --sizes 10000 100000 --output report.json
+    python -m QNEAT3.benchmarks compare baseline.json report.json
+"""
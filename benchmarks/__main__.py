@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    __main__.py
+    ---------------------
+
+    Date                 : October 2026
+    Copyright            : (C) 2026 by Clemens Raffler
+    Email                : clemens dot raffler at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import argparse
+import sys
+
+from QNEAT3.benchmarks.Qneat3Benchmark import BACKENDS, compareReports, readReport, runBenchmarks, writeReport
+from QNEAT3.benchmarks.Qneat3SyntheticNetwork import Qneat3SyntheticNetwork
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m QNEAT3.benchmarks', description='QNEAT3 benchmark suite on synthetic road networks')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks and write a JSON report')
+    run_parser.add_argument('--backend', choices=list(BACKENDS), default='array', help='graph backend: QGIS (requires a local installation) or the numpy stand-in (default)')
+    run_parser.add_argument('--networks', nargs='+', choices=Qneat3SyntheticNetwork.KINDS, default=Qneat3SyntheticNetwork.KINDS)
+    run_parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000, 1000000], help='approximate number of roads per network')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--repeats', type=int, default=3)
+    run_parser.add_argument('--strategy', type=int, choices=[0, 1], default=0, help='0 = shortest (distance), 1 = fastest (time)')
+    run_parser.add_argument('--sources', type=int, default=5, help='number of single Dijkstra runs')
+    run_parser.add_argument('--points', type=int, default=50, help='number of analysis points for iso-areas and OD matrices')
+    run_parser.add_argument('--max-cost', type=float, default=2000.0)
+    run_parser.add_argument('--interval', type=float, default=500.0)
+    run_parser.add_argument('--cell-size', type=float, default=25.0)
+    run_parser.add_argument('--output', required=True, help='path of the JSON report')
+
+    compare_parser = subparsers.add_parser('compare', help='compare two JSON reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='relative change of the median wall time treated as regression (default 0.1)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = runBenchmarks(args.backend, args.networks, args.sizes, args.seed, args.repeats, args.strategy, args.sources, args.points,
+                               args.max_cost, args.interval, args.cell_size)
+        writeReport(report, args.output)
+        print("[QNEAT3Benchmark] Report written to {}".format(args.output))
+        return 0
+
+    rows = compareReports(readReport(args.baseline), readReport(args.current), args.threshold)
+    print("{:8} {:>9} {:14} {:>10} {:>10} {:>7}  {}".format('network', 'size', 'layer', 'baseline', 'current', 'ratio', 'status'))
+    for network, size, layer, baseline_time, current_time, ratio, status in rows:
+        print("{:8} {:>9} {:14} {:>10} {:>10} {:>7}  {}".format(network, size, layer,
+                                                                '-' if baseline_time is None else '{:.3f}'.format(baseline_time),
+                                                                '-' if current_time is None else '{:.3f}'.format(current_time),
+                                                                '-' if ratio is None else '{:.2f}'.format(ratio), status))
+    return 1 if any(row[6] == 'regression' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
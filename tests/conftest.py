@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Makes the plugin importable as package QNEAT3 (like in the QGIS plugin folder) for tests run from any checkout.
+The directory is put on sys.path, so worker processes spawned by the tests can import it as well.
+"""
+
+import os
+import sys
+import tempfile
+
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.basename(plugin_dir) == 'QNEAT3':
+    sys.path.insert(0, os.path.dirname(plugin_dir))
+else:
+    package_dir = tempfile.mkdtemp(prefix='qneat3_tests_')
+    os.symlink(plugin_dir, os.path.join(package_dir, 'QNEAT3'))
+    sys.path.insert(0, package_dir)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from numpy import float64, inf
+
+from QNEAT3.Qneat3Cache import Qneat3DijkstraTreeCache
+
+
+def testTreeCacheKeepsCosts():
+    cache = Qneat3DijkstraTreeCache()
+    cost = [0.0, 1234567.891234, 0.1 + 0.2, inf]
+    cache.put('graph', 0, 0, [-1, 0, 1, -1], cost)
+    tree, cached_cost = cache.get('graph', 0, 0)
+    assert cached_cost.dtype == float64
+    assert cached_cost.tolist() == cost
+    assert tree.tolist() == [-1, 0, 1, -1]
+    assert not tree.flags.writeable and not cached_cost.flags.writeable
+
+
+def testTreeCacheIsBoundToTheGraph():
+    cache = Qneat3DijkstraTreeCache()
+    cache.put('graph', 0, 0, [-1, 0], [0.0, 1.0])
+    assert cache.get('other graph', 0, 0) is None
+    assert cache.get('graph', 1, 0) is None
+    assert cache.get('graph', 0, 0) is not None
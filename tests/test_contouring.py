@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from math import pi
+
+from numpy import abs as absolute, arange, hypot, mgrid, roll, sin
+
+from QNEAT3.Qneat3Contouring import contourAreas, contourLevels, contourLines, contourPolygons
+
+GEOTRANSFORM = (0.0, 1.0, 0.0, 0.0, 0.0, -1.0) #cells of 1 x 1 map units
+
+
+def ringArea(x, y):
+    return abs(0.5 * float((x * roll(y, -1) - roll(x, -1) * y).sum()))
+
+
+def polygonsArea(polygons):
+    return sum(ringArea(*shell) - sum(ringArea(*hole) for hole in holes) for shell, holes in polygons)
+
+
+def testPlaneAreas():
+    rows, cols = mgrid[0:50, 0:80]
+    levels = [10.5, 20.5, 50.0]
+    areas = contourAreas(cols.astype(float), GEOTRANSFORM, levels)
+    #the areas reach from the first to the last cell centre
+    for level, polygons in zip(levels, areas):
+        assert len(polygons) == 1
+        assert absolute(polygonsArea(polygons) - 49 * level) < 1e-3
+
+
+def testConeAreas():
+    rows, cols = mgrid[0:301, 0:301]
+    values = hypot(rows - 150.0, cols - 150.0)
+    levels = [25.0, 50.0, 100.0]
+    for level, polygons in zip(levels, contourAreas(values, GEOTRANSFORM, levels)):
+        assert abs(polygonsArea(polygons) / (pi * level**2) - 1.0) < 0.005
+
+
+def testBandsAndLevelsMatchSingleLevels():
+    rows, cols = mgrid[0:120, 0:160]
+    values = hypot(rows - 40.0, cols - 70.0) + 15 * sin(cols / 7.0) * sin(rows / 9.0)
+    values[:3, :] = 5.0 #touching the border
+    levels = arange(10.0, 160.0, 10.0).tolist()
+
+    areas = contourAreas(values, GEOTRANSFORM, levels)
+    bands = contourAreas(values, GEOTRANSFORM, levels, bands=True)
+    previous_area = 0.0
+    for level, polygons, band in zip(levels, areas, bands):
+        area = polygonsArea(polygons)
+        assert abs(area - polygonsArea(contourPolygons(values, GEOTRANSFORM, level))) < 1e-3
+        assert abs(polygonsArea(band) - (area - previous_area)) < 1e-3
+        previous_area = area
+    #the last levels cover the whole array, their bands add nothing
+    assert bands[-1] == []
+
+    for level, lines in zip(levels, contourLevels(values, GEOTRANSFORM, levels)):
+        single_lines = contourLines(values, GEOTRANSFORM, level)
+        assert sorted(len(x) for x, y in lines) == sorted(len(x) for x, y in single_lines)
+        assert abs(sum(x.sum() + y.sum() for x, y in lines) - sum(x.sum() + y.sum() for x, y in single_lines)) < 1e-6
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from numpy import asarray, concatenate, int64, isin, nonzero
+from numpy.testing import assert_allclose
+
+from QNEAT3.Qneat3ArrayGraph import Qneat3ArrayGraph
+from QNEAT3.benchmarks.Qneat3SyntheticNetwork import Qneat3SyntheticNetwork
+
+NETWORK = {'strategy': 1, 'direction_field': 'direction', 'value_forward': Qneat3SyntheticNetwork.DIRECTION_FORWARD,
+           'value_backward': Qneat3SyntheticNetwork.DIRECTION_BACKWARD, 'value_both': Qneat3SyntheticNetwork.DIRECTION_BOTH,
+           'default_direction': 'both', 'speed_field': 'speed', 'default_speed': 5.0, 'tolerance': 0.0}
+
+
+def featureGraph(network, road_ids):
+    """Returns the time graph of the synthetic network with the given road ids as feature ids of the edges"""
+    edge_from, edge_to, edge_cost = network.edges(1)
+    forward = network.direction_ids != network.DIRECTIONS.index(network.DIRECTION_BACKWARD)
+    backward = network.direction_ids != network.DIRECTIONS.index(network.DIRECTION_FORWARD)
+    return Qneat3ArrayGraph(network.vertex_x, network.vertex_y, edge_from, edge_to, edge_cost,
+                            edge_features=concatenate((road_ids[forward], road_ids[backward])))
+
+
+def roads(network, road_ids, speeds=None):
+    return Qneat3SyntheticNetwork(network.kind, network.vertex_x, network.vertex_y, network.road_from[road_ids], network.road_to[road_ids],
+                                  network.direction_ids[road_ids], network.speeds[road_ids] if speeds is None else speeds)
+
+
+def edgeSet(graph):
+    return sorted(zip(graph.edge_from.tolist(), graph.edge_to.tolist(), graph.edge_cost.tolist(), graph.edge_features.tolist()))
+
+
+def testPatchingByFeatureIdsMatchesRebuild():
+    network = Qneat3SyntheticNetwork.generate('grid', 400, seed=1)
+    road_ids = asarray(range(network.road_count), dtype=int64)
+    graph = featureGraph(network, road_ids)
+    changed_ids = asarray([3, 17, 250], dtype=int64)
+    deleted_ids = asarray([5, 120], dtype=int64)
+    new_speeds = asarray([10.0, 130.0, 30.0])
+
+    #the edited network, built again from scratch
+    kept_ids = nonzero(~isin(road_ids, deleted_ids))[0]
+    speeds = network.speeds.copy()
+    speeds[changed_ids] = new_speeds
+    rebuilt = featureGraph(roads(network, kept_ids, speeds[kept_ids]), kept_ids)
+
+    #the graph patched by the feature ids of its edges
+    changed_graph = featureGraph(roads(network, changed_ids, new_speeds), changed_ids)
+    removed_edge_ids = nonzero(isin(graph.edge_features, concatenate((changed_ids, deleted_ids))))[0]
+    patched = graph.patched(removed_edge_ids, (), (), changed_graph.edge_from, changed_graph.edge_to, changed_graph.edge_cost, changed_graph.edge_features)
+
+    assert edgeSet(patched) == edgeSet(rebuilt)
+    for start_vertex_id in (0, 57, 255):
+        assert_allclose(patched.dijkstra(start_vertex_id)[1], rebuilt.dijkstra(start_vertex_id)[1])
+
+
+@pytest.fixture
+def qgis():
+    pytest.importorskip('qgis.core')
+    from QNEAT3.Qneat3BatchRunner import startQgis
+    application = startQgis()
+    yield
+    if application is not None:
+        application.exitQgis()
+
+
+def testUpdaterMatchesRebuild(qgis):
+    from qgis.core import QgsFeature, QgsGeometry, QgsPointXY
+    from QNEAT3.Qneat3BatchRunner import Qneat3ConsoleFeedback, createNetwork
+    from QNEAT3.Qneat3GraphUpdate import Qneat3GraphUpdater
+
+    feedback = Qneat3ConsoleFeedback(quiet=True)
+    network = Qneat3SyntheticNetwork.generate('grid', 400, seed=1)
+    layer = network.toQgsVectorLayer()
+    graph = createNetwork(NETWORK, layer, [], feedback, edge_features=True).getArrayGraph()
+    assert sorted(set(graph.edge_features.tolist())) == [feature.id() for feature in layer.getFeatures()]
+
+    def point(vertex_id):
+        return QgsPointXY(float(network.vertex_x[vertex_id]), float(network.vertex_y[vertex_id]))
+
+    #memory layer feature ids start at 1: feature id = road id + 1
+    provider = layer.dataProvider()
+    speed_field_id = layer.fields().indexOf('speed')
+    provider.changeAttributeValues({1: {speed_field_id: 0.0}, 2: {speed_field_id: -10.0}, 3: {speed_field_id: None}})
+    bend = QgsPointXY(point(network.road_from[3]).x() + 30.0, point(network.road_from[3]).y() + 40.0)
+    provider.changeGeometryValues({4: QgsGeometry.fromPolylineXY([point(network.road_from[3]), bend, point(network.road_to[3])])})
+    provider.deleteFeatures([5])
+    added = QgsFeature(layer.fields())
+    added.setGeometry(QgsGeometry.fromPolylineXY([point(0), QgsPointXY(point(0).x() - 70.0, point(0).y() + 20.0), point(255)]))
+    added['direction'] = network.DIRECTION_BOTH
+    added['speed'] = 50.0
+    added_id = provider.addFeatures([added])[1][0].id()
+
+    patched, summary = Qneat3GraphUpdater.fromNetworkSettings(NETWORK, layer, feedback).update(graph, [1, 2, 3, 4], [added_id], [5])
+    rebuilt = createNetwork(NETWORK, layer, [], feedback, edge_features=True).getArrayGraph()
+
+    assert patched.edge_count == rebuilt.edge_count
+    assert sorted(patched.edge_features.tolist()) == sorted(rebuilt.edge_features.tolist())
+    #vertex ids differ between the graphs: match them by their coordinates
+    patched_vertex_ids = {(x, y): vertex_id for vertex_id, (x, y) in enumerate(zip(patched.vertex_x.tolist(), patched.vertex_y.tolist()))}
+    vertex_map = asarray([patched_vertex_ids[(x, y)] for x, y in zip(rebuilt.vertex_x.tolist(), rebuilt.vertex_y.tolist())])
+    for start_vertex_id in (0, 57, 255):
+        assert_allclose(patched.dijkstra(int(vertex_map[start_vertex_id]))[1][vertex_map], rebuilt.dijkstra(start_vertex_id)[1], rtol=1e-9)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+from numpy import allclose, isinf
+
+from QNEAT3.Qneat3Cache import graphFingerprint
+from QNEAT3.Qneat3HubLabeling import Qneat3HubLabelIndex
+from QNEAT3.benchmarks.Qneat3SyntheticNetwork import Qneat3SyntheticNetwork
+
+
+def syntheticGraph(kind, strategy):
+    return Qneat3SyntheticNetwork.generate(kind, 400, seed=3).toArrayGraph(strategy)
+
+
+def assertDijkstraCosts(index, array_graph):
+    targets = list(range(array_graph.vertex_count))
+    for vertex_id in range(0, array_graph.vertex_count, 17):
+        costs = index.calcCosts(vertex_id, targets)
+        dijkstra_costs = array_graph.dijkstra(vertex_id)[1]
+        assert (isinf(costs) == isinf(dijkstra_costs)).all()
+        assert allclose(costs[~isinf(costs)], dijkstra_costs[~isinf(dijkstra_costs)])
+
+
+def testCostsMatchDijkstra():
+    #the synthetic networks have one-way roads, the random geometric one unconnected parts as well
+    for kind, strategy in (('grid', 0), ('random', 1), ('radial', 1)):
+        array_graph = syntheticGraph(kind, strategy)
+        assertDijkstraCosts(Qneat3HubLabelIndex.build(array_graph), array_graph)
+
+
+def testSaveAndLoad(tmp_path):
+    array_graph = syntheticGraph('random', 1)
+    index = Qneat3HubLabelIndex.build(array_graph)
+    path = str(tmp_path / 'graph.qhl')
+    index.save(path)
+    loaded = Qneat3HubLabelIndex.load(path)
+    assert (loaded.vertex_count, loaded.edge_count) == (array_graph.vertex_count, array_graph.edge_count)
+    #the same graph with the costs of the other strategy must not match the index
+    assert loaded.fingerprint == graphFingerprint(array_graph) != graphFingerprint(syntheticGraph('random', 0))
+    assertDijkstraCosts(loaded, array_graph)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+from numpy import arange, array, array_equal, float64, int32, int64
+
+from QNEAT3.Qneat3RawArrays import mapRawArrays, readRawHeader, writeRawArrays
+
+HEADER = '<4sIq' #odd size, the first array has to be aligned
+
+
+def testRoundTrip(tmp_path):
+    path = str(tmp_path / 'arrays.bin')
+    offsets = arange(6, dtype=int64)
+    ids = array([3, 1, 2], dtype=int32) #12 bytes, followed by padding
+    costs = array([0.5, 1.5, 2.5, 3.5], dtype=float64)
+    writeRawArrays(path, HEADER, (b'TEST', 1, 42), [(offsets, int64), (ids, int32), ([], float64), (costs, float64)])
+
+    assert readRawHeader(path, HEADER) == (b'TEST', 1, 42)
+    mapped = mapRawArrays(path, HEADER, [(6, int64), (3, int32), (0, float64), (4, float64)])
+    for written, read in zip([offsets, ids, array([], dtype=float64), costs], mapped):
+        assert read.dtype == written.dtype
+        assert array_equal(read, written)
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith('.tmp')]
+
+
+def testTruncatedFile(tmp_path):
+    path = str(tmp_path / 'arrays.bin')
+    writeRawArrays(path, HEADER, (b'TEST', 1, 42), [(arange(4, dtype=int64), int64)])
+    with pytest.raises(ValueError):
+        mapRawArrays(path, HEADER, [(5, int64)])
+    with open(path, 'wb') as raw_file:
+        raw_file.write(b'TES')
+    with pytest.raises(ValueError):
+        readRawHeader(path, HEADER)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+from time import sleep
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import pytest
+from numpy import isfinite
+
+from QNEAT3.Qneat3Cache import Qneat3ResultCache
+from QNEAT3.Qneat3Server import Qneat3RoutingServer, Qneat3RoutingService
+from QNEAT3.benchmarks.Qneat3SyntheticNetwork import Qneat3SyntheticNetwork
+
+
+class RescalingService(Qneat3RoutingService):
+    """Stands in for the edits read from the network layer (which needs QGIS): every update doubles the edge costs"""
+
+    def updateNetwork(self, changed_ids=(), added_ids=(), deleted_ids=(), swap=None):
+        with self.update_lock:
+            self.replaceGraph(self.graph.withCosts(self.graph.edge_cost * 2), swap)
+        return {'changed_features': len(changed_ids)}
+
+
+def startServer(service, max_requests):
+    server = Qneat3RoutingServer(service, port=0, max_requests=max_requests, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stopServer(server):
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+
+def query(server, path, parameters=None, post=False):
+    """Returns (status, decoded JSON response) of a GET (parameters in the query string) or POST (parameters as JSON body) request"""
+    url = 'http://{}:{}{}'.format(*server.server_address[:2], path)
+    if post:
+        request = Request(url, data=json.dumps(parameters or {}).encode('utf-8'), headers={'Content-Type': 'application/json'})
+    else:
+        request = Request(url + ('?' + urlencode(parameters) if parameters else ''))
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def vertexPoint(graph, vertex_id):
+    return '{},{}'.format(graph.vertex_x[vertex_id], graph.vertex_y[vertex_id])
+
+
+@pytest.fixture
+def graph():
+    return Qneat3SyntheticNetwork.generate('grid', 400, seed=1).toArrayGraph(0)
+
+
+@pytest.fixture
+def route(graph):
+    """(origin vertex id, destination vertex id, network cost) of the most expensive shortest path from vertex 0"""
+    tree, cost = graph.dijkstra(0)
+    reached = isfinite(cost).nonzero()[0]
+    destination = int(reached[cost[reached].argmax()])
+    return 0, destination, float(cost[destination])
+
+
+def testQueries(graph, route):
+    origin, destination, network_cost = route
+    server = startServer(Qneat3RoutingService(graph), 4)
+    try:
+        status, feature = query(server, '/route', {'from': vertexPoint(graph, origin), 'to': vertexPoint(graph, destination)})
+        assert status == 200
+        assert feature['properties']['origin_vertex_id'] == origin and feature['properties']['destination_vertex_id'] == destination
+        assert feature['properties']['total_cost'] == pytest.approx(network_cost)
+        assert feature['geometry']['type'] == 'LineString'
+
+        points = [[float(graph.vertex_x[vertex_id]), float(graph.vertex_y[vertex_id])] for vertex_id in (origin, destination)]
+        status, matrix = query(server, '/od', {'from': points}, post=True)
+        assert status == 200
+        assert matrix['origin_vertex_ids'] == [origin, destination]
+        assert matrix['costs'][0][0] == 0.0 and matrix['costs'][0][1] == pytest.approx(network_cost)
+
+        status, iso_area = query(server, '/iso', {'points': vertexPoint(graph, origin), 'max_cost': network_cost / 2})
+        assert status == 200
+        tree, cost = graph.dijkstra(origin)
+        assert len(iso_area['features']) == int((cost <= network_cost / 2).sum())
+        assert max(feature['properties']['cost'] for feature in iso_area['features']) <= network_cost / 2
+
+        status, polygons = query(server, '/iso', {'points': points[:1], 'max_cost': network_cost / 2, 'interval': network_cost / 4, 'output': 'polygons', 'cell_size': 50.0}, post=True)
+        assert status == 200
+        assert [feature['properties']['cost_level'] for feature in polygons['features']] == pytest.approx([network_cost / 2, network_cost / 4])
+
+        assert query(server, '/route', {'from': vertexPoint(graph, origin)})[0] == 400
+        assert query(server, '/update')[0] == 405
+        assert query(server, '/unknown')[0] == 404
+    finally:
+        stopServer(server)
+
+
+def testBusyServerRejectsQueries(graph, route):
+    origin, destination, network_cost = route
+    server = startServer(Qneat3RoutingService(graph), 1)
+    parameters = {'from': vertexPoint(graph, origin), 'to': vertexPoint(graph, destination)}
+    try:
+        #a query in progress takes the only request slot
+        server.request_slots.acquire()
+        status, content = query(server, '/route', parameters)
+        assert status == 503 and 'error' in content
+        assert query(server, '/health')[1]['max_requests'] == 1
+        server.request_slots.release()
+        assert query(server, '/route', parameters)[0] == 200
+    finally:
+        stopServer(server)
+
+
+def testUpdateWaitsForRunningQueries(graph, route):
+    origin, destination, network_cost = route
+    service = RescalingService(graph)
+    result_cache = Qneat3ResultCache()
+    service.setupResultCache(result_cache)
+    server = startServer(service, 2)
+    parameters = {'from': vertexPoint(graph, origin), 'to': vertexPoint(graph, destination)}
+    try:
+        assert query(server, '/route', parameters)[1]['properties']['network_cost'] == pytest.approx(network_cost)
+        assert query(server, '/route', parameters)[1]['properties']['network_cost'] == pytest.approx(network_cost)
+        assert result_cache.statistics()['hits'] == 1
+
+        #a query in progress holds one slot: the update takes the free one and waits for it, new queries are rejected meanwhile
+        server.request_slots.acquire()
+        old_graph = service.graph
+        responses = []
+        update = threading.Thread(target=lambda: responses.append(query(server, '/update', {'changed': [1, 2]}, post=True)))
+        update.start()
+        for attempt in range(100):
+            if query(server, '/route', parameters)[0] == 503:
+                break
+            sleep(0.05)
+        else:
+            pytest.fail('the update did not take the free request slot')
+        sleep(0.2)
+        assert update.is_alive() and service.graph is old_graph
+
+        server.request_slots.release()
+        update.join(30)
+        assert responses == [(200, {'changed_features': 2})]
+        assert service.graph is not old_graph
+
+        #the cached path of the old graph is dropped, the new costs are calculated
+        assert result_cache.statistics()['entries'] == 0
+        hits = result_cache.statistics()['hits']
+        status, feature = query(server, '/route', parameters)
+        assert status == 200
+        assert feature['properties']['network_cost'] == pytest.approx(2 * network_cost)
+        assert query(server, '/route', parameters)[1] == feature
+        assert result_cache.statistics()['hits'] == hits + 1
+    finally:
+        stopServer(server)
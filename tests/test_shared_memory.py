@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+from multiprocessing import get_context, shared_memory
+from time import sleep
+
+import pytest
+from numpy import arange, array_equal, float64, frombuffer, int32, shares_memory, uint8
+
+from QNEAT3 import Qneat3Parallel
+from QNEAT3.Qneat3Parallel import calcBoundedCosts, createProcessPool, workerBoundedCosts
+from QNEAT3.Qneat3SharedMemory import GRAPH_ARRAYS, Qneat3SharedArrays
+from QNEAT3.benchmarks.Qneat3SyntheticNetwork import Qneat3SyntheticNetwork
+
+
+def syntheticGraph():
+    return Qneat3SyntheticNetwork.generate('grid', 400, seed=1).toArrayGraph(1)
+
+
+def isUnlinked(block_name):
+    try:
+        block = shared_memory.SharedMemory(name=block_name)
+    except FileNotFoundError:
+        return True
+    block.close()
+    return False
+
+
+def attachAndWrite(descriptor, results):
+    """Runs in a spawned process: compares the attached arrays and writes into them"""
+    with Qneat3SharedArrays.attach(descriptor) as shared_arrays:
+        results.put((shared_arrays['ids'].tolist(), shared_arrays['costs'].tolist()))
+        shared_arrays['ids'][0] = 42
+
+
+def workerArrayState(task_id):
+    """Runs in a pool worker: tells whether its graph and point arrays are views on the attached shared memory"""
+    graph = Qneat3Parallel.worker_graph
+    graph_block, points_block = [frombuffer(shared_arrays.block.buf, dtype=uint8) for shared_arrays in Qneat3Parallel.worker_shared_arrays]
+    return (all(shares_memory(getattr(graph, name), graph_block) for name in GRAPH_ARRAYS if len(getattr(graph, name)) > 0),
+            shares_memory(Qneat3Parallel.worker_points['vertex_ids'], points_block),
+            Qneat3Parallel.worker_points['vertex_ids'].tolist())
+
+
+def workerSleep(task_id):
+    sleep(0.2)
+    return task_id
+
+
+def testCreateAndAttach():
+    ids = arange(5, dtype=int32) #20 bytes, the next array has to be aligned
+    costs = arange(3, dtype=float64) / 4
+    shared_arrays = Qneat3SharedArrays.create([('ids', ids), ('costs', costs)])
+    try:
+        assert array_equal(shared_arrays['ids'], ids) and array_equal(shared_arrays['costs'], costs)
+        assert [offset % 8 for name, array_type, length, offset in shared_arrays.layout] == [0, 0]
+
+        context = get_context('spawn')
+        results = context.Queue()
+        process = context.Process(target=attachAndWrite, args=(shared_arrays.descriptor(), results))
+        process.start()
+        attached_ids, attached_costs = results.get(timeout=60)
+        process.join(60)
+        assert process.exitcode == 0
+        assert attached_ids == ids.tolist() and attached_costs == costs.tolist()
+        #no copy: the write of the other process is visible here
+        assert shared_arrays['ids'][0] == 42
+    finally:
+        block_name = shared_arrays.block.name
+        shared_arrays.unlink()
+    assert isUnlinked(block_name)
+
+
+def testPoolWorkersShareArrays():
+    array_graph = syntheticGraph()
+    pool = createProcessPool(array_graph, 2, {'vertex_ids': arange(10, dtype=int32)})
+    block_names = [shared_arrays.block.name for shared_arrays in pool.shared_arrays]
+    assert len(block_names) == 2
+    with pool:
+        graph_is_view, points_are_view, vertex_ids = pool.submit(workerArrayState, 0).result()
+        assert graph_is_view and points_are_view and vertex_ids == list(range(10))
+
+        task_id, vertex_ids, costs = pool.submit(workerBoundedCosts, 7, 3, 500.0).result()
+        expected_vertex_ids, expected_costs = calcBoundedCosts(array_graph, 3, 500.0)
+        assert task_id == 7
+        assert array_equal(vertex_ids, expected_vertex_ids) and array_equal(costs, expected_costs)
+    assert all(isUnlinked(block_name) for block_name in block_names)
+
+
+def testPoolUnlinksOnException():
+    pool = createProcessPool(syntheticGraph(), 2)
+    block_names = [shared_arrays.block.name for shared_arrays in pool.shared_arrays]
+    with pytest.raises(RuntimeError):
+        with pool:
+            pool.submit(workerSleep, 0).result()
+            raise RuntimeError('task failed')
+    assert block_names and all(isUnlinked(block_name) for block_name in block_names)
+
+
+def testPoolUnlinksOnCancel():
+    pool = createProcessPool(syntheticGraph(), 1)
+    block_names = [shared_arrays.block.name for shared_arrays in pool.shared_arrays]
+    futures = [pool.submit(workerSleep, task_id) for task_id in range(20)]
+    futures[0].result()
+    pool.shutdown(wait=True, cancel_futures=True)
+    assert any(future.cancelled() for future in futures)
+    assert block_names and all(isUnlinked(block_name) for block_name in block_names)
+
+
+def testWorkerCountWithoutProcessPools(monkeypatch):
+    assert Qneat3Parallel.workerCount(4) == 4
+    monkeypatch.setattr(Qneat3Parallel, 'PROCESS_POOLS', False)
+    assert Qneat3Parallel.workerCount(4) == 1 and Qneat3Parallel.workerCount(0) == 1
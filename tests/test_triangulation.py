@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from numpy import allclose, column_stack, isnan, mgrid, random
+
+from QNEAT3.Qneat3Triangulation import delaunayTriangles, interpolateTriangles
+
+scipy_interpolate = pytest.importorskip('scipy.interpolate')
+
+
+def testInterpolationMatchesScipy():
+    rng = random.default_rng(7)
+    x = rng.uniform(0, 1000, 500)
+    y = rng.uniform(0, 800, 500)
+    values = rng.uniform(0, 100, 500)
+    nrows, ncols = 160, 200
+    geotransform = (0.0, 5.0, 0.0, 800.0, 0.0, -5.0)
+
+    #small blocks, so the triangles are spread over many of them
+    raster_values = interpolateTriangles(x, y, values, delaunayTriangles(x, y), geotransform, nrows, ncols, -9999, block_size=5000)
+
+    rows, cols = mgrid[0:nrows, 0:ncols]
+    interpolator = scipy_interpolate.LinearNDInterpolator(column_stack((x, y)), values)
+    expected = interpolator(column_stack(((cols.ravel() + 0.5) * 5.0, 800.0 - (rows.ravel() + 0.5) * 5.0))).reshape(nrows, ncols)
+    assert ((raster_values == -9999) == isnan(expected)).all()
+    assert allclose(raster_values[~isnan(expected)], expected[~isnan(expected)])
+
+
+def testTooFewPoints():
+    assert delaunayTriangles([0.0, 1.0], [0.0, 1.0]).shape == (0, 3)